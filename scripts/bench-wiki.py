@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+"""
+AI开发知识文档库服务器压测
+生成合成文档库，在临时端口启动 start-wiki.py 或 simple-wiki.py，
+用并发长连接客户端按路由类型测量吞吐与延迟分位数，结果写入JSON
+"""
+
+import argparse
+import http.client
+import json
+import platform
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from urllib.parse import quote
+
+# 配置
+SCRIPTS_DIR = Path(__file__).parent
+SERVERS = {
+    'start': SCRIPTS_DIR / 'start-wiki.py',
+    'simple': SCRIPTS_DIR / 'simple-wiki.py',
+}
+ROUTES = ['markdown', 'directory', 'static', 'not_found']
+STARTUP_TIMEOUT = 60.0
+
+# 合成文档素材
+CJK_WORDS = ['智能体', '产品开发', '最佳实践', '工程方法论', '上下文工程', '需求文档', '架构设计',
+             '测试策略', '性能优化', '知识库', '工作流', '用户体验', '数据安全', '模型评估']
+ASCII_WORDS = ['agent', 'context', 'prompt', 'pipeline', 'latency', 'cache', 'render', 'server',
+               'markdown', 'template', 'workflow', 'benchmark', 'deploy', 'review']
+CODE_LANGUAGES = ['python', 'javascript', 'bash', 'json', 'yaml']
+
+
+def sentence(rng, words=12):
+    """生成中英混排的句子"""
+    parts = []
+    for _ in range(words):
+        if rng.random() < 0.6:
+            parts.append(rng.choice(CJK_WORDS))
+        else:
+            parts.append(rng.choice(ASCII_WORDS))
+    text = ' '.join(parts)
+    if rng.random() < 0.3:
+        text += f" **{rng.choice(CJK_WORDS)}** `{rng.choice(ASCII_WORDS)}()`"
+    return text + '。'
+
+
+def synthetic_document(rng, title, target_bytes, table_rows, code_blocks, links):
+    """生成一篇包含长段落、大表格、多个代码块与交叉链接的文档"""
+    lines = [f'# {title}', '', sentence(rng, 20), '']
+    section = 0
+    while sum(len(line.encode('utf-8')) + 1 for line in lines) < target_bytes:
+        section += 1
+        lines += [f'## {section}. {rng.choice(CJK_WORDS)} {rng.choice(ASCII_WORDS)}', '']
+        lines += [sentence(rng, rng.randint(15, 60)) for _ in range(3)] + ['']
+        lines += [f'- {sentence(rng, 6)}' for _ in range(5)] + ['']
+        if section == 1 and table_rows:
+            lines += ['| 指标 | 描述 | 数值 | 备注 |', '|------|------|------|------|']
+            lines += [f'| {rng.choice(ASCII_WORDS)} | {rng.choice(CJK_WORDS)} | {rng.randint(1, 9999)} | '
+                      f'{sentence(rng, 4)} |' for _ in range(table_rows)]
+            lines.append('')
+        for _ in range(code_blocks):
+            language = rng.choice(CODE_LANGUAGES)
+            lines += [f'```{language}'] + [f'{rng.choice(ASCII_WORDS)}_{i} = "{rng.choice(CJK_WORDS)}"'
+                                           for i in range(rng.randint(5, 20))] + ['```', '']
+        if links:
+            lines += [f'参见 [{target}](/{target})' for target in rng.sample(links, min(3, len(links)))] + ['']
+    return '\n'.join(lines) + '\n'
+
+
+def generate_corpus(root, docs=60, depth=3, doc_kb=16, table_rows=50, code_blocks=3,
+                    static_files=20, static_kb=64, seed=42):
+    """在root下生成合成文档库，返回按路由类型分组的URL列表"""
+    rng = random.Random(seed)
+    directories = ['']
+    frontier = ['']
+    for level in range(1, depth + 1):
+        frontier = [f'{parent}/section-{level}-{index}'.lstrip('/') for parent in frontier for index in range(2)]
+        directories += frontier
+
+    doc_paths = []
+    for index in range(docs):
+        directory = directories[index % len(directories)]
+        name = f'文档-{index:04d}.md' if index % 3 == 0 else f'doc-{index:04d}.md'
+        doc_paths.append(f'{directory}/{name}' if directory else name)
+
+    for index, rel in enumerate(doc_paths):
+        path = root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        size = doc_kb * 1024 * (4 if index % 10 == 0 else 1)
+        path.write_text(synthetic_document(rng, f'合成文档 {index}', size, table_rows if index % 4 == 0 else 0,
+                                           code_blocks, doc_paths), encoding='utf-8')
+    (root / 'wiki-index.md').write_text(
+        '# 合成文档库\n\n' + '\n'.join(f'- [{rel}](/{rel})' for rel in doc_paths) + '\n', encoding='utf-8')
+
+    static_paths = []
+    for index in range(static_files):
+        rel = f'{directories[index % len(directories)]}/asset-{index:03d}.json'.lstrip('/')
+        (root / rel).write_bytes(json.dumps({'id': index, 'data': 'x' * (static_kb * 1024)}).encode('utf-8'))
+        static_paths.append(rel)
+
+    return {
+        'markdown': ['/' + quote(rel) for rel in doc_paths],
+        'directory': ['/' + quote(rel) + '/' for rel in directories if rel],
+        'static': ['/' + quote(rel) for rel in static_paths],
+        'not_found': [f'/missing/page-{index}.md' for index in range(50)],
+    }
+
+
+def free_port():
+    """获取一个空闲的临时端口"""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(server, corpus, port, extra_args):
+    """启动被测服务器，轮询 /readyz 直到就绪，返回 (进程, 端口绑定耗时, 就绪耗时)
+
+    后台预热期间 /readyz 返回503；没有就绪探针的服务器（返回404等）在首次应答时即视为就绪。
+    """
+    command = [sys.executable, str(SERVERS[server]), '--port', str(port), '--wiki-dir', str(corpus),
+               '--headless', '--rate-limit', '0'] + extra_args
+    process = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    began = time.perf_counter()
+    bind_seconds = None
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"服务器启动失败，退出码 {process.returncode}")
+        try:
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            connection.request('GET', '/readyz')
+            response = connection.getresponse()
+            response.read()
+            connection.close()
+        except (OSError, http.client.HTTPException):
+            time.sleep(0.05)
+            continue
+        if bind_seconds is None:
+            bind_seconds = time.perf_counter() - began
+        if response.status != 503:
+            return process, bind_seconds, time.perf_counter() - began
+        time.sleep(0.05)
+    process.terminate()
+    raise RuntimeError("服务器启动超时")
+
+
+def percentile(sorted_values, fraction):
+    """最近秩法分位数"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+def run_route(port, urls, requests, concurrency, accept_encoding, seed):
+    """以 concurrency 个长连接客户端请求 urls，返回延迟统计"""
+    latencies = []
+    errors = []
+    status_counts = {}
+    lock = threading.Lock()
+    per_client = [requests // concurrency + (1 if i < requests % concurrency else 0) for i in range(concurrency)]
+    headers = {'Accept-Encoding': accept_encoding} if accept_encoding else {}
+
+    def client(count, client_seed):
+        rng = random.Random(client_seed)
+        connection = None
+        local = []
+        reconnects = 0
+        for _ in range(count):
+            url = rng.choice(urls)
+            began = time.perf_counter()
+            try:
+                if connection is None:
+                    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+                    reconnects += 1
+                connection.request('GET', url, headers=headers)
+                response = connection.getresponse()
+                response.read()
+                elapsed = time.perf_counter() - began
+                local.append(elapsed)
+                with lock:
+                    status_counts[response.status] = status_counts.get(response.status, 0) + 1
+                if response.will_close:
+                    connection.close()
+                    connection = None
+            except (OSError, http.client.HTTPException) as e:
+                with lock:
+                    errors.append(repr(e))
+                if connection is not None:
+                    connection.close()
+                connection = None
+        if connection is not None:
+            connection.close()
+        with lock:
+            latencies.extend(local)
+            connections[0] += reconnects
+
+    connections = [0]
+    threads = [threading.Thread(target=client, args=(count, seed + index))
+               for index, count in enumerate(per_client) if count]
+    began = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - began
+
+    latencies.sort()
+    to_ms = 1000.0
+    return {
+        'requests': len(latencies),
+        'errors': len(errors),
+        'error_samples': errors[:5],
+        'status': {str(code): count for code, count in sorted(status_counts.items())},
+        'connections': connections[0],
+        'seconds': round(elapsed, 4),
+        'throughput_rps': round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        'latency_ms': {
+            'mean': round(sum(latencies) / len(latencies) * to_ms, 3) if latencies else 0.0,
+            'p50': round(percentile(latencies, 0.50) * to_ms, 3),
+            'p95': round(percentile(latencies, 0.95) * to_ms, 3),
+            'p99': round(percentile(latencies, 0.99) * to_ms, 3),
+            'max': round(latencies[-1] * to_ms, 3) if latencies else 0.0,
+        },
+    }
+
+
+def git_revision():
+    """当前仓库版本，便于对比不同版本的结果"""
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=SCRIPTS_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_report(report, baseline=None):
+    """打印结果表格，提供基线时显示p95与吞吐变化"""
+    print(f"\n📊 {report['server']} · 文档 {report['corpus']['docs']} 篇 · 并发 {report['concurrency']}")
+    print(f"⏱️  端口绑定 {report['bind_seconds'] * 1000:.0f} ms · 就绪 {report['ready_seconds'] * 1000:.0f} ms")
+    print(f"{'路由':<11}{'请求':>8}{'错误':>6}{'吞吐/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for route, result in report['results'].items():
+        latency = result['latency_ms']
+        line = (f"{route:<11}{result['requests']:>8}{result['errors']:>6}{result['throughput_rps']:>10.1f}"
+                f"{latency['p50']:>10.2f}{latency['p95']:>10.2f}{latency['p99']:>10.2f}")
+        previous = (baseline or {}).get('results', {}).get(route)
+        if previous:
+            rps_change = (result['throughput_rps'] / previous['throughput_rps'] - 1) if previous['throughput_rps'] else 0
+            p95_change = (latency['p95'] / previous['latency_ms']['p95'] - 1) if previous['latency_ms']['p95'] else 0
+            line += f"   吞吐 {rps_change:+.0%} · p95 {p95_change:+.0%}"
+        print(line)
+
+
+def main():
+    """生成文档库、启动服务器并压测"""
+    parser = argparse.ArgumentParser(description="AI开发知识文档库服务器压测")
+    parser.add_argument('--server', choices=sorted(SERVERS), default='start',
+                        help='被测服务器（默认 start）')
+    parser.add_argument('--docs', type=int, default=60, help='合成文档数（默认 60）')
+    parser.add_argument('--depth', type=int, default=3, help='目录深度（默认 3）')
+    parser.add_argument('--doc-kb', type=int, default=16, help='单篇文档大小KB，每10篇有一篇4倍大小（默认 16）')
+    parser.add_argument('--table-rows', type=int, default=50, help='大表格行数（默认 50）')
+    parser.add_argument('--code-blocks', type=int, default=3, help='每节代码块数（默认 3）')
+    parser.add_argument('--static-files', type=int, default=20, help='静态文件数（默认 20）')
+    parser.add_argument('--static-kb', type=int, default=64, help='静态文件大小KB（默认 64）')
+    parser.add_argument('--requests', type=int, default=500, help='每种路由的请求数（默认 500）')
+    parser.add_argument('--concurrency', type=int, default=8, help='并发客户端数（默认 8）')
+    parser.add_argument('--routes', default=','.join(ROUTES), help=f'测试的路由类型（默认 {",".join(ROUTES)}）')
+    parser.add_argument('--accept-encoding', default='gzip', help='请求的Accept-Encoding，空字符串表示不压缩')
+    parser.add_argument('--seed', type=int, default=42, help='随机种子（默认 42）')
+    parser.add_argument('--output', type=Path, default=None, help='结果JSON输出路径')
+    parser.add_argument('--baseline', type=Path, default=None, help='用于对比的历史结果JSON')
+    parser.add_argument('--keep-corpus', action='store_true', help='保留生成的文档库')
+    parser.add_argument('server_args', nargs=argparse.REMAINDER,
+                        help='传给服务器的额外参数，置于 -- 之后')
+    args = parser.parse_args()
+
+    routes = [route for route in args.routes.split(',') if route]
+    unknown = set(routes) - set(ROUTES)
+    if unknown:
+        parser.error(f"未知路由类型: {', '.join(sorted(unknown))}")
+    server_args = args.server_args[1:] if args.server_args[:1] == ['--'] else args.server_args
+
+    corpus = Path(tempfile.mkdtemp(prefix='wiki-bench-'))
+    process = None
+    try:
+        generate_began = time.perf_counter()
+        urls = generate_corpus(corpus, docs=args.docs, depth=args.depth, doc_kb=args.doc_kb,
+                               table_rows=args.table_rows, code_blocks=args.code_blocks,
+                               static_files=args.static_files, static_kb=args.static_kb, seed=args.seed)
+        generate_seconds = time.perf_counter() - generate_began
+        corpus_bytes = sum(path.stat().st_size for path in corpus.rglob('*') if path.is_file())
+
+        port = free_port()
+        process, bind_seconds, ready_seconds = start_server(args.server, corpus, port, server_args)
+
+        results = {}
+        for route in routes:
+            results[route] = run_route(port, urls[route], args.requests, args.concurrency,
+                                       args.accept_encoding, args.seed)
+
+        report = {
+            'server': args.server,
+            'server_args': server_args,
+            'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'concurrency': args.concurrency,
+            'requests_per_route': args.requests,
+            'accept_encoding': args.accept_encoding,
+            'corpus': {
+                'docs': args.docs, 'depth': args.depth, 'doc_kb': args.doc_kb,
+                'table_rows': args.table_rows, 'code_blocks': args.code_blocks,
+                'static_files': args.static_files, 'static_kb': args.static_kb,
+                'seed': args.seed, 'bytes': corpus_bytes,
+                'generate_seconds': round(generate_seconds, 3),
+            },
+            'bind_seconds': round(bind_seconds, 3),
+            'ready_seconds': round(ready_seconds, 3),
+            'results': results,
+        }
+    finally:
+        if process is not None:
+            process.terminate()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        if args.keep_corpus:
+            print(f"📁 文档库保留在: {corpus}")
+        else:
+            shutil.rmtree(corpus, ignore_errors=True)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 结果已写入: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
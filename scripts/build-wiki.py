@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+AI开发知识文档库静态站点构建
+将全部Markdown文件与目录列表预渲染为HTML，生产环境可直接用静态文件服务器托管
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+from wiki_assets import ASSETS
+from wiki_cache import content_etag
+from wiki_render import (TEMPLATE, MarkdownConverterPool, PageShell, directory_listing, insert_toc,
+                         markdown_renderer_version, page_title, read_source, rewrite_md_links, scan_directory)
+
+# 配置
+WIKI_DIR = Path(__file__).parent.parent
+OUTPUT_DIR = WIKI_DIR / '_site'
+MANIFEST_NAME = '.wiki-build-manifest.json'
+INDEX_SOURCE = 'wiki-index.md'
+# 不发布的缓存目录（以.开头的条目同样跳过）
+SKIPPED_DIRS = frozenset(('__pycache__',))
+
+# 每个构建进程独立持有一个转换器
+CONVERTERS = MarkdownConverterPool(size=1)
+
+# 静态站点的页面外壳：导航链接同样改写为 .html
+BUILD_SHELL = PageShell(rewrite_md_links(TEMPLATE), stylesheet=ASSETS.url('wiki.css'),
+                        highlight=ASSETS.url('highlight.css'))
+
+
+def is_published(name, is_dir):
+    """隐藏条目与缓存目录不输出到站点"""
+    return not name.startswith('.') and not (is_dir and name in SKIPPED_DIRS)
+
+
+def collect_sources(wiki_dir, output_dir):
+    """遍历文档目录，返回 Markdown文件、目录、其他静态文件 的相对路径列表"""
+    markdown_files, directories, static_files = [], [], []
+    for root, dirnames, filenames in os.walk(wiki_dir):
+        root_path = Path(root)
+        dirnames[:] = sorted(name for name in dirnames
+                             if is_published(name, True) and root_path / name != output_dir)
+        rel_root = root_path.relative_to(wiki_dir)
+        if rel_root != Path('.'):
+            directories.append(rel_root.as_posix())
+        for name in sorted(filenames):
+            if not is_published(name, False):
+                continue
+            rel = (rel_root / name).as_posix()
+            if name.endswith('.md'):
+                markdown_files.append(rel)
+            else:
+                static_files.append(rel)
+    return markdown_files, directories, static_files
+
+
+def markdown_outputs(rel):
+    """Markdown文件对应的输出路径，首页额外输出为 index.html"""
+    outputs = [rel[:-3] + '.html']
+    if rel == INDEX_SOURCE:
+        outputs.append('index.html')
+    return outputs
+
+
+def directory_key(dir_path, version):
+    """目录列表只依赖子条目的名称与类型"""
+    entries = sorted(f"{entry.name}{'/' if entry.is_dir else ''}" for entry in published_entries(dir_path))
+    return content_etag('\n'.join(entries).encode('utf-8'), version)
+
+
+def published_entries(dir_path):
+    """目录列表中的条目，不含缓存目录"""
+    return [entry for entry in scan_directory(dir_path) if is_published(entry.name, entry.is_dir)]
+
+
+def write_page(output_dir, outputs, title, content):
+    """套用模板、改写 .md 链接并写入全部输出文件"""
+    html = BUILD_SHELL.render(title, rewrite_md_links(content))
+    for rel in outputs:
+        target = output_dir / rel
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_bytes(html)
+
+
+def render_task(kind, rel, wiki_dir, output_dir, outputs):
+    """在构建进程中渲染单个Markdown文件或目录列表，返回 (相对路径, 耗时秒)"""
+    began = time.perf_counter()
+    if kind == 'markdown':
+        file_path = wiki_dir / rel
+        _, text = read_source(file_path)
+        content, headings = CONVERTERS.convert_with_toc(text)
+        write_page(output_dir, outputs, page_title(file_path), insert_toc(content, headings))
+    else:
+        title, content = directory_listing(wiki_dir / rel, wiki_dir, published_entries(wiki_dir / rel))
+        write_page(output_dir, outputs, title, content)
+    return rel, time.perf_counter() - began
+
+
+def copy_assets(output_dir):
+    """写入带指纹的静态资源，文件名含内容哈希，已存在即为最新"""
+    copied = 0
+    for asset in ASSETS:
+        target = output_dir / asset.url.lstrip('/')
+        if not target.exists():
+            target.parent.mkdir(parents=True, exist_ok=True)
+            target.write_bytes(asset.page.body)
+            copied += 1
+    return copied
+
+
+def load_manifest(output_dir):
+    """读取上次构建的清单，不存在或损坏时返回空清单"""
+    try:
+        with open(output_dir / MANIFEST_NAME, 'r', encoding='utf-8') as f:
+            return json.load(f).get('entries', {})
+    except (OSError, ValueError):
+        return {}
+
+
+def save_manifest(output_dir, entries, version):
+    """写入构建清单"""
+    with open(output_dir / MANIFEST_NAME, 'w', encoding='utf-8') as f:
+        json.dump({'renderer': version, 'entries': entries}, f, ensure_ascii=False, indent=1, sort_keys=True)
+
+
+def build(wiki_dir, output_dir, jobs=None, force=False):
+    """增量构建静态站点，返回构建统计"""
+    began = time.perf_counter()
+    version = markdown_renderer_version()
+    output_dir.mkdir(parents=True, exist_ok=True)
+    previous = {} if force else load_manifest(output_dir)
+    entries = {}
+    tasks = []
+
+    copied = copy_assets(output_dir)
+    markdown_files, directories, static_files = collect_sources(wiki_dir, output_dir)
+
+    for rel in markdown_files:
+        source, _ = read_source(wiki_dir / rel)
+        entries[rel] = {'kind': 'markdown', 'key': content_etag(source, version),
+                        'outputs': markdown_outputs(rel)}
+    for rel in directories:
+        entries[rel + '/'] = {'kind': 'directory', 'key': directory_key(wiki_dir / rel, version),
+                              'outputs': [rel + '/index.html'], 'source': rel}
+    for rel in static_files:
+        stat = (wiki_dir / rel).stat()
+        entries[rel] = {'kind': 'static', 'key': f'{stat.st_size}:{stat.st_mtime_ns}', 'outputs': [rel]}
+
+    for name, entry in entries.items():
+        old = previous.get(name)
+        up_to_date = (old is not None and old.get('key') == entry['key']
+                      and all((output_dir / rel).exists() for rel in entry['outputs']))
+        if up_to_date:
+            entry['seconds'] = old.get('seconds', 0.0)
+            continue
+        if entry['kind'] == 'static':
+            target = output_dir / name
+            target.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copy2(wiki_dir / name, target)
+            copied += 1
+        else:
+            tasks.append((entry['kind'], entry.get('source', name), name))
+
+    # 删除源文件已不存在的输出
+    removed = 0
+    for name, old in previous.items():
+        if name in entries:
+            continue
+        for rel in old.get('outputs', []):
+            target = output_dir / rel
+            if target.exists():
+                target.unlink()
+                removed += 1
+
+    timings = []
+    if tasks:
+        with ProcessPoolExecutor(max_workers=jobs, initializer=CONVERTERS.start) as pool:
+            futures = {pool.submit(render_task, kind, rel, wiki_dir, output_dir, entries[name]['outputs']): name
+                       for kind, rel, name in tasks}
+            for future in as_completed(futures):
+                name = futures[future]
+                _, seconds = future.result()
+                entries[name]['seconds'] = round(seconds, 6)
+                timings.append((seconds, name))
+
+    save_manifest(output_dir, entries, version)
+    return {
+        'rendered': len(tasks),
+        'skipped': sum(1 for entry in entries.values() if entry['kind'] != 'static') - len(tasks),
+        'copied': copied,
+        'removed': removed,
+        'timings': sorted(timings, reverse=True),
+        'elapsed': time.perf_counter() - began,
+    }
+
+
+def main():
+    """构建静态站点"""
+    parser = argparse.ArgumentParser(description="AI开发知识文档库静态站点构建")
+    parser.add_argument('--output', type=Path, default=OUTPUT_DIR,
+                        help=f'输出目录（默认 {OUTPUT_DIR}）')
+    parser.add_argument('--jobs', type=int, default=os.cpu_count(),
+                        help='并行渲染进程数（默认 CPU核数）')
+    parser.add_argument('--force', action='store_true',
+                        help='忽略构建清单，全部重新渲染')
+    parser.add_argument('--top', type=int, default=10,
+                        help='显示耗时最长的前N个文件（默认 10）')
+    args = parser.parse_args()
+
+    if importlib.util.find_spec('markdown') is None:
+        print("❌ 缺少依赖: pip install markdown")
+        sys.exit(1)
+
+    output_dir = args.output.resolve()
+    stats = build(WIKI_DIR.resolve(), output_dir, jobs=args.jobs, force=args.force)
+
+    print(f"""
+🏗️  静态站点构建完成
+
+📁 输出目录: {output_dir}
+📄 渲染: {stats['rendered']} · 未变化跳过: {stats['skipped']} · 复制静态文件: {stats['copied']} · 清理: {stats['removed']}
+⏱️  总耗时: {stats['elapsed'] * 1000:.0f} ms · 渲染累计: {sum(s for s, _ in stats['timings']) * 1000:.0f} ms
+""")
+    if stats['timings'] and args.top > 0:
+        print("🐢 渲染耗时:")
+        for seconds, name in stats['timings'][:args.top]:
+            print(f"   {seconds * 1000:8.1f} ms  {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+AI开发知识文档库断链检查
+并行解析全部Markdown文件中的站内链接，存在断链时以非零状态退出，可用作pre-commit钩子
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+from wiki_links import check_links
+
+# 配置
+WIKI_DIR = Path(__file__).parent.parent
+
+
+def main():
+    """检查断链"""
+    parser = argparse.ArgumentParser(description="AI开发知识文档库断链检查")
+    parser.add_argument('--wiki-dir', type=Path, default=WIKI_DIR,
+                        help='文档根目录（默认为仓库根目录）')
+    parser.add_argument('--jobs', type=int, default=os.cpu_count(),
+                        help='并行检查进程数（默认 CPU核数；文件较少时自动减少）')
+    parser.add_argument('--quiet', action='store_true',
+                        help='只输出断链，不输出汇总')
+    args = parser.parse_args()
+
+    began = time.perf_counter()
+    files, checked, broken = check_links(args.wiki_dir.resolve(), jobs=args.jobs)
+    elapsed = time.perf_counter() - began
+
+    for rel_path, line, target in broken:
+        print(f"{rel_path}:{line}: {target}")
+    if not args.quiet:
+        summary = f"{files} 个文件 · {checked} 个站内链接 · 耗时 {elapsed * 1000:.0f} ms"
+        if broken:
+            print(f"\n❌ 发现 {len(broken)} 个断链（{summary}）", file=sys.stderr)
+        else:
+            print(f"✅ 未发现断链（{summary}）", file=sys.stderr)
+    sys.exit(1 if broken else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,415 +1,521 @@
 #!/usr/bin/env python3
 """
 AI开发知识文档库本地服务器
-基于Python内置HTTP服务器，支持Markdown渲染
+基于Python内置HTTP服务器，支持Markdown渲染；渲染后端可插拔（markdown / 内置simple），
+默认选择可用的最佳后端，缺少依赖时自动回退
 """
 
+import time
+
+# 启动计时在导入其他模块之前开始，端口绑定与预热耗时都包含模块导入
+STARTUP_BEGAN = time.perf_counter()
+
+import argparse
+import functools
 import http.server
-import socketserver
 import os
-import sys
-import webbrowser
 import threading
-import time
-import markdown
+from stat import S_ISDIR
 from pathlib import Path
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from wiki_admission import PRIORITY_CHEAP, PRIORITY_EXPENSIVE
+from wiki_api import ApiError, RenderWorkers
+from wiki_assets import ASSETS
+from wiki_cache import DiskRenderCache, RenderCache, RenderedPage, content_etag, file_identity, format_stats
+from wiki_files import FILE_INFO_CACHE
+from wiki_links import LinkGraph, backlinks_html, backlinks_key
+from wiki_metrics import METRICS, timed_blocks
+from wiki_render import (DEFAULT_LISTING_PAGE_SIZE, HIGHLIGHTER, TEMPLATE, DirectoryIndex, PageShell,
+                         directory_listing, index_linked_pages, listing_page_number, load_persisted_pages, page_title,
+                         prerender_pages, read_source, renderer_version)
+from wiki_renderers import RENDERERS, get_renderer, render_document, select_renderer
+from wiki_search import SearchIndex, search_results_html
+from wiki_server import PageResponseMixin, add_server_arguments, create_server, serve
+from wiki_watch import LIVE_RELOAD_SCRIPT, EventBroadcaster, FileWatcher, changed_url_paths
 
 # 配置
 PORT = 1024
 WIKI_DIR = Path(__file__).parent.parent
-TEMPLATE = """
-<!DOCTYPE html>
-<html lang="zh-CN">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>{title} - AI开发知识文档库</title>
-    <link href="https://cdnjs.cloudflare.com/ajax/libs/prism/1.25.0/themes/prism.min.css" rel="stylesheet">
-    <style>
-        body {{
-            font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', 'Roboto', sans-serif;
-            line-height: 1.6;
-            color: #333;
-            max-width: 1200px;
-            margin: 0 auto;
-            padding: 20px;
-            background: #f8f9fa;
-        }}
-        
-        .header {{
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            color: white;
-            padding: 20px;
-            border-radius: 10px;
-            margin-bottom: 30px;
-            text-align: center;
-        }}
-        
-        .header h1 {{
-            margin: 0;
-            font-size: 2.5em;
-        }}
-        
-        .header p {{
-            margin: 10px 0 0 0;
-            opacity: 0.9;
-        }}
-        
-        .content {{
-            background: white;
-            padding: 30px;
-            border-radius: 10px;
-            box-shadow: 0 2px 10px rgba(0,0,0,0.1);
-        }}
-        
-        .nav-bar {{
-            background: #2c3e50;
-            padding: 15px;
-            border-radius: 10px;
-            margin-bottom: 20px;
-        }}
-        
-        .nav-bar a {{
-            color: #ecf0f1;
-            text-decoration: none;
-            margin-right: 20px;
-            padding: 8px 16px;
-            border-radius: 5px;
-            transition: background-color 0.3s;
-        }}
-        
-        .nav-bar a:hover {{
-            background-color: #34495e;
-        }}
-        
-        .nav-bar a.home {{
-            background-color: #3498db;
-        }}
-        
-        h1, h2, h3, h4, h5, h6 {{
-            color: #2c3e50;
-            margin-top: 30px;
-            margin-bottom: 15px;
-        }}
-        
-        h1 {{
-            border-bottom: 3px solid #3498db;
-            padding-bottom: 10px;
-        }}
-        
-        h2 {{
-            border-bottom: 2px solid #e74c3c;
-            padding-bottom: 8px;
-        }}
-        
-        h3 {{
-            color: #e67e22;
-        }}
-        
-        code {{
-            background: #f1f2f6;
-            padding: 2px 6px;
-            border-radius: 4px;
-            font-family: 'Monaco', 'Menlo', monospace;
-            font-size: 0.9em;
-        }}
-        
-        pre {{
-            background: #2d3748;
-            color: #e2e8f0;
-            padding: 20px;
-            border-radius: 8px;
-            overflow-x: auto;
-            margin: 20px 0;
-        }}
-        
-        pre code {{
-            background: none;
-            padding: 0;
-            color: inherit;
-        }}
-        
-        blockquote {{
-            border-left: 4px solid #3498db;
-            padding: 10px 20px;
-            margin: 20px 0;
-            background: #f8f9ff;
-            font-style: italic;
-        }}
-        
-        table {{
-            width: 100%;
-            border-collapse: collapse;
-            margin: 20px 0;
-        }}
-        
-        th, td {{
-            padding: 12px;
-            text-align: left;
-            border: 1px solid #ddd;
-        }}
-        
-        th {{
-            background: #3498db;
-            color: white;
-        }}
-        
-        tr:nth-child(even) {{
-            background: #f2f2f2;
-        }}
-        
-        .emoji {{
-            font-size: 1.2em;
-        }}
-        
-        .footer {{
-            margin-top: 50px;
-            padding: 20px;
-            text-align: center;
-            color: #7f8c8d;
-            border-top: 1px solid #ecf0f1;
-        }}
-        
-        .badge {{
-            display: inline-block;
-            padding: 4px 8px;
-            background: #e74c3c;
-            color: white;
-            border-radius: 12px;
-            font-size: 0.8em;
-            margin-left: 10px;
-        }}
-        
-        .toc {{
-            background: #f8f9fa;
-            border: 1px solid #dee2e6;
-            border-radius: 8px;
-            padding: 20px;
-            margin: 20px 0;
-        }}
-        
-        .toc h3 {{
-            margin-top: 0;
-            color: #495057;
-        }}
-        
-        .toc ul {{
-            margin: 0;
-            padding-left: 20px;
-        }}
-        
-        .toc li {{
-            margin: 8px 0;
-        }}
-        
-        .file-tree {{
-            background: #f8f9fa;
-            border-left: 4px solid #28a745;
-            padding: 15px;
-            margin: 20px 0;
-            font-family: monospace;
-        }}
-        
-        @media (max-width: 768px) {{
-            body {{
-                padding: 10px;
-            }}
-            .header h1 {{
-                font-size: 2em;
-            }}
-            .content {{
-                padding: 20px;
-            }}
-        }}
-    </style>
-    <script src="https://cdnjs.cloudflare.com/ajax/libs/prism/1.25.0/components/prism-core.min.js"></script>
-    <script src="https://cdnjs.cloudflare.com/ajax/libs/prism/1.25.0/plugins/autoloader/prism-autoloader.min.js"></script>
-</head>
-<body>
-    <div class="header">
-        <h1>🤖 AI开发知识文档库</h1>
-        <p>AI Agent产品开发 · 最佳实践 · 工程方法论</p>
-    </div>
-    
-    <div class="nav-bar">
-        <a href="/" class="home">🏠 首页</a>
-        <a href="/docs/AI_AGENT_DEVELOPMENT_GUIDE.md">📖 Agent开发指南</a>
-        <a href="/templates/AGENT_PRD_TEMPLATE.md">📝 PRD模板</a>
-        <a href="/examples/Insurance-Agent-PRD-Example.md">💼 实践案例</a>
-        <a href="/docs/">📚 所有文档</a>
-    </div>
-    
-    <div class="content">
-        {content}
-    </div>
+
+# 渲染结果缓存（按路径 + mtime + size）
+PAGE_CACHE = RenderCache()
+
+# 磁盘渲染缓存（按内容ETag寻址，重启后载入，按渲染后端分文件）；--no-render-cache 时为None。
+# 缓存目录位于文档目录内，不对外提供
+RENDER_CACHE_DIR = WIKI_DIR / '.wiki-cache'
+DISK_CACHE = None
+
+# 后台预热（搜索索引、磁盘缓存、首页链接页面预渲染）完成时置位，/readyz 据此返回
+READY = threading.Event()
+
+# 文档链接图：渲染与文件变化时按文件更新，页面底部据此显示反向链接
+LINK_GRAPH = LinkGraph(WIKI_DIR)
+
+# 目录扫描缓存（按目录mtime失效）与单页条目上限
+DIRECTORY_INDEX = DirectoryIndex()
+LISTING_PAGE_SIZE = DEFAULT_LISTING_PAGE_SIZE
+
+# 全文搜索索引（启动时建立，按文件增量更新）
+SEARCH_INDEX = SearchIndex(WIKI_DIR)
+
+# 浏览器自动刷新事件（文件监视器启用时生效）
+RELOAD_EVENTS = EventBroadcaster()
+WATCH_ENABLED = False
+
+# 渲染后端（--renderer，见 wiki_renderers.RENDERERS）与使用其样式表的页面外壳，由 use_renderer 设置
+RENDERER = None
+SHELL = None
+
+# 后台预热中渲染后端导入成功（或已回退到可用后端）时置位；此前渲染页面的请求最多等待该秒数，仍未确定时返回503
+RENDERER_READY = threading.Event()
+RENDERER_WAIT_SECONDS = 5.0
+
+# 批量渲染API的渲染进程池（--render-workers，首次批量请求时创建）
+RENDER_WORKERS = RenderWorkers()
+
+# 渲染器版本：扩展配置或模板变化时ETag随之变化；计算时需导入markdown，推迟到首次使用
+RENDERER_VERSION = None
+
+def use_renderer(renderer):
+    """切换渲染后端：页面外壳改用后端的样式表，渲染器版本与内存缓存随之失效"""
+    global RENDERER, SHELL, RENDERER_VERSION
+    RENDERER = renderer
+    SHELL = PageShell(TEMPLATE, stylesheet=ASSETS.url(renderer.stylesheet), highlight=ASSETS.url('highlight.css'))
+    RENDERER_VERSION = None
+    PAGE_CACHE.clear()
+
+def current_renderer_version():
+    """返回渲染器版本（后端版本 + 页面模板），首次调用时计算"""
+    global RENDERER_VERSION
+    if RENDERER_VERSION is None:
+        RENDERER_VERSION = renderer_version(RENDERER.name, RENDERER.version(), SHELL.template, LIVE_RELOAD_SCRIPT)
+    return RENDERER_VERSION
+
+def api_renderer(name=None):
+    """批量渲染API使用的后端：默认与页面相同，请求中可指定其他可用后端以比较输出与耗时"""
+    if name is None or name == RENDERER.name:
+        renderer = RENDERER
+    elif name in RENDERERS and get_renderer(name).available():
+        renderer = get_renderer(name)
+    else:
+        raise ApiError(400, f"渲染后端不可用: {name}（可用: {', '.join(available_renderers())}）")
+    return functools.partial(render_document, renderer.name), renderer.name, renderer.version()
+
+def available_renderers():
+    """本机可用的渲染后端名称"""
+    return [name for name in RENDERERS if get_renderer(name).available()]
+
+def markdown_blocks(content, backlinks=()):
+    """按输出顺序产出页面正文片段（在页头发送之后才开始转换），渲染耗时按后端记入指标"""
+    yield from timed_blocks(RENDERER.blocks(content), RENDERER.name)
+    yield backlinks_html(WIKI_DIR, backlinks)
+    yield LIVE_RELOAD_SCRIPT
+
+def build_markdown_page(file_path, last_modified=None):
+    """读取并渲染Markdown文件，返回RenderedPage"""
+    source, content = read_source(file_path)
+    title = page_title(file_path)
+    backlinks = update_links(file_path, content)
     
-    <div class="footer">
-        <p>📄 AI开发知识文档库 · 🚀 让AI Agent开发更简单 · ⏰ 最后更新: 2025-08-29</p>
-        <p>💡 基于Claude Code实际经验构建 · 🌟 持续更新中</p>
-    </div>
+    # 生成完整HTML
+    body = SHELL.render(title, ''.join(markdown_blocks(content, backlinks)))
     
-    <script>
-        // 自动生成目录
-        document.addEventListener('DOMContentLoaded', function() {{
-            const headers = document.querySelectorAll('h2, h3');
-            if (headers.length > 3) {{
-                let toc = '<div class="toc"><h3>📋 目录</h3><ul>';
-                headers.forEach(function(header, index) {{
-                    const id = 'header-' + index;
-                    header.id = id;
-                    const level = header.tagName === 'H2' ? '' : '&nbsp;&nbsp;';
-                    toc += `<li>${{level}}<a href="#${{id}}">${{header.textContent}}</a></li>`;
-                }});
-                toc += '</ul></div>';
-                
-                const firstH2 = document.querySelector('h2');
-                if (firstH2) {{
-                    firstH2.insertAdjacentHTML('beforebegin', toc);
-                }}
-            }}
-        }});
-    </script>
-</body>
-</html>
-"""
+    return RenderedPage(body, page_etag(source, backlinks), last_modified)
+
+def page_etag(source, backlinks):
+    """页面ETag由源内容、反向链接与渲染器版本共同决定"""
+    return content_etag(source + backlinks_key(backlinks), current_renderer_version())
 
-class WikiHandler(http.server.SimpleHTTPRequestHandler):
+def update_links(file_path, content):
+    """渲染的副产品：用本次读取的内容更新该文件的出链，返回其反向链接"""
+    LINK_GRAPH.update(file_path, content)
+    return LINK_GRAPH.backlinks(file_path)
+
+def on_backlinks_changed(paths):
+    """反向链接变化的页面从内存渲染缓存移除（磁盘缓存按ETag寻址，无需处理）"""
+    for path in paths:
+        PAGE_CACHE.invalidate(str(path))
+
+def store_page(file_path, identity, page):
+    """压缩后写入内存缓存，并异步写入磁盘缓存"""
+    page.compress(WikiHandler.compress_min_bytes)
+    PAGE_CACHE.put(str(file_path), identity, page)
+    if DISK_CACHE is not None:
+        DISK_CACHE.put(page)
+
+def wiki_path(url_path):
+    """URL路径对应的文档目录内路径（首页为 wiki-index.md）；解码后越出文档目录（如 /%2e%2e/）
+    或指向磁盘渲染缓存（含SQLite的 -wal/-shm 文件）时返回None"""
+    path = unquote(url_path.lstrip('/'))
+    if path == '' or path == 'index.html':
+        path = 'wiki-index.md'
+    full_path = Path(os.path.normpath(WIKI_DIR / path))
+    if not full_path.is_relative_to(WIKI_DIR) or full_path.is_relative_to(RENDER_CACHE_DIR):
+        return None
+    disk_cache = DISK_CACHE
+    if (disk_cache is not None and full_path.parent == disk_cache.path.parent
+            and full_path.name.startswith(disk_cache.path.name)):
+        return None
+    return full_path
+
+class WikiHandler(PageResponseMixin, http.server.SimpleHTTPRequestHandler):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, directory=str(WIKI_DIR), **kwargs)
     
+    @classmethod
+    def request_priority(cls, method, target):
+        """准入优先级：除公共规则外，已缓存的Markdown页面与目录列表、静态文件也是廉价请求"""
+        priority = super().request_priority(method, target)
+        if priority == PRIORITY_CHEAP or method not in ('GET', 'HEAD'):
+            return priority
+        url = urlsplit(target)
+        if url.path == '/search':
+            return PRIORITY_EXPENSIVE
+        full_path = wiki_path(url.path)
+        if full_path is None:
+            # 越出文档目录的路径直接返回404
+            return PRIORITY_CHEAP
+        # 监视线程中不stat文件：只看缓存里是否有该路径的条目，条目是否仍有效由工作线程校验
+        if full_path.suffix == '.md':
+            cached = PAGE_CACHE.contains(str(full_path))
+        elif PAGE_CACHE.contains(f"{full_path}/?page={listing_page_number(url.query)}"):
+            cached = True
+        else:
+            # 未缓存的目录需要扫描与渲染；静态文件由 sendfile 发送，不存在的路径直接返回404
+            try:
+                cached = not full_path.is_dir()
+            except (OSError, ValueError):
+                cached = True
+        return PRIORITY_CHEAP if cached else PRIORITY_EXPENSIVE
+    
     def do_GET(self):
         """处理GET请求，支持Markdown渲染"""
-        path = self.path.lstrip('/')
-        
-        # 首页重定向
-        if path == '' or path == 'index.html':
-            path = 'wiki-index.md'
-        
-        full_path = WIKI_DIR / path
+        self.measured(self.dispatch)
+    
+    def do_HEAD(self):
+        """处理HEAD请求，返回与GET相同的响应头"""
+        self.measured(self.dispatch)
+    
+    def do_POST(self):
+        """处理POST请求：批量渲染API"""
+        self.measured(self.dispatch_post)
+    
+    def dispatch_post(self):
+        """POST只提供 /api/render"""
+        if urlsplit(self.path).path != '/api/render':
+            self.send_error(404, "Not found")
+            return
+        self.route_class = 'api'
+        if not self.wait_for_renderer():
+            return
+        try:
+            self.send_render_batch(WIKI_DIR, RENDER_WORKERS, api_renderer)
+        except ConnectionError:
+            raise
+        except Exception as e:
+            self.send_error(500, f"Error rendering batch: {e}")
+    
+    def dispatch(self):
+        """按路径分派到搜索、Markdown渲染、目录列表或静态文件"""
+        url = urlsplit(self.path)
+        if url.path == '/healthz':
+            self.send_probe(True)
+            return
+        if url.path == '/readyz':
+            self.send_probe(READY.is_set())
+            return
+        if url.path == '/__metrics':
+            self.send_metrics()
+            return
+        if url.path == '/__events':
+            self.stream_events()
+            return
+        if url.path == '/search':
+            self.route_class = 'search'
+            if not self.wait_for_renderer():
+                return
+            self.render_search(parse_qs(url.query).get('q', [''])[0])
+            return
+        asset = ASSETS.get(url.path)
+        if asset is not None:
+            self.route_class = 'static'
+            self.send_asset(asset)
+            return
+        
+        full_path = wiki_path(url.path)
+        if full_path is None:
+            self.send_error(404, "File not found")
+            return
         
         try:
-            if path.endswith('.md') and full_path.exists():
-                self.render_markdown(full_path)
-            elif full_path.is_dir():
-                self.render_directory(full_path)
+            # 每个请求只stat一次，结果传给缓存查找与 Last-Modified
+            try:
+                stat = full_path.stat()
+            except (OSError, ValueError):
+                stat = None
+            if stat is not None and S_ISDIR(stat.st_mode):
+                self.route_class = 'directory'
+                if self.wait_for_renderer():
+                    self.render_directory(full_path, url, stat)
+            elif stat is not None and full_path.suffix == '.md':
+                self.route_class = 'markdown'
+                if self.wait_for_renderer():
+                    self.render_markdown(full_path, stat)
             else:
-                super().do_GET()
+                self.route_class = 'static'
+                self.send_file(self.translate_path(url.path))
         except Exception as e:
             self.send_error(500, f"Internal server error: {e}")
     
-    def render_markdown(self, file_path):
-        """渲染Markdown文件"""
+    def wait_for_renderer(self):
+        """渲染后端确定前（预热中可能回退到其他后端）不渲染页面：最多等待片刻，超时返回503并提示稍后重试"""
+        if RENDERER_READY.wait(RENDERER_WAIT_SECONDS):
+            return True
+        self.send_probe(False)
+        return False
+    
+    def render_markdown(self, file_path, stat):
+        """渲染Markdown文件：命中缓存时直接返回已编码的HTML，未命中时先发送页头再流式发送正文"""
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            # 配置Markdown扩展
-            md = markdown.Markdown(extensions=[
-                'toc',
-                'tables', 
-                'fenced_code',
-                'codehilite',
-                'attr_list',
-                'def_list',
-                'footnotes',
-                'meta'
-            ], extension_configs={
-                'codehilite': {
-                    'css_class': 'highlight',
-                    'use_pygments': False
-                },
-                'toc': {
-                    'permalink': True
-                }
-            })
-            
-            html_content = md.convert(content)
-            title = file_path.stem.replace('-', ' ').replace('_', ' ').title()
-            
-            # 生成完整HTML
-            html = TEMPLATE.format(
-                title=title,
-                content=html_content
-            )
-            
-            self.send_response(200)
-            self.send_header('Content-Type', 'text/html; charset=utf-8')
-            self.send_header('Cache-Control', 'no-cache')
-            self.end_headers()
-            self.wfile.write(html.encode('utf-8'))
+            cache_key = str(file_path)
+            identity = file_identity(stat)
+            page = PAGE_CACHE.get(cache_key, identity)
+            if page is not None:
+                self.send_page(page, extra_headers=[('X-Wiki-Cache', 'HIT')])
+                return
+            source, content = read_source(file_path)
+            backlinks = update_links(file_path, content)
+            etag = page_etag(source, backlinks)
+            body = self.send_stream(SHELL.stream(page_title(file_path), markdown_blocks(content, backlinks)),
+                                    etag, stat.st_mtime, extra_headers=[('X-Wiki-Cache', 'MISS')],
+                                    buffer_limit=PAGE_CACHE.max_bytes)
+            if body is not None:
+                store_page(file_path, identity, RenderedPage(body, etag, stat.st_mtime))
             
         except Exception as e:
             self.send_error(500, f"Error rendering markdown: {e}")
     
-    def render_directory(self, dir_path):
-        """渲染目录列表"""
+    def render_directory(self, dir_path, url, stat):
+        """渲染目录列表，扫描结果与分页后的页面均按目录mtime缓存"""
         try:
-            files = []
-            dirs = []
+            listing = DIRECTORY_INDEX.listing(dir_path, stat)
+            page_number = listing_page_number(url.query)
+            cache_key = f"{dir_path}/?page={page_number}"
+            page = PAGE_CACHE.get(cache_key, listing.identity)
+            cache_status = 'HIT'
+            if page is None:
+                result = directory_listing(dir_path, WIKI_DIR, listing.entries, page_number, LISTING_PAGE_SIZE)
+                if result is None:
+                    self.send_error(404, "Page out of range")
+                    return
+                title, content = result
+                body = SHELL.render(title, content + LIVE_RELOAD_SCRIPT)
+                page = RenderedPage(body, content_etag(body, current_renderer_version()), listing.mtime)
+                page.compress(self.compress_min_bytes)
+                PAGE_CACHE.put(cache_key, listing.identity, page)
+                cache_status = 'MISS'
             
-            for item in sorted(dir_path.iterdir()):
-                if item.name.startswith('.'):
-                    continue
-                    
-                if item.is_dir():
-                    dirs.append(f'📁 <a href="{self.path.rstrip("/")}/{item.name}/">{item.name}/</a>')
-                elif item.suffix == '.md':
-                    files.append(f'📄 <a href="{self.path.rstrip("/")}/{item.name}">{item.name}</a>')
-                else:
-                    files.append(f'📎 <a href="{self.path.rstrip("/")}/{item.name}">{item.name}</a>')
+            self.send_page(page, extra_headers=[('X-Wiki-Cache', cache_status)])
             
-            content = f"""
-            <h1>📂 目录: {dir_path.name}</h1>
-            <div class="file-tree">
-            {'<br>'.join(dirs + files)}
-            </div>
-            """
-            
-            html = TEMPLATE.format(
-                title=f"目录 - {dir_path.name}",
-                content=content
-            )
+        except Exception as e:
+            self.send_error(500, f"Error listing directory: {e}")
+
+    def render_search(self, query):
+        """渲染搜索结果页"""
+        try:
+            began = time.perf_counter()
+            results = SEARCH_INDEX.search(query) if query.strip() else []
+            content = search_results_html(query, results, time.perf_counter() - began)
             
-            self.send_response(200)
-            self.send_header('Content-Type', 'text/html; charset=utf-8')
-            self.end_headers()
-            self.wfile.write(html.encode('utf-8'))
+            body = SHELL.render(f"搜索 - {query}" if query else "搜索", content)
+            self.send_page(RenderedPage(body, content_etag(body, current_renderer_version())))
             
         except Exception as e:
-            self.send_error(500, f"Error listing directory: {e}")
+            self.send_error(500, f"Error searching: {e}")
+
+    def stream_events(self):
+        """订阅文件变化事件（Server-Sent Events），连接交由广播器持有"""
+        if not WATCH_ENABLED:
+            self.send_error(404, "Live reload is disabled")
+            return
+        if not RELOAD_EVENTS.can_subscribe():
+            self.send_error(503, "Too many live reload subscribers")
+            return
+        
+        # 事件流没有长度，以关闭连接结束
+        self.close_connection = True
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream; charset=utf-8')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        self.wfile.write(b'retry: 2000\n\n')
+        self.wfile.flush()
+        RELOAD_EVENTS.subscribe(self.connection)
+        self.server.detach_request(self.request)
+
+def on_files_changed(paths):
+    """文件变化时只失效受影响的页面与索引条目，并通知浏览器刷新"""
+    if WIKI_DIR in paths:
+        # 监视事件溢出，无法确定变化范围
+        PAGE_CACHE.clear()
+        DIRECTORY_INDEX.clear()
+        FILE_INFO_CACHE.clear()
+        SEARCH_INDEX.refresh(force=True)
+        LINK_GRAPH.build()
+    affected = set()
+    for path in paths:
+        PAGE_CACHE.invalidate(str(path))
+        DIRECTORY_INDEX.invalidate(path.parent)
+        FILE_INFO_CACHE.invalidate(str(path))
+        if path.suffix == '.md':
+            SEARCH_INDEX.update_file(path)
+            try:
+                affected |= LINK_GRAPH.update(path, read_source(path)[1])
+            except (OSError, UnicodeDecodeError):
+                affected |= LINK_GRAPH.remove(path)
+    # 反向链接变化的页面同样通知浏览器刷新
+    RELOAD_EVENTS.publish('reload', changed_url_paths(WIKI_DIR, set(paths) | affected))
+
+def start_watching(force_polling=False):
+    """在当前进程启动文件监视与事件推送线程，返回监视后端名称"""
+    backend = FileWatcher(WIKI_DIR, on_files_changed, force_polling=force_polling).start()
+    RELOAD_EVENTS.start()
+    return backend
+
+def load_disk_cache():
+    """磁盘渲染缓存：载入上次运行渲染过且源文件未变的页面，清理过期版本"""
+    if DISK_CACHE is None:
+        return '已关闭'
+    import sqlite3
+    began = time.perf_counter()
+    # 多进程模式下各工作进程同时清理：只删除本进程开始载入前的过期版本，其他进程新写入的页面保留
+    before = time.time()
+    try:
+        loaded, etags = load_persisted_pages(WIKI_DIR, PAGE_CACHE, DISK_CACHE,
+                                             lambda path, source: page_etag(source, LINK_GRAPH.backlinks(path)))
+        DISK_CACHE.prune(etags, before)
+    except sqlite3.Error as e:
+        return f"读写出错（{e}），未载入的页面将在访问时重新渲染"
+    return f"载入 {loaded} 篇 · 耗时 {(time.perf_counter() - began) * 1000:.0f} ms"
+
+def start_renderer(args):
+    """导入并预热渲染后端，避免首个请求承担扩展加载成本；导入失败时回退到下一个可用后端"""
+    while True:
+        try:
+            return RENDERER.start(size=args.threads)
+        except ImportError as e:
+            print(f"⚠️  渲染后端 {RENDERER.name} 导入失败（{e}），回退到下一个可用后端")
+            RENDERER.import_error = e
+            use_renderer(select_renderer(args.renderer)[0])
+
+def warm_up(args):
+    """后台预热：文件监视、渲染后端、磁盘缓存、搜索索引与首页链接页面，完成后标记就绪"""
+    global DISK_CACHE
+    # 文件监视：增量更新缓存与索引，推送浏览器刷新
+    watch_backend = start_watching(args.poll) if WATCH_ENABLED else '已关闭'
+    
+    # 渲染后端先于磁盘缓存确定：页面ETag包含渲染器版本
+    warmup_seconds = start_renderer(args)
+    RENDERER_READY.set()
+    if not args.no_render_cache:
+        DISK_CACHE = DiskRenderCache(args.render_cache or RENDER_CACHE_DIR / f'{RENDERER.name}.sqlite')
+        METRICS.register_cache('disk', DISK_CACHE.stats)
+    
+    # 链接图先于磁盘缓存建立：页面ETag包含反向链接
+    links_seconds = LINK_GRAPH.build()
+    disk_status = load_disk_cache()
+    
+    # 建立全文搜索索引
+    index_seconds = SEARCH_INDEX.build()
+    
+    if not HIGHLIGHTER.available:
+        print("⚠️  未安装pygments，代码块将不做高亮: pip install pygments")
+    
+    began = time.perf_counter()
+    rendered = prerender_pages(index_linked_pages(WIKI_DIR), PAGE_CACHE, build_markdown_page, store_page)
+    prerender_seconds = time.perf_counter() - began
+    READY.set()
+    print(f"""✅ 已就绪（进程 {os.getpid()}）: 启动总耗时 {(time.perf_counter() - STARTUP_BEGAN) * 1000:.0f} ms
+   👀 文件监视: {watch_backend}
+   💾 磁盘缓存: {disk_status}
+   🔍 搜索索引: {len(SEARCH_INDEX)} 篇文档 · 耗时 {index_seconds * 1000:.0f} ms
+   🔗 链接图: {len(LINK_GRAPH)} 篇文档 · 耗时 {links_seconds * 1000:.0f} ms
+   🧩 渲染后端: {RENDERER.name}（{RENDERER.description}）· 预热耗时 {warmup_seconds * 1000:.0f} ms
+   📄 首页链接页面预渲染: {rendered} 篇 · 耗时 {prerender_seconds * 1000:.0f} ms""")
+
+def start_background(args):
+    """在服务进程内启动后台预热线程（线程不会被fork继承，多进程模式下每个工作进程各自预热）"""
+    threading.Thread(target=warm_up, args=(args,), name='wiki-warmup', daemon=True).start()
 
 def open_browser():
-    """延迟打开浏览器"""
+    """延迟打开浏览器（webbrowser导入较慢，只在需要时导入）"""
+    import webbrowser
     time.sleep(1)
     webbrowser.open(f'http://localhost:{PORT}')
 
 def main():
     """启动wiki服务器"""
-    try:
-        # 检查markdown库
-        import markdown
-    except ImportError:
-        print("❌ 缺少依赖: pip install markdown")
-        sys.exit(1)
+    global PORT, WIKI_DIR, WATCH_ENABLED, LISTING_PAGE_SIZE
+    parser = argparse.ArgumentParser(description="AI开发知识文档库本地服务器")
+    args = add_server_arguments(parser).parse_args()
+    if args.port is not None:
+        PORT = args.port
+    if args.wiki_dir is not None:
+        WIKI_DIR = args.wiki_dir.resolve()
+        SEARCH_INDEX.root = WIKI_DIR
+        LINK_GRAPH.root = WIKI_DIR
+    LINK_GRAPH.on_backlinks_changed = on_backlinks_changed
+    PAGE_CACHE.resize(args.cache_mb * 1024 * 1024)
+    DIRECTORY_INDEX.details = args.listing_details
+    LISTING_PAGE_SIZE = args.listing_page_size
+    RENDER_WORKERS.workers = args.render_workers
+
+    # 选择渲染后端（只查找依赖不导入，导入推迟到后台预热）；缺少依赖时回退
+    renderer, skipped = select_renderer(args.renderer)
+    for name in skipped:
+        print(f"⚠️  渲染后端 {name} 缺少依赖 {', '.join(RENDERERS[name].requires)}，已跳过")
+    use_renderer(renderer)
     
     # 切换到wiki目录
     os.chdir(WIKI_DIR)
     
+    # 文件监视、搜索索引、磁盘缓存与预渲染均在服务进程内后台进行，端口绑定后立即开始处理请求
+    if not args.no_watch:
+        SEARCH_INDEX.refresh_interval = None
+        WATCH_ENABLED = True
+    
+    # 注册缓存统计，供 /__metrics 导出
+    METRICS.register_cache('page', PAGE_CACHE.stats)
+    METRICS.register_cache('directory', DIRECTORY_INDEX.stats)
+    METRICS.register_cache('file_info', FILE_INFO_CACHE.stats)
+    METRICS.register_cache('highlight', HIGHLIGHTER.stats)
+    
     # 启动服务器
-    with socketserver.TCPServer(("", PORT), WikiHandler) as httpd:
+    with create_server(WikiHandler, PORT, args) as httpd:
+        bind_seconds = time.perf_counter() - STARTUP_BEGAN
         print(f"""
 🚀 AI开发知识文档库已启动！
 
 📍 本地地址: http://localhost:{PORT}
 📁 文档目录: {WIKI_DIR}
+⏱️  端口绑定: 启动后 {bind_seconds * 1000:.0f} ms · 后台预热完成前 /readyz 返回503
+🧩 渲染后端: {RENDERER.name}（{RENDERER.description}）· 可用: {', '.join(available_renderers())}
+⚙️  并发配置: {args.workers} 个进程 × {args.threads} 个工作线程 · 每进程最多 {args.max_connections} 个请求（含排队）
+🚦 准入控制: {f"每IP {args.rate_limit:g} 请求/秒（突发 {args.rate_burst}）" if args.rate_limit > 0 else "不限速"} · 已缓存页面与静态资源优先
 🎯 主要功能:
-   • Markdown自动渲染
+   • Markdown自动渲染（可插拔渲染后端）
    • 响应式设计
    • 自动目录生成
-   • 代码语法高亮
+   • 代码语法高亮（服务端）
 
 📖 快速导航:
    • 首页: http://localhost:{PORT}/
+   • 全文搜索: http://localhost:{PORT}/search?q=Agent
+   • 运行指标: http://localhost:{PORT}/__metrics
+   • 健康检查: http://localhost:{PORT}/healthz · http://localhost:{PORT}/readyz
+   • 批量渲染API: POST http://localhost:{PORT}/api/render（{args.render_workers} 个渲染进程）
    • Agent开发指南: http://localhost:{PORT}/docs/AI_AGENT_DEVELOPMENT_GUIDE.md
    • PRD模板: http://localhost:{PORT}/templates/AGENT_PRD_TEMPLATE.md
    • 实践案例: http://localhost:{PORT}/examples/Insurance-Agent-PRD-Example.md
@@ -418,20 +524,29 @@ def main():
    • 支持.md文件直接访问
    • 目录自动生成文件列表
    • 所有链接都可点击导航
+   • 编辑文档后浏览器自动刷新
 
 🛑 停止服务: Ctrl+C
         """)
         
         # 自动打开浏览器
-        browser_thread = threading.Thread(target=open_browser)
-        browser_thread.daemon = True
-        browser_thread.start()
+        if not args.headless:
+            browser_thread = threading.Thread(target=open_browser)
+            browser_thread.daemon = True
+            browser_thread.start()
         
         try:
-            httpd.serve_forever()
+            serve(httpd, args, lambda: start_background(args))
         except KeyboardInterrupt:
-            print("\n\n👋 感谢使用AI开发知识文档库！")
-            print("💡 如有建议，欢迎反馈改进")
+            pass
+        RENDER_WORKERS.close()
+        print("\n\n👋 感谢使用AI开发知识文档库！")
+        if args.workers <= 1:
+            print(f"📊 渲染缓存: {format_stats(PAGE_CACHE.stats())}")
+            highlight_stats = HIGHLIGHTER.stats()
+            print(f"🎨 代码高亮: 命中 {highlight_stats['hits']} · 未命中 {highlight_stats['misses']} · "
+                  f"条目 {highlight_stats['entries']}")
+        print("💡 如有建议，欢迎反馈改进")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,12 @@
+/* AI开发知识文档库 - 文档变化时自动刷新（服务器推送，由 start-wiki.py 的文件监视器驱动） */
+(function() {
+    if (!window.EventSource) return;
+    var source = new EventSource('/__events');
+    source.addEventListener('reload', function(event) {
+        var paths = JSON.parse(event.data);
+        var current = decodeURIComponent(location.pathname);
+        if (paths.indexOf(current) !== -1 || paths.indexOf('*') !== -1) {
+            location.reload();
+        }
+    });
+})();
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+AI开发知识文档库准入控制
+按客户端IP的令牌桶限速、按优先级出队的有界待处理队列与快速拒绝响应；
+廉价请求（探针、静态资源、已缓存页面）优先于需要渲染的昂贵请求
+"""
+
+import math
+import threading
+import time
+from collections import OrderedDict, deque
+from urllib.parse import urlsplit
+
+# 请求优先级：数值越小越先处理
+PRIORITY_CHEAP = 0
+PRIORITY_EXPENSIVE = 1
+
+# 按IP限速：每秒补充的令牌数与可积累的令牌数；最多跟踪的客户端数。
+# 默认不限速：反向代理或NAT之后所有用户共用一个IP，只在直接面向客户端时用 --rate-limit 开启
+DEFAULT_RATE_LIMIT = 0.0
+DEFAULT_RATE_BURST = 100
+MAX_RATE_CLIENTS = 10000
+
+# 工作线程中为廉价请求保留的比例（至少1个，单线程时不保留）
+CHEAP_THREAD_SHARE = 0.25
+
+# 队列已满时建议客户端的重试间隔（秒）
+QUEUE_FULL_RETRY_AFTER = 1
+
+# 判断优先级时预读（不消费）的请求字节数，只需请求行
+REQUEST_PEEK_BYTES = 2048
+
+# 不受限速的路径：健康检查探针（负载均衡器与编排系统的探测频率不由客户端控制）
+RATE_EXEMPT_PATHS = frozenset(('/healthz', '/readyz'))
+
+REJECT_REASONS = {429: 'Too Many Requests', 503: 'Service Unavailable'}
+REJECT_BODIES = {429: b'too many requests\n', 503: b'server busy\n'}
+
+
+class TokenBucketLimiter:
+    """按客户端IP的令牌桶：每个请求消耗一个令牌，令牌以 rate 个/秒补充，最多积累 burst 个
+
+    只在连接监视线程中调用，不加锁；跟踪的客户端超过上限时丢弃最久未出现的（其令牌桶重新装满）。
+    """
+
+    def __init__(self, rate, burst=DEFAULT_RATE_BURST, max_clients=MAX_RATE_CLIENTS):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.max_clients = max_clients
+        self._buckets = OrderedDict()
+
+    def acquire(self, key):
+        """取一个令牌：成功返回0，否则返回还需等待的秒数"""
+        now = time.monotonic()
+        tokens, last = self._buckets.pop(key, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - last) * self.rate)
+        wait = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            wait = (1 - tokens) / self.rate
+        self._buckets[key] = (tokens, now)
+        if len(self._buckets) > self.max_clients:
+            self._buckets.popitem(last=False)
+        return wait
+
+
+class AdmissionQueue:
+    """有界的待处理请求队列：廉价请求先出队，同优先级先进先出
+
+    队列已满时，廉价请求挤出最晚进入的昂贵请求，否则新请求被拒绝；
+    同时处理的昂贵请求不超过 max_expensive，其余工作线程留给廉价请求。
+    """
+
+    def __init__(self, capacity, max_expensive):
+        self.capacity = max(capacity, 1)
+        self.max_expensive = max(max_expensive, 1)
+        self.running_expensive = 0
+        self._pending = (deque(), deque())
+        self._closed = False
+        self._cond = threading.Condition()
+
+    def __len__(self):
+        return len(self._pending[PRIORITY_CHEAP]) + len(self._pending[PRIORITY_EXPENSIVE])
+
+    def put(self, priority, item):
+        """入队：返回被拒绝的条目（新条目本身或被挤出的昂贵请求），全部接纳时返回None"""
+        with self._cond:
+            if self._closed:
+                return item
+            rejected = None
+            if len(self) >= self.capacity:
+                expensive = self._pending[PRIORITY_EXPENSIVE]
+                if priority != PRIORITY_CHEAP or not expensive:
+                    return item
+                rejected = expensive.pop()
+            self._pending[priority].append(item)
+            self._cond.notify_all()
+            return rejected
+
+    def get(self):
+        """取出下一个 (优先级, 条目)；队列关闭且已处理完时返回None"""
+        with self._cond:
+            while True:
+                cheap, expensive = self._pending
+                if cheap:
+                    return PRIORITY_CHEAP, cheap.popleft()
+                if expensive and self.running_expensive < self.max_expensive:
+                    self.running_expensive += 1
+                    return PRIORITY_EXPENSIVE, expensive.popleft()
+                if self._closed and not expensive:
+                    return None
+                self._cond.wait()
+
+    def done(self, priority):
+        """一个请求处理完毕"""
+        if priority == PRIORITY_EXPENSIVE:
+            with self._cond:
+                self.running_expensive -= 1
+                self._cond.notify_all()
+
+    def close(self):
+        """不再接纳新请求，已入队的请求仍会处理"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+
+def reserved_threads(threads):
+    """为廉价请求保留的工作线程数"""
+    if threads < 2:
+        return 0
+    return max(1, int(threads * CHEAP_THREAD_SHARE))
+
+
+def parse_request_line(data):
+    """从预读的字节中解析请求行，返回 (方法, 请求目标)；不完整时返回 (None, None)"""
+    line, found, _ = data.partition(b'\r\n')
+    if not found:
+        line, found, _ = data.partition(b'\n')
+    parts = line.split()
+    if not found or len(parts) < 2:
+        return None, None
+    return parts[0].decode('latin-1'), parts[1].decode('latin-1')
+
+
+def is_rate_exempt(target):
+    """请求目标是否不受限速（健康检查）；请求行不完整或目标无法解析时不豁免"""
+    if target is None:
+        return False
+    try:
+        return urlsplit(target).path in RATE_EXEMPT_PATHS
+    except ValueError:
+        return False
+
+
+def rejection_response(status, retry_after):
+    """429/503快速拒绝的完整HTTP响应（响应后关闭连接）"""
+    body = REJECT_BODIES[status]
+    head = (f'HTTP/1.1 {status} {REJECT_REASONS[status]}\r\n'
+            f'Content-Type: text/plain; charset=utf-8\r\n'
+            f'Content-Length: {len(body)}\r\n'
+            f'Retry-After: {max(1, math.ceil(retry_after))}\r\n'
+            f'Cache-Control: no-store\r\n'
+            f'Connection: close\r\n\r\n')
+    return head.encode('latin-1') + body
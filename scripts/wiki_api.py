@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+AI开发知识文档库批量渲染API
+POST /api/render：一次请求渲染多篇Markdown文档（原文或文档路径），
+返回每篇的正文HTML、目录与元数据；文档较多时分发到渲染进程并行转换
+"""
+
+import html
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import as_completed
+from pathlib import Path
+
+from wiki_cache import content_etag
+from wiki_render import page_title, read_source
+
+# 请求限制：请求正文总字节数、单次文档篇数、单篇文档字节数
+MAX_REQUEST_BYTES = 16 * 1024 * 1024
+MAX_DOCUMENTS = 1000
+MAX_DOCUMENT_BYTES = 2 * 1024 * 1024
+
+# 渲染进程数（0或1表示在请求线程内渲染）；待渲染总字节数低于阈值时不跨进程
+DEFAULT_RENDER_WORKERS = min(4, os.cpu_count() or 1)
+PARALLEL_MIN_BYTES = 64 * 1024
+
+# 渲染进程检查服务进程是否仍在运行的间隔（秒）
+PARENT_CHECK_INTERVAL = 1.0
+
+NDJSON_CONTENT_TYPE = 'application/x-ndjson; charset=utf-8'
+JSON_CONTENT_TYPE = 'application/json; charset=utf-8'
+
+TAG_PATTERN = re.compile(r'<[^>]*>')
+
+
+class ApiError(Exception):
+    """请求级错误，以对应状态码返回JSON错误信息"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class RenderJob:
+    """一篇待渲染的文档：原文或由路径读取的源文件"""
+
+    __slots__ = ('index', 'id', 'path', 'title', 'source', 'text', 'error')
+
+    def __init__(self, index, doc_id, path=None):
+        self.index = index
+        self.id = doc_id
+        self.path = path
+        self.title = None
+        self.source = None
+        self.text = None
+        self.error = None
+
+
+def parse_render_request(body, root):
+    """解析请求正文，返回 (文档列表, 是否流式, 指定的渲染后端或None)；格式错误时抛出ApiError
+
+    请求格式：{"documents": [{"id": ..., "markdown": "..."} | {"id": ..., "path": "docs/x.md"} | "..."],
+    "stream": false, "renderer": "simple"}；单篇文档的错误（路径不存在、过大等）记在该文档的结果中，不影响其他文档。
+    """
+    try:
+        request = json.loads(body)
+    except (UnicodeDecodeError, ValueError) as e:
+        raise ApiError(400, f"请求不是有效的JSON: {e}")
+    if not isinstance(request, dict) or not isinstance(request.get('documents'), list):
+        raise ApiError(400, "请求必须是包含documents数组的JSON对象")
+    documents = request['documents']
+    if len(documents) > MAX_DOCUMENTS:
+        raise ApiError(413, f"单次最多渲染 {MAX_DOCUMENTS} 篇文档，收到 {len(documents)} 篇")
+
+    root = Path(root)
+    jobs = []
+    for index, document in enumerate(documents):
+        if isinstance(document, str):
+            document = {'markdown': document}
+        if not isinstance(document, dict):
+            document = {'invalid': document}
+        job = RenderJob(index, document.get('id', index), document.get('path'))
+        if 'invalid' in document:
+            job.error = "文档必须是字符串或对象"
+        elif 'markdown' in document:
+            load_markdown(job, document['markdown'])
+        elif isinstance(job.path, str):
+            load_path(job, root)
+        else:
+            job.error = "需要提供markdown或path"
+        jobs.append(job)
+    renderer = request.get('renderer')
+    if renderer is not None and not isinstance(renderer, str):
+        raise ApiError(400, "renderer必须是字符串")
+    return jobs, bool(request.get('stream')), renderer
+
+
+def load_markdown(job, text):
+    """原文文档：换行规范化与 read_source 一致"""
+    if not isinstance(text, str):
+        job.error = "markdown必须是字符串"
+        return
+    job.source = text.encode('utf-8')
+    if len(job.source) > MAX_DOCUMENT_BYTES:
+        job.error = f"文档超过 {MAX_DOCUMENT_BYTES} 字节"
+        return
+    job.text = text.replace('\r\n', '\n').replace('\r', '\n')
+
+
+def load_path(job, root):
+    """路径文档：只允许文档根目录内的Markdown文件"""
+    file_path = Path(os.path.normpath(root / job.path.lstrip('/')))
+    if not file_path.is_relative_to(root) or file_path.suffix != '.md':
+        job.error = "只能渲染文档目录内的.md文件"
+        return
+    try:
+        if file_path.stat().st_size > MAX_DOCUMENT_BYTES:
+            job.error = f"文档超过 {MAX_DOCUMENT_BYTES} 字节"
+            return
+        job.source, job.text = read_source(file_path)
+    except FileNotFoundError:
+        job.error = "文件不存在"
+    except (OSError, UnicodeDecodeError) as e:
+        job.error = f"无法读取: {e}"
+    else:
+        job.path = file_path.relative_to(root).as_posix()
+        job.title = page_title(file_path)
+
+
+def watch_parent(parent_pid):
+    """渲染进程初始化：服务进程退出（包括被信号终止、多进程模式下os._exit）后随之退出"""
+    def watch():
+        while os.getppid() == parent_pid:
+            time.sleep(PARENT_CHECK_INTERVAL)
+        os._exit(0)
+    threading.Thread(target=watch, name='wiki-render-parent', daemon=True).start()
+
+
+class RenderWorkers:
+    """批量渲染进程池
+
+    转换是纯Python、受GIL限制，批量请求的文档分发到独立进程并行转换。
+    进程在首次使用时以spawn方式创建（服务进程有多个线程，fork不安全），之后常驻复用；
+    workers 不大于1或待渲染内容较少时直接在请求线程内渲染。
+    """
+
+    def __init__(self, workers=DEFAULT_RENDER_WORKERS):
+        self.workers = workers
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _pool(self):
+        with self._lock:
+            if self._executor is None:
+                import multiprocessing
+                from concurrent.futures import ProcessPoolExecutor
+                self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                     mp_context=multiprocessing.get_context('spawn'),
+                                                     initializer=watch_parent, initargs=(os.getpid(),))
+            return self._executor
+
+    def map(self, render, jobs):
+        """按完成顺序产出 (文档, 渲染结果或异常)；render 须为模块级函数，接收Markdown文本"""
+        parallel = (self.workers > 1 and len(jobs) > 1
+                    and sum(len(job.source) for job in jobs) >= PARALLEL_MIN_BYTES)
+        if not parallel:
+            for job in jobs:
+                try:
+                    yield job, render(job.text)
+                except Exception as e:
+                    yield job, e
+            return
+
+        from concurrent.futures.process import BrokenProcessPool
+        executor = self._pool()
+        futures = {executor.submit(render, job.text): job for job in jobs}
+        broken = False
+        for future in as_completed(futures):
+            try:
+                yield futures[future], future.result()
+            except BrokenProcessPool as e:
+                broken = True
+                yield futures[future], e
+            except Exception as e:
+                yield futures[future], e
+        if broken:
+            # 渲染进程异常退出：丢弃该进程池，下次请求重新创建
+            with self._lock:
+                if self._executor is executor:
+                    self._executor = None
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def close(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+def toc_entries(headings):
+    """标题列表转为JSON目录：[{level, anchor, title}]，标题为纯文本"""
+    return [{'level': level, 'anchor': anchor, 'title': html.unescape(TAG_PATTERN.sub('', name)).strip()}
+            for level, anchor, name in headings]
+
+
+def error_result(job, message):
+    """无法渲染的文档只返回序号、标识与错误信息"""
+    result = {'index': job.index, 'id': job.id}
+    if job.path is not None:
+        result['path'] = job.path
+    result['error'] = message
+    return result
+
+
+def document_result(job, rendered, renderer_version):
+    """组装一篇文档的结果；rendered 为渲染函数返回的 (正文HTML, 标题列表, 元数据, 耗时) 或异常"""
+    if isinstance(rendered, BaseException):
+        return error_result(job, f"渲染失败: {rendered}")
+    result = {'index': job.index, 'id': job.id}
+    if job.path is not None:
+        result['path'] = job.path
+    content, headings, meta, seconds = rendered
+    toc = toc_entries(headings)
+    title = job.title or next((entry['title'] for entry in toc if entry['level'] == 1), None)
+    result.update({
+        'title': title or str(job.id),
+        'html': content,
+        'toc': toc,
+        'meta': meta,
+        'etag': content_etag(job.source, renderer_version),
+        'source_bytes': len(job.source),
+        'render_ms': round(seconds * 1000, 3),
+    })
+    return result
+
+
+def render_batch(jobs, workers, render, renderer_version, observe=None):
+    """渲染全部文档，按完成顺序产出结果；无法渲染的文档直接产出错误结果
+
+    observe(秒) 在每篇文档渲染完成后调用，用于记入渲染耗时指标。
+    """
+    pending = []
+    for job in jobs:
+        if job.error is not None:
+            yield error_result(job, job.error)
+        else:
+            pending.append(job)
+    for job, rendered in workers.map(render, pending):
+        if observe is not None and not isinstance(rendered, BaseException):
+            observe(rendered[3])
+        yield document_result(job, rendered, renderer_version)
+
+
+def json_bytes(value):
+    """紧凑的UTF-8 JSON（保留中文）"""
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
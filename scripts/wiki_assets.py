@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+AI开发知识文档库静态资源
+scripts/static/ 下的CSS与JS按内容哈希生成带指纹的URL，可被浏览器永久缓存
+"""
+
+import hashlib
+import mimetypes
+from pathlib import Path
+
+from wiki_cache import RenderedPage
+
+# 配置
+STATIC_DIR = Path(__file__).parent / 'static'
+STATIC_URL_PREFIX = '/static/'
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+CONTENT_TYPES = {
+    '.css': 'text/css; charset=utf-8',
+    '.js': 'text/javascript; charset=utf-8',
+}
+
+
+class StaticAsset:
+    """一个带指纹的静态资源"""
+
+    __slots__ = ('name', 'fingerprinted_name', 'url', 'content_type', 'page')
+
+    def __init__(self, name, fingerprinted_name, content_type, page):
+        self.name = name
+        self.fingerprinted_name = fingerprinted_name
+        self.url = STATIC_URL_PREFIX + fingerprinted_name
+        self.content_type = content_type
+        self.page = page
+
+
+class AssetRegistry:
+    """启动时一次性读取、哈希并预压缩全部静态资源"""
+
+    def __init__(self, directory=STATIC_DIR):
+        self.directory = Path(directory)
+        self._by_name = {}
+        self._by_url = {}
+        for path in sorted(self.directory.iterdir()):
+            if path.is_file() and not path.name.startswith('.'):
+                self._add(path)
+
+    def _add(self, path):
+        data = path.read_bytes()
+        digest = hashlib.sha1(data).hexdigest()[:10]
+        fingerprinted_name = f'{path.stem}.{digest}{path.suffix}'
+        content_type = CONTENT_TYPES.get(path.suffix) or mimetypes.guess_type(path.name)[0] or 'application/octet-stream'
+        page = RenderedPage(data, f'"{digest}"', path.stat().st_mtime).compress()
+        asset = StaticAsset(path.name, fingerprinted_name, content_type, page)
+        self._by_name[path.name] = asset
+        self._by_url[asset.url] = asset
+
+    def url(self, name):
+        """资源的指纹URL"""
+        return self._by_name[name].url
+
+    def get(self, url_path):
+        """按URL查找资源，未知URL返回None"""
+        return self._by_url.get(url_path)
+
+    def __iter__(self):
+        return iter(self._by_name.values())
+
+
+# 全局资源表
+ASSETS = AssetRegistry()
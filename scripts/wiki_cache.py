@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+AI开发知识文档库渲染缓存
+按文件路径缓存最终编码后的HTML，以 (mtime, size) 判断是否过期；
+另有按内容ETag寻址的SQLite磁盘缓存，重启后无需重新渲染
+"""
+
+import gzip
+import hashlib
+import queue
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from pathlib import Path
+
+# 默认缓存预算
+DEFAULT_CACHE_MB = 64
+
+# 响应压缩：小于阈值的页面不压缩，按优先级排列
+DEFAULT_COMPRESS_MIN_BYTES = 1024
+COMPRESSORS = {
+    'gzip': lambda data: gzip.compress(data, compresslevel=6, mtime=0),
+    'deflate': lambda data: zlib.compress(data, 6),
+}
+
+
+class RenderedPage:
+    """已渲染的页面：编码后的正文、压缩变体及其校验信息"""
+
+    __slots__ = ('body', 'etag', 'last_modified', 'variants')
+
+    def __init__(self, body, etag, last_modified=None):
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.variants = {}
+
+    def __len__(self):
+        return len(self.body) + sum(len(data) for data in self.variants.values())
+
+    def compress(self, min_bytes=DEFAULT_COMPRESS_MIN_BYTES):
+        """预先生成全部压缩变体，写入缓存前调用，保证每个内容版本只压缩一次"""
+        if min_bytes is not None and len(self.body) >= min_bytes:
+            for encoding in COMPRESSORS:
+                self.encoded(encoding)
+        return self
+
+    def encoded(self, encoding):
+        """返回指定编码的正文，首次请求时压缩并保存"""
+        data = self.variants.get(encoding)
+        if data is None:
+            data = COMPRESSORS[encoding](self.body)
+            self.variants[encoding] = data
+        return data
+
+    def variant_etag(self, encoding):
+        """不同内容编码使用不同的强ETag"""
+        if encoding is None:
+            return self.etag
+        return f'{self.etag[:-1]}-{encoding}"'
+
+
+class RenderCache:
+    """带字节预算的LRU渲染缓存
+
+    每个路径只保留一个条目，条目附带源文件标识 (mtime_ns, size)；
+    标识不一致时视为未命中并丢弃旧条目。超出字节预算时按LRU淘汰。
+    """
+
+    def __init__(self, max_bytes=DEFAULT_CACHE_MB * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, identity):
+        """查找缓存，命中时返回缓存值，否则返回None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == identity:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                self._remove(key)
+            self.misses += 1
+            return None
+
+    def contains(self, key, identity=None):
+        """是否已有有效条目（不计入命中统计，也不调整LRU顺序）；identity为None时只检查路径是否有条目"""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and (identity is None or entry[0] == identity)
+
+    def put(self, key, identity, value, size=None):
+        """写入缓存，size默认取len(value)"""
+        if size is None:
+            size = len(value)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            if size > self.max_bytes:
+                return
+            self._entries[key] = (identity, value, size)
+            self.current_bytes += size
+            self._evict()
+
+    def invalidate(self, key):
+        """移除指定路径的缓存条目"""
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def clear(self):
+        """清空全部缓存条目"""
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def resize(self, max_bytes):
+        """调整字节预算，必要时立即淘汰"""
+        with self._lock:
+            self.max_bytes = max_bytes
+            self._evict()
+
+    def stats(self):
+        """返回命中率等统计信息"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self.current_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_ratio': self.hits / lookups if lookups else 0.0,
+            }
+
+    def _remove(self, key):
+        _, _, size = self._entries.pop(key)
+        self.current_bytes -= size
+
+    def _evict(self):
+        while self.current_bytes > self.max_bytes and self._entries:
+            _, (_, _, size) = self._entries.popitem(last=False)
+            self.current_bytes -= size
+            self.evictions += 1
+
+
+class DiskRenderCache:
+    """SQLite磁盘渲染缓存，以页面ETag为键
+
+    ETag由源内容与渲染器版本（含扩展配置与模板）计算，同一键永远对应同一页面，
+    因此无需按路径失效。写入由后台线程批量提交，不占用请求线程。
+    SQLite连接不跨fork使用，每个进程各自打开连接：多进程模式下每个工作进程在后台预热时
+    各自载入并清理，写入由WAL与忙等待超时串行化；清理只删除本进程开始载入之前写入或使用过的版本，
+    不会误删其他进程刚写入的页面。
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS pages (
+            etag TEXT PRIMARY KEY,
+            body BLOB NOT NULL,
+            gzip BLOB,
+            deflate BLOB,
+            used REAL NOT NULL
+        )
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.entries = 0
+        self.hits = 0
+        self.misses = 0
+        self._queue = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        import sqlite3
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        connection = sqlite3.connect(str(self.path), timeout=30)
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=NORMAL')
+        connection.execute(self.SCHEMA)
+        return connection
+
+    def load(self, etags):
+        """批量读取，返回 {etag: RenderedPage}（last_modified 由调用方补上）"""
+        pages = {}
+        etags = list(etags)
+        connection = self._connect()
+        try:
+            for start in range(0, len(etags), 500):
+                batch = etags[start:start + 500]
+                placeholders = ','.join('?' * len(batch))
+                rows = connection.execute(
+                    f'SELECT etag, body, gzip, deflate FROM pages WHERE etag IN ({placeholders})', batch)
+                for etag, body, gzip_data, deflate_data in rows:
+                    page = RenderedPage(body, etag)
+                    for encoding, data in (('gzip', gzip_data), ('deflate', deflate_data)):
+                        if data is not None:
+                            page.variants[encoding] = data
+                    pages[etag] = page
+            connection.executemany('UPDATE pages SET used = ? WHERE etag = ?',
+                                   [(time.time(), etag) for etag in pages])
+            connection.commit()
+            self.entries = connection.execute('SELECT COUNT(*) FROM pages').fetchone()[0]
+        finally:
+            connection.close()
+        self.hits += len(pages)
+        self.misses += len(etags) - len(pages)
+        return pages
+
+    def prune(self, keep_etags, before):
+        """删除当前文档树中已不存在、且在 before（time.time()）之后未写入或使用的页面版本，返回删除条数"""
+        connection = self._connect()
+        try:
+            connection.execute('CREATE TEMP TABLE keep (etag TEXT PRIMARY KEY)')
+            connection.executemany('INSERT OR IGNORE INTO keep VALUES (?)', [(etag,) for etag in keep_etags])
+            removed = connection.execute('DELETE FROM pages WHERE used < ? AND etag NOT IN (SELECT etag FROM keep)',
+                                         (before,)).rowcount
+            connection.commit()
+        finally:
+            connection.close()
+        self.entries -= removed
+        return removed
+
+    def put(self, page):
+        """异步写入一个已渲染（已压缩）的页面"""
+        with self._lock:
+            if self._queue is None:
+                self._queue = queue.Queue()
+                threading.Thread(target=self._writer, name='wiki-disk-cache', daemon=True).start()
+        self._queue.put(page)
+
+    def _writer(self):
+        import sqlite3
+        connection = self._connect()
+        while True:
+            pages = [self._queue.get()]
+            while True:
+                try:
+                    pages.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            rows = [(page.etag, page.body, page.variants.get('gzip'), page.variants.get('deflate'), time.time())
+                    for page in pages]
+            try:
+                connection.executemany('INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?)', rows)
+                connection.commit()
+                # INSERT OR REPLACE 覆盖已有ETag时不增加条目，其他进程也可能同时写入，重新计数
+                self.entries = connection.execute('SELECT COUNT(*) FROM pages').fetchone()[0]
+            except sqlite3.Error as e:
+                print(f"⚠️  磁盘渲染缓存写入失败: {e}")
+
+    def stats(self):
+        return {'entries': self.entries, 'hits': self.hits, 'misses': self.misses}
+
+
+def content_etag(source, renderer_version):
+    """由源内容与渲染器版本生成强ETag"""
+    digest = hashlib.sha1(renderer_version.encode('utf-8'))
+    digest.update(source)
+    return f'"{digest.hexdigest()[:20]}"'
+
+
+def file_identity(stat_result):
+    """由stat结果生成缓存标识"""
+    return (stat_result.st_mtime_ns, stat_result.st_size)
+
+
+def format_stats(stats):
+    """格式化缓存统计，用于控制台输出"""
+    return (f"命中 {stats['hits']} · 未命中 {stats['misses']} · "
+            f"命中率 {stats['hit_ratio']:.1%} · 条目 {stats['entries']} · "
+            f"占用 {stats['bytes'] / 1024:.1f} KB / {stats['max_bytes'] / 1024 / 1024:.0f} MB")
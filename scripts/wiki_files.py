@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+AI开发知识文档库静态文件
+非Markdown文件的元信息缓存（stat、MIME、校验头）与Range请求解析
+"""
+
+import threading
+from collections import OrderedDict
+
+# 配置
+DEFAULT_FILE_INFO_ENTRIES = 4096
+MAX_RANGES = 16
+MULTIPART_BOUNDARY = 'wiki-byteranges-7d3c1f'
+
+
+class FileInfo:
+    """静态文件的响应元信息"""
+
+    __slots__ = ('size', 'last_modified', 'etag', 'content_type')
+
+    def __init__(self, size, last_modified, etag, content_type):
+        self.size = size
+        self.last_modified = last_modified
+        self.etag = etag
+        self.content_type = content_type
+
+
+class FileInfoCache:
+    """按路径缓存文件元信息，以 (mtime_ns, size) 判断是否过期
+
+    调用方已持有打开的文件与其fstat结果，命中时省去MIME推断与ETag格式化。
+    """
+
+    def __init__(self, max_entries=DEFAULT_FILE_INFO_ENTRIES):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, path, stat, guess_type):
+        """返回文件的 FileInfo，guess_type(path) 只在未命中时调用"""
+        identity = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry[0] == identity:
+                self._entries.move_to_end(path)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+        info = FileInfo(stat.st_size, stat.st_mtime, f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"', guess_type(path))
+        with self._lock:
+            self._entries[path] = (identity, info)
+            self._entries.move_to_end(path)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return info
+
+    def invalidate(self, path):
+        with self._lock:
+            self._entries.pop(path, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
+
+
+# 全局文件元信息缓存
+FILE_INFO_CACHE = FileInfoCache()
+
+
+def parse_range(header, size):
+    """解析Range头，返回按起点排序并合并后的闭区间列表 [(start, end)]
+
+    头无效或区间过多时返回None（按规范忽略Range，返回整个文件）；
+    全部区间都无法满足时返回空列表（416）。
+    """
+    unit, _, spec = header.partition('=')
+    if unit.strip().lower() != 'bytes' or not spec.strip():
+        return None
+    ranges = []
+    for item in spec.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        first, dash, last = item.partition('-')
+        if not dash:
+            return None
+        try:
+            if first:
+                start = int(first)
+                end = int(last) if last else max(start, size - 1)
+                if end < start:
+                    return None
+            else:
+                suffix = int(last)
+                start = max(0, size - suffix)
+                end = size - 1
+                if suffix == 0:
+                    continue
+        except ValueError:
+            return None
+        if start >= size:
+            continue
+        ranges.append((start, min(end, size - 1)))
+    if len(ranges) > MAX_RANGES:
+        return None
+    ranges.sort()
+    merged = []
+    for start, end in ranges:
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def multipart_part_header(content_type, start, end, size):
+    """multipart/byteranges 中每个分段的头部"""
+    return (f'\r\n--{MULTIPART_BOUNDARY}\r\nContent-Type: {content_type}\r\n'
+            f'Content-Range: bytes {start}-{end}/{size}\r\n\r\n').encode('latin-1')
+
+
+def multipart_trailer():
+    return f'\r\n--{MULTIPART_BOUNDARY}--\r\n'.encode('latin-1')
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+AI开发知识文档库链接图
+从Markdown源文件提取站内链接，维护正向链接与反向链接，按文件增量更新；
+另提供按文件并行的断链检查
+"""
+
+import html
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from urllib.parse import unquote, urlsplit
+
+from wiki_render import markdown_sources, page_title
+
+# 链接语法：行内链接与图片、引用式链接定义、原始HTML标签中的 href/src。
+# 每次扫描都止于下一个同类起始符（[、(、<），未闭合的语法不会被反复扫描到行尾或文末，整体为线性时间
+INLINE_LINK_PATTERN = re.compile(
+    r'!?\[[^\[\]\n]*\]\(\s*(<[^<>\n]+>|[^()\s]+)(?:\s+(?:"[^"\n]*"|\'[^\'\n]*\'))?\s*\)')
+REFERENCE_LINK_PATTERN = re.compile(r'^ {0,3}\[[^\]\n]+\]:\s*(<[^>\n]+>|\S+)', re.M)
+HTML_TAG_PATTERN = re.compile(r'<(?:a|img|link|script)\b[^<>]*>', re.I)
+HTML_LINK_ATTRIBUTE = re.compile(r'\b(?:href|src)\s*=\s*["\']([^"\']+)["\']', re.I)
+FENCE_PATTERN = re.compile(r'^ {0,3}(```|~~~)')
+BACKTICK_RUN = re.compile(r'`+')
+SCHEME_PATTERN = re.compile(r'[a-zA-Z][a-zA-Z0-9+.-]*:')
+
+# 断链检查：每个任务处理的文件数
+CHECK_CHUNK_FILES = 32
+
+
+def strip_code(text):
+    """把围栏代码块与行内代码替换为空白（保留换行，行号不变），其中的链接语法不算链接"""
+    lines = text.split('\n')
+    fence = None
+    for index, line in enumerate(lines):
+        match = FENCE_PATTERN.match(line)
+        if fence is not None:
+            if match and match.group(1) == fence:
+                fence = None
+            lines[index] = ''
+        elif match:
+            fence = match.group(1)
+            lines[index] = ''
+        elif '`' in line:
+            lines[index] = blank_code_spans(line)
+    return '\n'.join(lines)
+
+
+def blank_code_spans(line):
+    """把行内代码（反引号串到下一个等长的反引号串）替换为等长空白；线性扫描，未闭合的反引号原样保留"""
+    runs = [match.span() for match in BACKTICK_RUN.finditer(line)]
+    # 每个反引号串之后第一个等长串的序号
+    closing = [None] * len(runs)
+    latest = {}
+    for index in range(len(runs) - 1, -1, -1):
+        start, end = runs[index]
+        closing[index] = latest.get(end - start)
+        latest[end - start] = index
+    parts = []
+    position = 0
+    index = 0
+    while index < len(runs):
+        close = closing[index]
+        if close is None:
+            index += 1
+            continue
+        start, end = runs[index][0], runs[close][1]
+        parts.append(line[position:start])
+        parts.append(' ' * (end - start))
+        position = end
+        index = close + 1
+    parts.append(line[position:])
+    return ''.join(parts)
+
+
+def extract_links(text):
+    """提取全部链接目标，返回按出现位置排序的 [(行号, 目标)]"""
+    text = strip_code(text)
+    found = []
+    for pattern in (INLINE_LINK_PATTERN, REFERENCE_LINK_PATTERN):
+        for match in pattern.finditer(text):
+            target = match.group(1)
+            if target.startswith('<') and target.endswith('>'):
+                target = target[1:-1]
+            found.append((match.start(1), html.unescape(target.strip())))
+    # HTML：先匹配完整标签，再在标签内查找属性
+    for tag in HTML_TAG_PATTERN.finditer(text):
+        attribute = HTML_LINK_ATTRIBUTE.search(tag.group(0))
+        if attribute is not None:
+            found.append((tag.start() + attribute.start(1), html.unescape(attribute.group(1).strip())))
+    found.sort()
+    links = []
+    line, position = 1, 0
+    for offset, target in found:
+        line += text.count('\n', position, offset)
+        position = offset
+        links.append((line, target))
+    return links
+
+
+def resolve_link(root, source, target):
+    """把链接目标解析为文档树内的路径；外部链接与页内锚点返回None"""
+    if not target or target.startswith('#') or target.startswith('//') or SCHEME_PATTERN.match(target):
+        return None
+    path = unquote(urlsplit(target).path)
+    if not path:
+        return None
+    base = root if path.startswith('/') else source.parent
+    return Path(os.path.normpath(base / path.lstrip('/')))
+
+
+def internal_links(root, source, text):
+    """文档中的站内链接 [(行号, 目标原文, 解析后路径)]"""
+    links = []
+    for line, target in extract_links(text):
+        path = resolve_link(root, source, target)
+        if path is not None:
+            links.append((line, target, path))
+    return links
+
+
+class LinkGraph:
+    """文档间链接图：正向链接与反向链接
+
+    每个源文件的链接在渲染或文件变化时整体替换；反向链接集合变化的页面通过
+    on_backlinks_changed(路径集合) 通知调用方（如使其渲染缓存失效）。
+    """
+
+    def __init__(self, root, on_backlinks_changed=None):
+        self.root = Path(root)
+        self.on_backlinks_changed = on_backlinks_changed
+        self._outgoing = {}
+        self._incoming = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._outgoing)
+
+    def build(self):
+        """扫描全部Markdown文件建立链接图，返回耗时（秒）"""
+        began = time.perf_counter()
+        for path in markdown_sources(self.root):
+            try:
+                self.update(path, path.read_text(encoding='utf-8'))
+            except (OSError, UnicodeDecodeError):
+                continue
+        return time.perf_counter() - began
+
+    def update(self, source, text):
+        """以文档的最新内容替换其正向链接，返回反向链接发生变化的页面集合"""
+        source = Path(os.path.normpath(source))
+        targets = {path for _, _, path in internal_links(self.root, source, text) if path != source}
+        with self._lock:
+            changed = self._replace(source, targets)
+        if changed and self.on_backlinks_changed is not None:
+            self.on_backlinks_changed(changed)
+        return changed
+
+    def remove(self, source):
+        """文档被删除时移除其正向链接"""
+        source = Path(os.path.normpath(source))
+        with self._lock:
+            changed = self._replace(source, set())
+            self._outgoing.pop(source, None)
+        if changed and self.on_backlinks_changed is not None:
+            self.on_backlinks_changed(changed)
+        return changed
+
+    def backlinks(self, target):
+        """链接到该页面的文档，按路径排序"""
+        target = Path(os.path.normpath(target))
+        with self._lock:
+            return sorted(self._incoming.get(target, ()))
+
+    def _replace(self, source, targets):
+        previous = self._outgoing.get(source, set())
+        if source in self._outgoing and previous == targets:
+            return set()
+        self._outgoing[source] = targets
+        for target in previous - targets:
+            sources = self._incoming.get(target)
+            if sources is not None:
+                sources.discard(source)
+                if not sources:
+                    del self._incoming[target]
+        for target in targets - previous:
+            self._incoming.setdefault(target, set()).add(source)
+        return previous ^ targets
+
+
+def backlinks_key(backlinks):
+    """反向链接的稳定字节表示，参与页面ETag计算"""
+    return '\n'.join(path.as_posix() for path in backlinks).encode('utf-8')
+
+
+def backlinks_html(root, backlinks):
+    """页面底部的反向链接区块，没有反向链接时为空"""
+    if not backlinks:
+        return ''
+    items = []
+    for path in backlinks:
+        rel = path.relative_to(root).as_posix()
+        items.append(f'<li><a href="/{html.escape(rel, quote=True)}">{html.escape(page_title(path))}</a> '
+                     f'<small>{html.escape(rel)}</small></li>')
+    return (f'\n<div class="backlinks">\n<h3>🔗 反向链接（{len(backlinks)}）</h3>\n<ul>\n'
+            + '\n'.join(items) + '\n</ul>\n</div>\n')
+
+
+def check_files(root, paths):
+    """检查一组文档中的站内链接，返回 (链接数, [(相对路径, 行号, 目标)])"""
+    exists = {}
+    checked = 0
+    broken = []
+    for source in paths:
+        try:
+            text = source.read_text(encoding='utf-8')
+        except (OSError, UnicodeDecodeError) as e:
+            broken.append((source.relative_to(root).as_posix(), 0, f'<无法读取: {e}>'))
+            continue
+        for line, target, path in internal_links(root, source, text):
+            checked += 1
+            found = exists.get(path)
+            if found is None:
+                found = exists[path] = path.exists() and path.is_relative_to(root)
+            if not found:
+                broken.append((source.relative_to(root).as_posix(), line, target))
+    return checked, broken
+
+
+def check_links(root, jobs=None):
+    """并行检查文档树中的全部站内链接，返回 (文件数, 链接数, 断链列表)"""
+    root = Path(root)
+    paths = list(markdown_sources(root))
+    chunks = [paths[start:start + CHECK_CHUNK_FILES] for start in range(0, len(paths), CHECK_CHUNK_FILES)]
+    jobs = min(jobs or os.cpu_count() or 1, len(chunks))
+    if jobs <= 1:
+        results = [check_files(root, chunk) for chunk in chunks]
+    else:
+        # 服务器只用链接图，进程池只在断链检查时导入
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            results = list(executor.map(check_files, [root] * len(chunks), chunks))
+    checked = sum(count for count, _ in results)
+    broken = sorted(item for _, items in results for item in items)
+    return len(paths), checked, broken
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+AI开发知识文档库运行指标
+按路由类别统计请求数与延迟直方图、按渲染器统计渲染耗时，以Prometheus文本格式导出；
+另提供异步缓冲的访问日志
+"""
+
+import queue
+import sys
+import threading
+import time
+
+# 直方图分桶（秒）
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+RENDER_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+# 异步访问日志：队列上限与单次写入的最大行数
+ACCESS_LOG_QUEUE_SIZE = 10000
+ACCESS_LOG_BATCH = 256
+
+METRICS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class Histogram:
+    """累积分桶直方图（非线程安全，由 Metrics 加锁）"""
+
+    __slots__ = ('buckets', 'counts', 'total', 'count')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+                break
+        self.total += value
+        self.count += 1
+
+    def lines(self, name, labels):
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            yield f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}'
+        yield f'{name}_bucket{{{labels},le="+Inf"}} {self.count}'
+        yield f'{name}_sum{{{labels}}} {self.total:.6f}'
+        yield f'{name}_count{{{labels}}} {self.count}'
+
+
+class Metrics:
+    """进程内指标注册表"""
+
+    def __init__(self):
+        self.in_flight = 0
+        self._requests = {}
+        self._latency = {}
+        self._bytes = {}
+        self._render = {}
+        self._caches = {}
+        self._gauges = {}
+        self._lock = threading.Lock()
+
+    def request_started(self):
+        with self._lock:
+            self.in_flight += 1
+
+    def request_finished(self, route, status, seconds, bytes_sent):
+        """记录一次请求；route为None的内部端点（指标、事件流）只计入in-flight"""
+        with self._lock:
+            self.in_flight -= 1
+            if route is None:
+                return
+            if status is not None and status >= 400:
+                route = 'error'
+            key = (route, str(status))
+            self._requests[key] = self._requests.get(key, 0) + 1
+            histogram = self._latency.get(route)
+            if histogram is None:
+                histogram = self._latency[route] = Histogram(LATENCY_BUCKETS)
+            histogram.observe(seconds)
+            self._bytes[route] = self._bytes.get(route, 0) + bytes_sent
+
+    def observe_render(self, renderer, seconds):
+        with self._lock:
+            histogram = self._render.get(renderer)
+            if histogram is None:
+                histogram = self._render[renderer] = Histogram(RENDER_BUCKETS)
+            histogram.observe(seconds)
+
+    def register_cache(self, name, stats):
+        """注册缓存统计函数，stats() 返回至少含 hits/misses/entries 的字典"""
+        self._caches[name] = stats
+
+    def register_gauge(self, name, help_text, value):
+        """注册导出时读取的数值指标"""
+        self._gauges[name] = (help_text, value)
+
+    def render(self):
+        """导出Prometheus文本格式"""
+        with self._lock:
+            requests = sorted(self._requests.items())
+            latency = sorted(self._latency.items())
+            sent = sorted(self._bytes.items())
+            render = sorted(self._render.items())
+            in_flight = self.in_flight
+            lines = [
+                '# HELP wiki_http_requests_total HTTP requests by route class and status code.',
+                '# TYPE wiki_http_requests_total counter',
+            ]
+            lines.extend(f'wiki_http_requests_total{{route="{route}",code="{code}"}} {count}'
+                         for (route, code), count in requests)
+            lines += ['# HELP wiki_http_request_duration_seconds Request handling time by route class.',
+                      '# TYPE wiki_http_request_duration_seconds histogram']
+            for route, histogram in latency:
+                lines.extend(histogram.lines('wiki_http_request_duration_seconds', f'route="{route}"'))
+            lines += ['# HELP wiki_http_response_bytes_total Bytes written to clients by route class.',
+                      '# TYPE wiki_http_response_bytes_total counter']
+            lines.extend(f'wiki_http_response_bytes_total{{route="{route}"}} {count}' for route, count in sent)
+            lines += ['# HELP wiki_render_duration_seconds Markdown to HTML render time by renderer.',
+                      '# TYPE wiki_render_duration_seconds histogram']
+            for renderer, histogram in render:
+                lines.extend(histogram.lines('wiki_render_duration_seconds', f'renderer="{renderer}"'))
+        lines += ['# HELP wiki_http_requests_in_flight Requests currently being handled.',
+                  '# TYPE wiki_http_requests_in_flight gauge',
+                  f'wiki_http_requests_in_flight {in_flight}']
+
+        cache_stats = sorted((name, stats()) for name, stats in self._caches.items())
+        for metric, kind, help_text in (('hits', 'counter', 'Cache hits.'),
+                                        ('misses', 'counter', 'Cache misses.'),
+                                        ('entries', 'gauge', 'Entries currently cached.')):
+            suffix = '_total' if kind == 'counter' else ''
+            lines += [f'# HELP wiki_cache_{metric}{suffix} {help_text}',
+                      f'# TYPE wiki_cache_{metric}{suffix} {kind}']
+            lines.extend(f'wiki_cache_{metric}{suffix}{{cache="{name}"}} {stats[metric]}'
+                         for name, stats in cache_stats)
+        lines += ['# HELP wiki_cache_hit_ratio Cache hits divided by lookups.',
+                  '# TYPE wiki_cache_hit_ratio gauge']
+        for name, stats in cache_stats:
+            lookups = stats['hits'] + stats['misses']
+            lines.append(f'wiki_cache_hit_ratio{{cache="{name}"}} {stats["hits"] / lookups if lookups else 0.0:.4f}')
+
+        for name, (help_text, value) in sorted(self._gauges.items()):
+            lines += [f'# HELP {name} {help_text}', f'# TYPE {name} gauge', f'{name} {value()}']
+        return '\n'.join(lines) + '\n'
+
+
+# 全局指标注册表
+METRICS = Metrics()
+
+
+def timed_blocks(blocks, renderer):
+    """包装正文块生成器，只累计生成块本身的耗时（不含发送），结束时记入渲染直方图"""
+    elapsed = 0.0
+    began = time.perf_counter()
+    for block in blocks:
+        elapsed += time.perf_counter() - began
+        yield block
+        began = time.perf_counter()
+    elapsed += time.perf_counter() - began
+    METRICS.observe_render(renderer, elapsed)
+
+
+class CountingWriter:
+    """包装连接的wfile，统计写出的字节数"""
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.bytes_written = 0
+
+    def write(self, data):
+        written = self.raw.write(data)
+        self.bytes_written += len(data)
+        return written
+
+    def count(self, sent):
+        """计入绕过wfile发送的字节（如sendfile）"""
+        self.bytes_written += sent
+        return sent
+
+    def flush(self):
+        self.raw.flush()
+
+    def close(self):
+        self.raw.close()
+
+    @property
+    def closed(self):
+        return self.raw.closed
+
+
+class AsyncAccessLog:
+    """异步缓冲访问日志：请求线程只入队，后台线程批量写入
+
+    队列满时丢弃日志行并计数，绝不阻塞请求。写入线程由 start() 在服务进程内启动，
+    多进程模式下每个工作进程各有一个。
+    """
+
+    def __init__(self, stream=None, max_queue=ACCESS_LOG_QUEUE_SIZE):
+        self.stream = stream or sys.stderr
+        self.dropped = 0
+        self._queue = queue.Queue(max_queue)
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='wiki-access-log', daemon=True)
+            self._thread.start()
+
+    def write(self, line):
+        try:
+            self._queue.put_nowait(line)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self):
+        """写出剩余日志并停止后台线程"""
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        self._thread.join(timeout=2.0)
+
+    def _run(self):
+        while True:
+            line = self._queue.get()
+            batch = []
+            while line is not None:
+                batch.append(line)
+                if len(batch) >= ACCESS_LOG_BATCH:
+                    break
+                try:
+                    line = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            if batch:
+                self.stream.write(''.join(batch))
+                self.stream.flush()
+            if line is None:
+                return
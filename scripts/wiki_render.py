@@ -0,0 +1,654 @@
+#!/usr/bin/env python3
+"""
+AI开发知识文档库渲染组件
+页面模板、Markdown扩展配置、预初始化的转换器池与目录列表
+"""
+
+import hashlib
+import html
+import json
+import os
+import queue
+import re
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from contextlib import contextmanager
+from pathlib import Path
+from urllib.parse import parse_qs, quote, unquote
+
+from wiki_assets import ASSETS
+from wiki_cache import file_identity
+
+
+def slugify(value, separator='-'):
+    """Unicode友好的标题锚点，保留中文；两个渲染器共用，同一标题得到相同锚点"""
+    value = re.sub(r'[^\w\s-]', '', value).strip().lower()
+    return re.sub(r'[{}\s]+'.format(separator), separator, value)
+
+
+# Markdown扩展配置（唯一配置入口）
+MARKDOWN_EXTENSIONS = [
+    'toc',
+    'tables',
+    'fenced_code',
+    'codehilite',
+    'attr_list',
+    'def_list',
+    'footnotes',
+    'meta'
+]
+MARKDOWN_EXTENSION_CONFIGS = {
+    'codehilite': {
+        'css_class': 'highlight',
+        'use_pygments': False  # 由 CodeHighlighter 在渲染后统一高亮并记忆
+    },
+    'toc': {
+        'permalink': True,
+        'slugify': slugify
+    }
+}
+
+# 页面模板：{stylesheet}/{highlight} 在导入时替换为资源指纹URL，{title}/{content} 为拆分点
+TEMPLATE = """
+<!DOCTYPE html>
+<html lang="zh-CN">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>{title} - AI开发知识文档库</title>
+    <link href="{stylesheet}" rel="stylesheet">
+    <link href="{highlight}" rel="stylesheet">
+</head>
+<body>
+    <div class="header">
+        <h1>🤖 AI开发知识文档库</h1>
+        <p>AI Agent产品开发 · 最佳实践 · 工程方法论</p>
+    </div>
+    
+    <div class="nav-bar">
+        <a href="/" class="home">🏠 首页</a>
+        <a href="/docs/AI_AGENT_DEVELOPMENT_GUIDE.md">📖 Agent开发指南</a>
+        <a href="/templates/AGENT_PRD_TEMPLATE.md">📝 PRD模板</a>
+        <a href="/examples/Insurance-Agent-PRD-Example.md">💼 实践案例</a>
+        <a href="/docs/">📚 所有文档</a>
+        <form action="/search" method="get"><input type="search" name="q" placeholder="🔍 搜索文档"></form>
+    </div>
+    
+    <div class="content">
+        {content}
+    </div>
+    
+    <div class="footer">
+        <p>📄 AI开发知识文档库 · 🚀 让AI Agent开发更简单 · ⏰ 最后更新: 2025-08-29</p>
+        <p>💡 基于Claude Code实际经验构建 · 🌟 持续更新中</p>
+    </div>
+</body>
+</html>
+"""
+
+# 流式响应中正文分块的目标大小
+STREAM_CHUNK_BYTES = 16 * 1024
+
+
+class PageShell:
+    """预先拆分的页面外壳
+
+    导入时把模板按 {title} 与 {content} 拆分并编码为三段字节，
+    生成页面只需拼接字节块，不再对整页执行 str.format 与编码。
+    """
+
+    def __init__(self, template, **assets):
+        for name, url in assets.items():
+            template = template.replace('{' + name + '}', url)
+        self.template = template
+        head, _, rest = template.partition('{title}')
+        middle, _, tail = rest.partition('{content}')
+        self.head = head.encode('utf-8')
+        self.middle = middle.encode('utf-8')
+        self.tail = tail.encode('utf-8')
+
+    def chunks(self, title, content):
+        """按顺序返回页面的字节块"""
+        return (self.head, html.escape(title, quote=False).encode('utf-8'), self.middle,
+                content.encode('utf-8'), self.tail)
+
+    def render(self, title, content):
+        """返回完整页面字节"""
+        return b''.join(self.chunks(title, content))
+
+    def stream(self, title, blocks, chunk_bytes=STREAM_CHUNK_BYTES):
+        """流式输出：先产出页头（含样式表链接），再产出正文，最后是页脚
+
+        正文小块合并到约 chunk_bytes 后再产出，避免每个块一次系统调用。
+        """
+        yield self.head + html.escape(title, quote=False).encode('utf-8') + self.middle
+        pending = []
+        pending_bytes = 0
+        for block in blocks:
+            data = block.encode('utf-8')
+            pending.append(data)
+            pending_bytes += len(data)
+            if pending_bytes >= chunk_bytes:
+                yield b''.join(pending)
+                pending = []
+                pending_bytes = 0
+        pending.append(self.tail)
+        yield b''.join(pending)
+
+
+# 默认页面外壳（markdown后端样式表），markdown_renderer_version 据此计算模板部分
+SHELL = PageShell(TEMPLATE, stylesheet=ASSETS.url('wiki.css'), highlight=ASSETS.url('highlight.css'))
+
+# 预热文档：覆盖每个扩展的处理路径
+WARMUP_DOCUMENT = """title: warmup
+
+# 预热 Warm-up
+
+## 表格
+
+| 列A | 列B |
+|-----|-----|
+| 1   | 2   |
+
+```python
+print("hello")
+```
+
+术语
+:   定义[^1]
+
+[^1]: 脚注
+
+### 属性 {: #warmup }
+"""
+
+
+def renderer_version(*parts):
+    """由渲染器名称、配置和模板生成版本标识，任一变化都会使ETag失效"""
+    digest = hashlib.sha1()
+    for part in parts:
+        encoded = json.dumps(part, sort_keys=True, ensure_ascii=False,
+                             default=lambda value: f'{value.__module__}.{value.__qualname__}')
+        digest.update(encoded.encode('utf-8'))
+    return digest.hexdigest()[:12]
+
+
+# 服务端目录：h2/h3 超过3个时插入到第一个h2之前
+TOC_LEVELS = (2, 3)
+TOC_MIN_HEADINGS = 4
+
+
+def unique_anchor(anchor, used):
+    """重复锚点追加 _1、_2…（与markdown toc扩展一致）"""
+    candidate = anchor
+    counter = 0
+    while candidate in used or not candidate:
+        counter += 1
+        candidate = f'{anchor}_{counter}'
+    used.add(candidate)
+    return candidate
+
+
+def flatten_toc_tokens(tokens):
+    """把toc扩展的嵌套toc_tokens展开为 [(级别, 锚点, 标题HTML)]"""
+    headings = []
+    for token in tokens:
+        headings.append((token['level'], token['id'], token['name']))
+        headings.extend(flatten_toc_tokens(token['children']))
+    return headings
+
+
+def toc_html(headings):
+    """由标题列表生成目录HTML，标题不足时返回空字符串"""
+    entries = [(level, anchor, name) for level, anchor, name in headings if level in TOC_LEVELS]
+    if len(entries) < TOC_MIN_HEADINGS:
+        return ''
+    items = ''.join(f'<li class="toc-h{level}"><a href="#{html.escape(anchor, quote=True)}">{name}</a></li>'
+                    for level, anchor, name in entries)
+    return f'<div class="toc"><h3>📋 目录</h3><ul>{items}</ul></div>'
+
+
+def insert_toc(content, headings):
+    """在第一个h2之前插入服务端生成的目录"""
+    toc = toc_html(headings)
+    position = content.find('<h2')
+    if not toc or position < 0:
+        return content
+    return content[:position] + toc + content[position:]
+
+
+def markdown_renderer_version():
+    """markdown渲染器的版本标识（含库版本、扩展配置、高亮器与模板）"""
+    import markdown
+    return renderer_version('markdown', markdown.__version__, MARKDOWN_EXTENSIONS,
+                            MARKDOWN_EXTENSION_CONFIGS, HIGHLIGHTER.version(), SHELL.template)
+
+
+# 服务端代码高亮：两个渲染器都输出 <pre><code class="language-x">，渲染后统一替换
+HIGHLIGHT_STYLE = 'monokai'
+DEFAULT_HIGHLIGHT_ENTRIES = 4096
+CODE_BLOCK_PATTERN = re.compile(
+    r'<pre[^>]*><code class="language-(?P<language>[\w+#.-]+)">(?P<code>.*?)</code></pre>', re.S)
+
+
+class CodeHighlighter:
+    """pygments代码高亮，结果按 (语言, 代码哈希) 记忆
+
+    多篇文档共用的代码片段只高亮一次；未安装pygments或语言未知时保留原样转义输出。
+    """
+
+    def __init__(self, max_entries=DEFAULT_HIGHLIGHT_ENTRIES):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._memo = OrderedDict()
+        self._lexers = {}
+        self._formatter = None
+        self._available = None
+        self._lock = threading.Lock()
+
+    @property
+    def available(self):
+        """pygments是否可用（首次访问时导入）"""
+        if self._available is None:
+            try:
+                from pygments.formatters import HtmlFormatter
+            except ImportError:
+                self._available = False
+            else:
+                self._formatter = HtmlFormatter(nowrap=True)
+                self._available = True
+        return self._available
+
+    def version(self):
+        """高亮器版本标识，pygments升级或安装状态变化时页面ETag随之变化"""
+        if not self.available:
+            return 'plain'
+        import pygments
+        return f'pygments-{pygments.__version__}-{HIGHLIGHT_STYLE}'
+
+    def highlight(self, language, code_html):
+        """高亮一个代码块，code_html 为已转义的代码文本"""
+        key = (language, hashlib.sha1(code_html.encode('utf-8')).digest())
+        with self._lock:
+            highlighted = self._memo.get(key)
+            if highlighted is not None:
+                self._memo.move_to_end(key)
+                self.hits += 1
+                return highlighted
+            self.misses += 1
+        highlighted = self._highlight(language, code_html)
+        with self._lock:
+            self._memo[key] = highlighted
+            while len(self._memo) > self.max_entries:
+                self._memo.popitem(last=False)
+        return highlighted
+
+    def _highlight(self, language, code_html):
+        lexer = self._lexer(language)
+        if lexer is None:
+            return f'<pre><code class="language-{language}">{code_html}</code></pre>'
+        import pygments
+        highlighted = pygments.highlight(html.unescape(code_html), lexer, self._formatter)
+        return f'<pre class="highlight"><code class="language-{language}">{highlighted}</code></pre>'
+
+    def _lexer(self, language):
+        if not self.available:
+            return None
+        if language not in self._lexers:
+            from pygments.lexers import get_lexer_by_name
+            from pygments.util import ClassNotFound
+            try:
+                self._lexers[language] = get_lexer_by_name(language)
+            except ClassNotFound:
+                self._lexers[language] = None
+        return self._lexers[language]
+
+    def highlight_html(self, content):
+        """替换渲染结果中全部带语言标记的代码块"""
+        if '<code class="language-' not in content:
+            return content
+        return CODE_BLOCK_PATTERN.sub(
+            lambda match: self.highlight(match.group('language'), match.group('code')), content)
+
+    def stats(self):
+        return {'entries': len(self._memo), 'hits': self.hits, 'misses': self.misses}
+
+
+# 全局代码高亮器（两个渲染器与静态构建共用）
+HIGHLIGHTER = CodeHighlighter()
+
+
+def page_title(file_path):
+    """由文件名生成页面标题"""
+    return file_path.stem.replace('-', ' ').replace('_', ' ').title()
+
+
+# 目录列表：单页最多条目数、缓存的目录数
+DEFAULT_LISTING_PAGE_SIZE = 500
+DEFAULT_LISTING_DIRS = 1024
+
+DirectoryEntry = namedtuple('DirectoryEntry', 'name is_dir size mtime')
+
+
+def scan_directory(dir_path, details=False):
+    """用 os.scandir 扫描目录，类型来自目录项本身；details 为真时附带大小与修改时间
+
+    返回目录在前、文件在后、各自按名称排序的条目，隐藏以.开头的条目。
+    """
+    dirs = []
+    files = []
+    with os.scandir(dir_path) as scanner:
+        for entry in scanner:
+            if entry.name.startswith('.'):
+                continue
+            try:
+                is_dir = entry.is_dir()
+                stat = entry.stat() if details else None
+            except OSError:
+                continue
+            item = DirectoryEntry(entry.name, is_dir, stat.st_size if stat else None,
+                                  stat.st_mtime if stat else None)
+            (dirs if is_dir else files).append(item)
+    dirs.sort()
+    files.sort()
+    return dirs + files
+
+
+class DirectoryListing:
+    """一次目录扫描的结果；identity 在目录mtime变化或被显式失效后改变"""
+
+    __slots__ = ('identity', 'mtime', 'entries')
+
+    def __init__(self, identity, mtime, entries):
+        self.identity = identity
+        self.mtime = mtime
+        self.entries = entries
+
+
+class DirectoryIndex:
+    """按目录缓存扫描结果，目录mtime变化时重新扫描
+
+    目录内文件被修改不会改变目录mtime，因此附带大小/时间时由文件监视器调用 invalidate。
+    """
+
+    def __init__(self, details=False, max_dirs=DEFAULT_LISTING_DIRS):
+        self.details = details
+        self.max_dirs = max_dirs
+        self.hits = 0
+        self.misses = 0
+        self._listings = OrderedDict()
+        self._scans = 0
+        self._lock = threading.Lock()
+
+    def listing(self, dir_path, stat=None):
+        """返回目录的 DirectoryListing，必要时重新扫描；调用方已stat过目录时可传入stat结果"""
+        key = str(dir_path)
+        if stat is None:
+            stat = os.stat(key)
+        with self._lock:
+            listing = self._listings.get(key)
+            if listing is not None and listing.identity[0] == stat.st_mtime_ns:
+                self._listings.move_to_end(key)
+                self.hits += 1
+                return listing
+            self.misses += 1
+        entries = scan_directory(key, self.details)
+        with self._lock:
+            self._scans += 1
+            listing = DirectoryListing((stat.st_mtime_ns, self._scans), stat.st_mtime, entries)
+            self._listings[key] = listing
+            self._listings.move_to_end(key)
+            while len(self._listings) > self.max_dirs:
+                self._listings.popitem(last=False)
+        return listing
+
+    def cached(self, dir_path):
+        """未过期的扫描结果，不扫描也不计入命中统计；没有时返回None"""
+        key = str(dir_path)
+        stat = os.stat(key)
+        with self._lock:
+            listing = self._listings.get(key)
+        if listing is not None and listing.identity[0] == stat.st_mtime_ns:
+            return listing
+        return None
+
+    def invalidate(self, dir_path):
+        with self._lock:
+            self._listings.pop(str(dir_path), None)
+
+    def clear(self):
+        with self._lock:
+            self._listings.clear()
+
+    def stats(self):
+        return {'entries': len(self._listings), 'hits': self.hits, 'misses': self.misses}
+
+
+def format_size(size):
+    """人类可读的文件大小"""
+    for unit in ('B', 'KB', 'MB'):
+        if size < 1024 or unit == 'MB':
+            return f'{size:.0f} {unit}' if unit == 'B' else f'{size:.1f} {unit}'
+        size /= 1024
+
+
+def listing_page_number(query):
+    """从查询字符串中取页码，缺省或非法时为1"""
+    try:
+        return max(1, int(parse_qs(query).get('page', ['1'])[0]))
+    except ValueError:
+        return 1
+
+
+def directory_listing(dir_path, root, entries=None, page=1, page_size=None):
+    """生成目录列表页面的标题与正文，隐藏以.开头的条目
+
+    链接由目录相对 root 的路径生成，与请求URL的写法（如 //docs/）无关，同一目录的页面可以共用缓存；
+    page_size 为 None 时输出全部条目；页码超出范围时返回 None。
+    """
+    if entries is None:
+        entries = scan_directory(dir_path)
+    rel = Path(dir_path).relative_to(root).as_posix()
+    base_href = '' if rel == '.' else '/' + quote(rel)
+    pages = 1
+    if page_size:
+        pages = max(1, -(-len(entries) // page_size))
+        if page > pages:
+            return None
+        entries = entries[(page - 1) * page_size:page * page_size]
+    
+    lines = []
+    for item in entries:
+        name = html.escape(item.name)
+        href = f'{base_href}/{quote(item.name)}'
+        if item.is_dir:
+            line = f'📁 <a href="{href}/">{name}/</a>'
+        elif item.name.endswith('.md'):
+            line = f'📄 <a href="{href}">{name}</a>'
+        else:
+            line = f'📎 <a href="{href}">{name}</a>'
+        if item.mtime is not None:
+            modified = time.strftime('%Y-%m-%d %H:%M', time.localtime(item.mtime))
+            size = '' if item.is_dir else f'{format_size(item.size)} · '
+            line += f' <span class="file-meta">{size}{modified}</span>'
+        lines.append(line)
+    
+    pagination = ''
+    if pages > 1:
+        links = [f'<a href="{base_href}/?page={page - 1}">« 上一页</a>' if page > 1 else '',
+                 f'第 {page} / {pages} 页',
+                 f'<a href="{base_href}/?page={page + 1}">下一页 »</a>' if page < pages else '']
+        pagination = f'<div class="pagination">{" ".join(link for link in links if link)}</div>'
+    
+    name = html.escape(dir_path.name)
+    content = f"""
+            <h1>📂 目录: {name}</h1>
+            <div class="file-tree">
+            {'<br>'.join(lines)}
+            </div>
+            {pagination}
+            """
+    return f"目录 - {dir_path.name}", content
+
+
+# 指向站内Markdown文件的链接，如 href="/docs/guide.md#section"
+MD_LINK_PATTERN = re.compile(r'href="(?![a-zA-Z][a-zA-Z0-9+.-]*:)([^"#?]*?)\.md([#?][^"]*)?"')
+
+
+def rewrite_md_links(html):
+    """将站内 .md 链接改写为 .html，用于静态站点构建"""
+    return MD_LINK_PATTERN.sub(lambda m: f'href="{m.group(1)}.html{m.group(2) or ""}"', html)
+
+
+# 首页中指向站内Markdown文件的链接，如 [指南](docs/guide.md#intro)
+INDEX_LINK_PATTERN = re.compile(r'\]\(\s*<?([^)\s>]+?\.md)(?:#[^)\s>]*)?>?(?:\s+"[^"]*")?\s*\)')
+
+
+def index_linked_pages(root, index_source='wiki-index.md'):
+    """首页及其链接到的站内Markdown页面（按出现顺序去重），用于启动预渲染"""
+    root = Path(root)
+    index_path = root / index_source
+    if not index_path.is_file():
+        return []
+    pages = [index_path]
+    seen = {index_path}
+    for match in INDEX_LINK_PATTERN.finditer(index_path.read_text(encoding='utf-8')):
+        target = unquote(match.group(1))
+        if re.match(r'[a-zA-Z][a-zA-Z0-9+.-]*:', target):
+            continue
+        path = (root / target.lstrip('/')) if target.startswith('/') else (index_path.parent / target)
+        path = Path(os.path.normpath(path))
+        if path not in seen and path.is_file() and path.is_relative_to(root):
+            seen.add(path)
+            pages.append(path)
+    return pages
+
+
+def markdown_sources(root):
+    """遍历文档树中的Markdown文件，跳过以.开头的目录与文件"""
+    for current, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(name for name in dirnames if not name.startswith('.'))
+        for name in sorted(filenames):
+            if name.endswith('.md') and not name.startswith('.'):
+                yield Path(current) / name
+
+
+def load_persisted_pages(root, page_cache, disk_cache, page_etag):
+    """用磁盘缓存填充内存渲染缓存，返回 (载入页数, 当前全部页面ETag)
+
+    只读取源文件并由 page_etag(路径, 源内容) 计算ETag，不做任何渲染；
+    ETag不在磁盘缓存中的页面保持未缓存。
+    """
+    sources = {}
+    for path in markdown_sources(root):
+        try:
+            stat = path.stat()
+            sources[path] = (file_identity(stat), stat.st_mtime, page_etag(path, path.read_bytes()))
+        except OSError:
+            continue
+    pages = disk_cache.load(etag for _, _, etag in sources.values())
+    loaded = 0
+    for path, (identity, mtime, etag) in sources.items():
+        page = pages.get(etag)
+        if page is not None:
+            page.last_modified = mtime
+            page_cache.put(str(path), identity, page)
+            loaded += 1
+    return loaded, {etag for _, _, etag in sources.values()}
+
+
+def prerender_pages(paths, page_cache, build_page, store_page):
+    """渲染内存缓存中尚不存在的页面，返回实际渲染的页数"""
+    rendered = 0
+    for path in paths:
+        try:
+            stat = path.stat()
+            identity = file_identity(stat)
+            if page_cache.contains(str(path), identity):
+                continue
+            store_page(path, identity, build_page(path, stat.st_mtime))
+            rendered += 1
+        except Exception as e:
+            print(f"⚠️  预渲染失败 {path}: {e}")
+    return rendered
+
+
+def read_source(file_path):
+    """读取源文件，返回原始字节与换行规范化后的文本"""
+    raw = file_path.read_bytes()
+    text = raw.decode('utf-8').replace('\r\n', '\n').replace('\r', '\n')
+    return raw, text
+
+
+class MarkdownConverterPool:
+    """可复用的 markdown.Markdown 转换器池
+
+    启动时一次性加载扩展并创建 size 个转换器，每个工作线程从池中借用，
+    用完后 reset() 归还，避免每次请求重复加载和注册扩展。
+    """
+
+    def __init__(self, size=1, extensions=None, extension_configs=None):
+        self.size = size
+        self.extensions = list(extensions or MARKDOWN_EXTENSIONS)
+        self.extension_configs = dict(extension_configs or MARKDOWN_EXTENSION_CONFIGS)
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._started = False
+
+    def start(self, size=None, warmup=True):
+        """创建全部转换器并执行预热，返回耗时（秒）"""
+        began = time.perf_counter()
+        with self._lock:
+            if self._started:
+                return 0.0
+            if size is not None:
+                self.size = size
+            converters = [self._create() for _ in range(self.size)]
+            if warmup:
+                for md in converters:
+                    md.convert(WARMUP_DOCUMENT)
+                    md.reset()
+            for md in converters:
+                self._idle.put(md)
+            self._started = True
+        return time.perf_counter() - began
+
+    @contextmanager
+    def converter(self):
+        """借用一个转换器，退出时reset并归还"""
+        if not self._started:
+            self.start()
+        md = self._idle.get()
+        try:
+            yield md
+        finally:
+            md.reset()
+            self._idle.put(md)
+
+    def convert(self, text):
+        """转换Markdown文本为HTML"""
+        with self.converter() as md:
+            content = md.convert(text)
+        return HIGHLIGHTER.highlight_html(content)
+
+    def convert_with_toc(self, text):
+        """转换Markdown文本，同时返回标题列表 [(级别, 锚点, 标题HTML)]"""
+        with self.converter() as md:
+            content = md.convert(text)
+            headings = flatten_toc_tokens(md.toc_tokens)
+        return HIGHLIGHTER.highlight_html(content), headings
+
+    def convert_document(self, text):
+        """转换Markdown文本，返回 (HTML, 标题列表, meta扩展解析的元数据)"""
+        with self.converter() as md:
+            content = md.convert(text)
+            headings = flatten_toc_tokens(md.toc_tokens)
+            meta = dict(getattr(md, 'Meta', {}))
+        return HIGHLIGHTER.highlight_html(content), headings, meta
+
+    def _create(self):
+        import markdown
+        return markdown.Markdown(extensions=self.extensions,
+                                 extension_configs=self.extension_configs)
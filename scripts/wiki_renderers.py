@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+AI开发知识文档库渲染后端
+统一的渲染器接口与注册表：markdown（Python-Markdown）与内置的simple后端，
+启动时按优先级选择可用后端，依赖导入失败时自动回退到下一个
+"""
+
+import importlib.util
+import inspect
+import time
+from abc import ABC, abstractmethod
+
+from wiki_render import (HIGHLIGHTER, MARKDOWN_EXTENSION_CONFIGS, MARKDOWN_EXTENSIONS, MarkdownConverterPool,
+                         insert_toc, renderer_version)
+from wiki_simple import SIMPLE_RENDERER_REVISION, iter_markdown_blocks, iter_markdown_html
+
+# 已注册的后端，注册顺序即自动选择时的优先级
+RENDERERS = {}
+
+# 每个进程内的后端实例（转换器池等状态按进程持有）
+_INSTANCES = {}
+
+
+class Renderer(ABC):
+    """渲染后端接口
+
+    name 用于 --renderer、指标标签与磁盘缓存文件名；stylesheet 为页面样式表资源名；
+    requires 列出依赖的第三方模块，选择后端时只检查能否找到，真正导入在 start() 中进行；
+    导入失败后记下 import_error，此后视为不可用。version、blocks、document 为抽象方法，
+    未全部实现的后端在注册时即报错。
+    """
+
+    name = None
+    description = ''
+    stylesheet = 'wiki.css'
+    requires = ()
+    import_error = None
+
+    def available(self):
+        """依赖模块是否都能找到（不导入），导入失败过的后端不可用"""
+        if self.import_error is not None:
+            return False
+        return all(importlib.util.find_spec(module) is not None for module in self.requires)
+
+    def start(self, size=1):
+        """导入依赖并预热，返回耗时（秒）；导入失败时抛出ImportError"""
+        return 0.0
+
+    @abstractmethod
+    def version(self):
+        """后端版本标识（库版本与配置），页面ETag由它与页面模板共同决定"""
+
+    @abstractmethod
+    def blocks(self, content):
+        """按输出顺序产出正文HTML片段（含服务端目录与代码高亮）"""
+
+    @abstractmethod
+    def document(self, content):
+        """整篇转换，返回 (正文HTML（不含目录）, 标题列表 [(级别, 锚点, 标题HTML)], 元数据)"""
+
+
+def register_renderer(cls):
+    """注册渲染后端（类装饰器）；未实现全部抽象方法时抛出TypeError"""
+    if inspect.isabstract(cls):
+        raise TypeError(f"渲染后端 {cls.__name__} 未实现: {', '.join(sorted(cls.__abstractmethods__))}")
+    RENDERERS[cls.name] = cls
+    return cls
+
+
+@register_renderer
+class MarkdownRenderer(Renderer):
+    """Python-Markdown：扩展最全（表格、脚注、定义列表、meta），整篇转换"""
+
+    name = 'markdown'
+    description = 'Python-Markdown'
+    stylesheet = 'wiki.css'
+    requires = ('markdown',)
+
+    def __init__(self):
+        self.converters = MarkdownConverterPool()
+
+    def start(self, size=1):
+        return self.converters.start(size=size)
+
+    def version(self):
+        import markdown
+        return renderer_version('markdown', markdown.__version__, MARKDOWN_EXTENSIONS,
+                                MARKDOWN_EXTENSION_CONFIGS, HIGHLIGHTER.version())
+
+    def blocks(self, content):
+        html_content, headings = self.converters.convert_with_toc(content)
+        yield insert_toc(html_content, headings)
+
+    def document(self, content):
+        return self.converters.convert_document(content)
+
+
+@register_renderer
+class SimpleRenderer(Renderer):
+    """内置渲染器：不依赖第三方库，逐块流式输出，首字节更早"""
+
+    name = 'simple'
+    description = '内置渲染器'
+    stylesheet = 'simple-wiki.css'
+
+    def version(self):
+        return renderer_version('simple', SIMPLE_RENDERER_REVISION, HIGHLIGHTER.version())
+
+    def blocks(self, content):
+        return iter_markdown_html(content)
+
+    def document(self, content):
+        headings = []
+        blocks = [HIGHLIGHTER.highlight_html(block) for block in iter_markdown_blocks(content, headings)]
+        return '\n'.join(blocks), headings, {}
+
+
+def get_renderer(name):
+    """返回本进程内该后端的实例"""
+    renderer = _INSTANCES.get(name)
+    if renderer is None:
+        renderer = _INSTANCES.setdefault(name, RENDERERS[name]())
+    return renderer
+
+
+def select_renderer(preferred='auto'):
+    """选择渲染后端：指定的后端优先，其余按注册顺序；返回 (后端, 因缺少依赖被跳过的后端名称)
+
+    全部不可用时抛出RuntimeError（内置后端没有依赖，正常情况下不会发生）。
+    """
+    names = [name for name in RENDERERS if name != preferred]
+    if preferred in RENDERERS:
+        names.insert(0, preferred)
+    skipped = []
+    for name in names:
+        renderer = get_renderer(name)
+        if renderer.available():
+            return renderer, skipped
+        skipped.append(name)
+    raise RuntimeError("没有可用的渲染后端")
+
+
+def render_document(name, content):
+    """批量渲染API的渲染函数（可在渲染进程中执行）：返回 (正文HTML, 标题列表, 元数据, 耗时)"""
+    began = time.perf_counter()
+    html_content, headings, meta = get_renderer(name).document(content)
+    return html_content, headings, meta, time.perf_counter() - began
@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+AI开发知识文档库全文搜索
+基于倒排索引的BM25检索，中文按单字+二元组切分，英文按单词切分
+"""
+
+import html
+import math
+import os
+import re
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+from wiki_cache import file_identity
+from wiki_render import page_title
+
+# 检索参数
+BM25_K1 = 1.2
+BM25_B = 0.75
+TITLE_WEIGHT = 3
+SNIPPET_RADIUS = 60
+DEFAULT_RESULT_LIMIT = 20
+DEFAULT_REFRESH_INTERVAL = 2.0
+
+# 英文/数字单词与连续CJK字符
+TOKEN_PATTERN = re.compile(r'[a-z0-9_]+|[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]+')
+HEADING_PATTERN = re.compile(r'^#\s+(.+)$', re.MULTILINE)
+
+
+def is_cjk(run):
+    return run[0] >= '\u3400'
+
+
+def tokenize(text):
+    """文档切词：英文单词，中文单字与二元组"""
+    for match in TOKEN_PATTERN.finditer(text.lower()):
+        run = match.group()
+        if not is_cjk(run):
+            yield run
+            continue
+        yield from run
+        for i in range(len(run) - 1):
+            yield run[i:i + 2]
+
+
+def tokenize_query(query):
+    """查询切词：中文长度≥2时只用二元组，单字查询使用单字"""
+    tokens = []
+    for match in TOKEN_PATTERN.finditer(query.lower()):
+        run = match.group()
+        if not is_cjk(run) or len(run) == 1:
+            tokens.append(run)
+        else:
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return list(dict.fromkeys(tokens))
+
+
+class SearchDocument:
+    """已索引的文档"""
+
+    __slots__ = ('rel_path', 'title', 'identity', 'text', 'length', 'terms')
+
+    def __init__(self, rel_path, title, identity, text, length, terms):
+        self.rel_path = rel_path
+        self.title = title
+        self.identity = identity
+        self.text = text
+        self.length = length
+        self.terms = terms
+
+
+class SearchIndex:
+    """Markdown全文倒排索引
+
+    启动时 build() 全量建立；之后 refresh() 只对 mtime/size 变化的文件
+    重新索引，update_file() / remove_file() 供文件监视器逐个更新。
+    """
+
+    def __init__(self, root, refresh_interval=DEFAULT_REFRESH_INTERVAL):
+        self.root = Path(root)
+        self.refresh_interval = refresh_interval
+        self._documents = {}
+        self._postings = {}
+        self._total_length = 0
+        self._lock = threading.RLock()
+        self._last_refresh = 0.0
+
+    def __len__(self):
+        return len(self._documents)
+
+    def build(self):
+        """全量建立索引，返回耗时（秒）"""
+        began = time.perf_counter()
+        self.refresh(force=True)
+        return time.perf_counter() - began
+
+    def refresh(self, force=False):
+        """扫描文档目录，只重新索引变化的文件；未到刷新间隔或已由文件监视器接管（None）时直接返回"""
+        if not force and self.refresh_interval is None:
+            return
+        now = time.monotonic()
+        if not force and now - self._last_refresh < self.refresh_interval:
+            return
+        with self._lock:
+            if not force and now - self._last_refresh < self.refresh_interval:
+                return
+            self._last_refresh = now
+            seen = set()
+            for file_path in self._markdown_files():
+                rel_path = file_path.relative_to(self.root).as_posix()
+                seen.add(rel_path)
+                self.update_file(file_path)
+            for rel_path in set(self._documents) - seen:
+                self._remove(rel_path)
+
+    def update_file(self, file_path):
+        """文件变化时重新索引单个文件，标识未变时跳过"""
+        file_path = Path(file_path)
+        rel_path = file_path.relative_to(self.root).as_posix()
+        try:
+            identity = file_identity(file_path.stat())
+        except OSError:
+            self.remove_file(file_path)
+            return
+        with self._lock:
+            document = self._documents.get(rel_path)
+            if document is not None and document.identity == identity:
+                return
+            try:
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    text = f.read()
+            except (OSError, UnicodeDecodeError):
+                return
+            if document is not None:
+                self._remove(rel_path)
+            self._add(rel_path, identity, text)
+
+    def remove_file(self, file_path):
+        """从索引中移除文件"""
+        rel_path = Path(file_path).relative_to(self.root).as_posix()
+        with self._lock:
+            if rel_path in self._documents:
+                self._remove(rel_path)
+
+    def search(self, query, limit=DEFAULT_RESULT_LIMIT):
+        """检索，返回 [(得分, 相对路径, 标题, 摘要HTML)]，要求命中全部查询词"""
+        self.refresh()
+        tokens = tokenize_query(query)
+        if not tokens:
+            return []
+        with self._lock:
+            postings = [self._postings.get(token) for token in tokens]
+            if not all(postings):
+                return []
+            postings.sort(key=len)
+            candidates = set(postings[0])
+            for posting in postings[1:]:
+                candidates.intersection_update(posting)
+                if not candidates:
+                    return []
+
+            total = len(self._documents)
+            average_length = self._total_length / total
+            scores = {}
+            for posting in postings:
+                idf = math.log(1 + (total - len(posting) + 0.5) / (len(posting) + 0.5))
+                for rel_path in candidates:
+                    tf = posting[rel_path]
+                    length = self._documents[rel_path].length
+                    norm = BM25_K1 * (1 - BM25_B + BM25_B * length / average_length)
+                    scores[rel_path] = scores.get(rel_path, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + norm)
+
+            ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:limit]
+            return [(score, rel_path, self._documents[rel_path].title,
+                     make_snippet(self._documents[rel_path].text, query))
+                    for rel_path, score in ranked]
+
+    def stats(self):
+        """返回索引规模"""
+        with self._lock:
+            return {'documents': len(self._documents), 'terms': len(self._postings)}
+
+    def _markdown_files(self):
+        for root, dirnames, filenames in os.walk(self.root):
+            dirnames[:] = [name for name in dirnames if not name.startswith('.')]
+            for name in filenames:
+                if name.endswith('.md') and not name.startswith('.'):
+                    yield Path(root) / name
+
+    def _add(self, rel_path, identity, text):
+        heading = HEADING_PATTERN.search(text)
+        title = heading.group(1).strip() if heading else page_title(Path(rel_path))
+        counts = Counter(tokenize(text))
+        for token in tokenize(title):
+            counts[token] += TITLE_WEIGHT
+        length = sum(counts.values())
+        for token, tf in counts.items():
+            self._postings.setdefault(token, {})[rel_path] = tf
+        self._documents[rel_path] = SearchDocument(rel_path, title, identity, text, length, tuple(counts))
+        self._total_length += length
+
+    def _remove(self, rel_path):
+        document = self._documents.pop(rel_path)
+        for token in document.terms:
+            posting = self._postings.get(token)
+            if posting is None:
+                continue
+            posting.pop(rel_path, None)
+            if not posting:
+                del self._postings[token]
+        self._total_length -= document.length
+
+
+def make_snippet(text, query, radius=SNIPPET_RADIUS):
+    """截取首个命中位置附近的文本，并用<mark>高亮查询词"""
+    terms = [term for term in query.split() if term]
+    lowered = text.lower()
+    positions = [lowered.find(term.lower()) for term in terms]
+    positions = [pos for pos in positions if pos >= 0]
+    start = max(0, min(positions) - radius) if positions else 0
+    end = min(len(text), start + radius * 3)
+    excerpt = ' '.join(text[start:end].split())
+    escaped = html.escape(excerpt)
+    if terms:
+        pattern = re.compile('|'.join(re.escape(html.escape(term)) for term in terms), re.IGNORECASE)
+        escaped = pattern.sub(lambda m: f'<mark>{m.group()}</mark>', escaped)
+    prefix = '…' if start > 0 else ''
+    suffix = '…' if end < len(text) else ''
+    return f'{prefix}{escaped}{suffix}'
+
+
+def search_results_html(query, results, elapsed):
+    """生成搜索结果页正文"""
+    escaped_query = html.escape(query, quote=True)
+    items = []
+    for score, rel_path, title, snippet in results:
+        items.append(f'''
+            <li>
+                <a href="/{html.escape(rel_path, quote=True)}"><strong>{html.escape(title)}</strong></a>
+                <small>{html.escape(rel_path)} · {score:.2f}</small>
+                <p>{snippet}</p>
+            </li>''')
+    summary = f'找到 {len(results)} 个结果 · 耗时 {elapsed * 1000:.1f} ms' if query else '请输入搜索关键词'
+    return f"""
+            <h1>🔍 搜索</h1>
+            <form action="/search" method="get">
+                <input type="search" name="q" value="{escaped_query}" placeholder="搜索文档…" autofocus>
+                <button type="submit">搜索</button>
+            </form>
+            <p>{summary}</p>
+            <ul class="search-results">{''.join(items)}
+            </ul>
+            """
@@ -0,0 +1,1029 @@
+#!/usr/bin/env python3
+"""
+AI开发知识文档库服务器公共组件
+并发服务器、多进程监督与页面响应逻辑（start-wiki.py 使用）
+"""
+
+import os
+import queue
+import selectors
+import signal
+import socket
+import socketserver
+import sys
+import threading
+import time
+import traceback
+from collections import OrderedDict
+from datetime import timezone
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from wiki_admission import (DEFAULT_RATE_BURST, DEFAULT_RATE_LIMIT, PRIORITY_CHEAP, PRIORITY_EXPENSIVE,
+                            QUEUE_FULL_RETRY_AFTER, REQUEST_PEEK_BYTES, AdmissionQueue, TokenBucketLimiter,
+                            is_rate_exempt, parse_request_line, rejection_response, reserved_threads)
+from wiki_api import (DEFAULT_RENDER_WORKERS, JSON_CONTENT_TYPE, MAX_REQUEST_BYTES, NDJSON_CONTENT_TYPE, ApiError,
+                      json_bytes, parse_render_request, render_batch)
+from wiki_assets import ASSETS, IMMUTABLE_CACHE_CONTROL
+from wiki_cache import COMPRESSORS, DEFAULT_CACHE_MB, DEFAULT_COMPRESS_MIN_BYTES
+from wiki_files import (FILE_INFO_CACHE, MULTIPART_BOUNDARY, multipart_part_header, multipart_trailer,
+                        parse_range)
+from wiki_metrics import METRICS, METRICS_CONTENT_TYPE, AsyncAccessLog, CountingWriter
+from wiki_render import DEFAULT_LISTING_PAGE_SIZE
+from wiki_renderers import RENDERERS
+
+# 默认并发配置
+DEFAULT_THREADS = 8
+DEFAULT_MAX_CONNECTIONS = 64
+DEFAULT_WORKERS = 1
+
+# HTTP/1.1 keep-alive：空闲连接超时、读取请求头的总时限、每个连接的请求数上限（秒/个）
+DEFAULT_KEEPALIVE_TIMEOUT = 5.0
+DEFAULT_READ_TIMEOUT = 10.0
+DEFAULT_KEEPALIVE_REQUESTS = 100
+MAX_IDLE_CONNECTIONS = 512
+IDLE_SWEEP_INTERVAL = 0.5
+
+# 请求行尚未到齐的连接：重新预读的间隔（秒）；socket已可读，select无法等待后续数据，只能轮询
+PARTIAL_POLL_INTERVAL = 0.05
+
+# 请求正文：读取总时限为 read_timeout 加上按最低上传速率（字节/秒）传完正文的时间，超时返回408；每次读取的块大小
+MIN_REQUEST_BODY_RATE = 128 * 1024
+REQUEST_BODY_CHUNK_BYTES = 64 * 1024
+
+# 多进程模式：优雅退出的等待上限；子进程在该时间内退出视为启动失败，重启前等待
+WORKER_SHUTDOWN_TIMEOUT = 10.0
+WORKER_MIN_UPTIME = 1.0
+
+
+class BoundedThreadingServer(socketserver.TCPServer):
+    """基于固定工作线程与有界待处理队列的并发TCP服务器
+
+    工作线程只在连接上有请求数据时才被占用：新连接与keep-alive空闲连接由一个
+    监视线程统一select，可读时才进入待处理队列，空闲或迟迟不发请求的客户端不占用工作线程。
+    入队前先做准入控制：按客户端IP限速（超出时429），预读请求行由处理类判断优先级，
+    处理中与排队的请求总数受 max_connections 限制（队列满时503，廉价请求可挤出排队的昂贵请求），
+    拒绝响应由监视线程直接写出；工作线程中保留一部分只处理廉价请求。
+    每个请求都经过准入：请求行未到齐的连接留在监视线程中等待，管线化的后续请求由工作线程交还监视线程重新排队。
+    空闲连接超过 keepalive_timeout 或总数超过 MAX_IDLE_CONNECTIONS 时关闭（先关最久的）；
+    请求头必须在 read_timeout 内读完，否则断开连接。
+    """
+
+    allow_reuse_address = True
+
+    def __init__(self, server_address, handler_class,
+                 threads=DEFAULT_THREADS, max_connections=DEFAULT_MAX_CONNECTIONS, access_log=None,
+                 keepalive_timeout=DEFAULT_KEEPALIVE_TIMEOUT, read_timeout=DEFAULT_READ_TIMEOUT,
+                 max_keepalive_requests=DEFAULT_KEEPALIVE_REQUESTS,
+                 rate_limit=DEFAULT_RATE_LIMIT, rate_burst=DEFAULT_RATE_BURST):
+        if threads < 1:
+            raise ValueError("threads必须大于0")
+        if max_connections < threads:
+            raise ValueError("max_connections不能小于threads")
+        self.threads = threads
+        self.max_connections = max_connections
+        self.access_log = access_log
+        self.keepalive_timeout = keepalive_timeout
+        self.read_timeout = read_timeout
+        self.max_keepalive_requests = max_keepalive_requests
+        self.rate_limiter = TokenBucketLimiter(rate_limit, rate_burst) if rate_limit > 0 else None
+        self.pending = AdmissionQueue(max_connections - threads, threads - reserved_threads(threads))
+        self._workers = []
+        self._detached = set()
+        self._detached_lock = threading.Lock()
+        self._reading = {}
+        self._reading_lock = threading.Lock()
+        self._parking = queue.SimpleQueue()
+        self._partial = {}
+        self._idle_thread = None
+        self._idle_stopping = False
+        super().__init__(server_address, handler_class)
+
+    def process_request(self, request, client_address):
+        """新连接先交给空闲连接监视线程，请求数据到达后才占用工作线程"""
+        self._park(request, client_address, None)
+
+    def _peek_request(self, request, handler):
+        """预读（不消费）下一个请求的开头：处理类已读入缓冲的数据在前，socket中的数据在后；对方已关闭时返回None"""
+        data = handler.buffered_input if handler is not None else b''
+        if b'\n' in data or len(data) >= REQUEST_PEEK_BYTES:
+            return data
+        try:
+            received = request.recv(REQUEST_PEEK_BYTES, socket.MSG_PEEK | getattr(socket, 'MSG_DONTWAIT', 0))
+        except BlockingIOError:
+            return data
+        except OSError:
+            return None
+        if not received:
+            return data or None
+        return data + received
+
+    def _dispatch(self, request, client_address, handler):
+        """在监视线程中处理一个连接的准入；出错时只关闭该连接，监视线程继续运行"""
+        try:
+            self._admit(request, client_address, handler)
+        except Exception:
+            self._partial.pop(request, None)
+            self.handle_error(request, client_address)
+            self._close_connection(request, handler)
+
+    def _admit(self, request, client_address, handler):
+        """连接上有请求数据：请求行到齐后限速检查，按优先级进入待处理队列，超出限制时立即拒绝"""
+        data = self._peek_request(request, handler)
+        if data is None:
+            self._partial.pop(request, None)
+            self._close_connection(request, handler)
+            return
+        method, target = parse_request_line(data)
+        if method is None and len(data) < REQUEST_PEEK_BYTES:
+            # 请求行尚未到齐：留在监视线程中稍后重新预读，不占用工作线程；请求头时限从首次预读开始计算
+            self._partial.setdefault(request, (client_address, handler, time.monotonic() + self.read_timeout))
+            return
+        self._partial.pop(request, None)
+        if self.rate_limiter is not None and not is_rate_exempt(target):
+            wait = self.rate_limiter.acquire(client_address[0])
+            if wait:
+                self._reject(request, handler, 429, wait)
+                return
+        priority = PRIORITY_EXPENSIVE
+        if method is not None:
+            # 预读请求行（不消费），由处理类判断是廉价还是昂贵请求；请求行超出预读长度时无法判断，按昂贵请求处理。
+            # 无法解析的请求目标（如 "http://["）同样按昂贵请求排队，由处理类回复400
+            try:
+                priority = self.RequestHandlerClass.request_priority(method, target)
+            except Exception:
+                pass
+        rejected = self.pending.put(priority, (request, client_address, handler))
+        if rejected is not None:
+            request, _, handler = rejected
+            self._reject(request, handler, 503, QUEUE_FULL_RETRY_AFTER)
+
+    def _reject(self, request, handler, status, retry_after):
+        """在监视线程中直接写出429/503并关闭连接，不占用工作线程"""
+        METRICS.request_started()
+        sent = 0
+        try:
+            # 先读掉已到达的请求数据，否则关闭时内核回复RST，客户端可能收不到响应
+            request.setblocking(False)
+            for _ in range(16):
+                if not request.recv(65536):
+                    break
+        except OSError:
+            pass
+        try:
+            sent = request.send(rejection_response(status, retry_after))
+        except OSError:
+            pass
+        METRICS.request_finished('rejected', status, 0.0, sent)
+        self._close_connection(request, handler)
+
+    def _work(self):
+        """工作线程：按优先级取出请求处理，队列关闭且处理完后退出"""
+        while True:
+            entry = self.pending.get()
+            if entry is None:
+                return
+            priority, (request, client_address, handler) = entry
+            try:
+                self._process_request_worker(request, client_address, handler)
+            finally:
+                self.pending.done(priority)
+
+    def _process_request_worker(self, request, client_address, handler=None):
+        """在工作线程中处理连接上已到达的请求，keep-alive连接处理完后交还监视线程"""
+        keep_alive = False
+        try:
+            if handler is None:
+                handler = self.RequestHandlerClass(request, client_address, self)
+            else:
+                handler.resume()
+            keep_alive = getattr(handler, 'keep_alive', False)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            with self._detached_lock:
+                detached = request in self._detached
+                self._detached.discard(request)
+            if keep_alive and not detached:
+                self._park(request, client_address, handler)
+            elif not detached:
+                self.shutdown_request(request)
+
+    def reading_started(self, request):
+        """开始读取请求：请求行与请求头必须在 read_timeout 内读完"""
+        with self._reading_lock:
+            self._reading[request] = time.monotonic() + self.read_timeout
+
+    def reading_finished(self, request):
+        with self._reading_lock:
+            self._reading.pop(request, None)
+
+    def serve_forever(self, poll_interval=0.5):
+        if self.access_log is not None:
+            self.access_log.start()
+        # 唤醒用的socketpair与监视线程在服务进程内创建，多进程模式下不与其他进程共享
+        self._wake_reader, self._wake_writer = socket.socketpair()
+        self._wake_reader.setblocking(False)
+        self._wake_writer.setblocking(False)
+        self._idle_thread = threading.Thread(target=self._watch_connections, name='wiki-keepalive', daemon=True)
+        self._idle_thread.start()
+        self._workers = [threading.Thread(target=self._work, name=f'wiki-worker-{index}', daemon=True)
+                         for index in range(self.threads)]
+        for worker in self._workers:
+            worker.start()
+        super().serve_forever(poll_interval)
+
+    def _park(self, request, client_address, handler):
+        self._parking.put((request, client_address, handler))
+        self._wake()
+
+    def _wake(self):
+        try:
+            self._wake_writer.send(b'\0')
+        except OSError:
+            pass
+
+    def _watch_connections(self):
+        """监视新连接与空闲连接：可读时分派，超时或超出数量上限时关闭，并断开读取请求头超时的连接"""
+        selector = selectors.DefaultSelector()
+        selector.register(self._wake_reader, selectors.EVENT_READ)
+        idle = OrderedDict()
+        last_sweep = time.monotonic()
+        while not self._idle_stopping:
+            for key, _ in selector.select(PARTIAL_POLL_INTERVAL if self._partial else IDLE_SWEEP_INTERVAL):
+                if key.fileobj is self._wake_reader:
+                    try:
+                        while self._wake_reader.recv(4096):
+                            pass
+                    except (BlockingIOError, OSError):
+                        pass
+                    continue
+                selector.unregister(key.fileobj)
+                client_address, handler, _ = idle.pop(key.fileobj)
+                self._dispatch(key.fileobj, client_address, handler)
+
+            while True:
+                try:
+                    request, client_address, handler = self._parking.get_nowait()
+                except queue.Empty:
+                    break
+                if handler is not None and handler.buffered_input:
+                    # 管线化的后续请求已在处理类的读缓冲中，socket不会再变为可读：直接重新准入
+                    self._dispatch(request, client_address, handler)
+                    continue
+                try:
+                    selector.register(request, selectors.EVENT_READ)
+                except (ValueError, OSError):
+                    self._close_connection(request, handler)
+                    continue
+                idle[request] = (client_address, handler, time.monotonic())
+
+            now = time.monotonic()
+            for request, (client_address, handler, deadline) in list(self._partial.items()):
+                if now > deadline:
+                    del self._partial[request]
+                    self._close_connection(request, handler)
+                else:
+                    self._dispatch(request, client_address, handler)
+            while len(self._partial) > MAX_IDLE_CONNECTIONS:
+                request = next(iter(self._partial))
+                _, handler, _ = self._partial.pop(request)
+                self._close_connection(request, handler)
+
+            if now - last_sweep < IDLE_SWEEP_INTERVAL:
+                continue
+            last_sweep = now
+
+            # 新连接最多等待 read_timeout 发来第一个请求，keep-alive连接最多空闲 keepalive_timeout
+            expired = [request for request, (_, handler, since) in idle.items()
+                       if now - since >= (self.read_timeout if handler is None else self.keepalive_timeout)]
+            for request in expired:
+                _, handler, _ = idle.pop(request)
+                selector.unregister(request)
+                self._close_connection(request, handler)
+            while len(idle) > MAX_IDLE_CONNECTIONS:
+                request, (_, handler, _) = idle.popitem(last=False)
+                selector.unregister(request)
+                self._close_connection(request, handler)
+
+            with self._reading_lock:
+                expired = [request for request, deadline in self._reading.items() if now > deadline]
+            for request in expired:
+                try:
+                    request.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+
+        for request, (_, handler, _) in list(idle.items()) + list(self._partial.items()):
+            self._close_connection(request, handler)
+        selector.close()
+
+    def _close_connection(self, request, handler):
+        if handler is not None:
+            handler.keep_alive = False
+            try:
+                handler.finish()
+            except OSError:
+                pass
+        self.shutdown_request(request)
+
+    def detach_request(self, request):
+        """处理结束后不关闭该连接（交由其他组件持有，如SSE广播器）"""
+        with self._detached_lock:
+            self._detached.add(request)
+
+    def server_close(self):
+        """关闭监听socket与空闲连接，并等待处理中的请求完成"""
+        super().server_close()
+        self.pending.close()
+        for worker in self._workers:
+            worker.join()
+        if self._idle_thread is not None:
+            self._idle_stopping = True
+            self._wake()
+            self._idle_thread.join(timeout=2.0)
+        if self.access_log is not None:
+            self.access_log.close()
+
+
+class WorkerSupervisor:
+    """prefork多进程模式
+
+    监听socket在fork前创建，子进程继承同一socket并各自运行线程池服务器，
+    由内核在进程间分配连接；markdown转换受GIL限制，多进程才能用满多核。
+    主进程不处理请求：重启异常退出的子进程，收到SIGTERM/SIGINT时通知子进程处理完
+    当前请求后退出，超时仍未退出的强制结束。
+    """
+
+    def __init__(self, server, workers, on_worker_start=None):
+        self.server = server
+        self.workers = workers
+        self.on_worker_start = on_worker_start
+        self.restarts = 0
+        self._children = {}
+        self._stopping = False
+
+    def run(self):
+        """启动全部子进程并监督，直到收到退出信号且子进程全部结束"""
+        # 监听socket设为非阻塞：多个进程同时被唤醒时，未抢到连接的进程不会阻塞在accept中
+        self.server.socket.setblocking(False)
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+        for _ in range(self.workers):
+            self._spawn()
+        while self._children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            started = self._children.pop(pid, None)
+            if started is None or self._stopping:
+                continue
+            code = os.waitstatus_to_exitcode(status)
+            print(f"⚠️  工作进程 {pid} 异常退出（{code}），正在重启", file=sys.stderr)
+            if time.monotonic() - started < WORKER_MIN_UPTIME:
+                time.sleep(WORKER_MIN_UPTIME)
+            if not self._stopping:
+                self.restarts += 1
+                self._spawn()
+
+    def _spawn(self):
+        pid = os.fork()
+        if pid == 0:
+            self._run_worker()
+        self._children[pid] = time.monotonic()
+
+    def _run_worker(self):
+        """子进程入口，永不返回"""
+        code = 0
+        try:
+            # Ctrl+C 由主进程统一处理；SIGTERM 时停止accept并等待处理中的请求完成
+            signal.signal(signal.SIGINT, signal.SIG_IGN)
+            signal.signal(signal.SIGTERM, lambda signum, frame: threading.Thread(
+                target=self.server.shutdown, daemon=True).start())
+            if self.on_worker_start is not None:
+                self.on_worker_start()
+            self.server.serve_forever()
+            self.server.server_close()
+        except BaseException:
+            traceback.print_exc()
+            code = 1
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os._exit(code)
+
+    def _stop(self, signum, frame):
+        if self._stopping:
+            return
+        self._stopping = True
+        for pid in list(self._children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        timer = threading.Timer(WORKER_SHUTDOWN_TIMEOUT, self._kill_remaining)
+        timer.daemon = True
+        timer.start()
+
+    def _kill_remaining(self):
+        for pid in list(self._children):
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+
+
+class PageResponseMixin:
+    """渲染页面与静态文件的响应逻辑：校验头、条件GET（304）、HEAD、内容压缩、流式发送与Range"""
+
+    # 小于该字节数的页面不压缩；None表示关闭压缩
+    compress_min_bytes = DEFAULT_COMPRESS_MIN_BYTES
+
+    # 访问日志：'sync' 写stderr（默认）、'async' 交给服务器的异步日志、'off' 关闭
+    access_log_mode = 'sync'
+
+    # 当前请求的路由类别（markdown/directory/static/search/api）与状态码，用于指标；准入控制拒绝的请求记为rejected
+    route_class = None
+    status_code = None
+
+    # 持久连接：所有响应都带Content-Length或分块传输；socket超时（秒）由 create_server 按 --read-timeout 设置
+    protocol_version = 'HTTP/1.1'
+    timeout = DEFAULT_READ_TIMEOUT
+
+    # 响应头与正文分两次写出，连接复用时Nagle算法与客户端延迟ACK叠加会使每个响应多等约40ms
+    disable_nagle_algorithm = True
+
+    # 准入控制中始终视为廉价请求的路径（探针、指标、事件订阅）
+    cheap_paths = frozenset(('/healthz', '/readyz', '/__metrics', '/__events'))
+
+    @classmethod
+    def request_priority(cls, method, target):
+        """准入优先级（在连接监视线程中调用，须很快返回）：探针与带指纹的静态资源为廉价请求，其余为昂贵请求
+
+        子类可覆盖以识别已缓存的页面等。
+        """
+        path = urlsplit(target).path
+        if method in ('GET', 'HEAD') and (path in cls.cheap_paths or ASSETS.get(path) is not None):
+            return PRIORITY_CHEAP
+        return PRIORITY_EXPENSIVE
+
+    def setup(self):
+        super().setup()
+        self.wfile = CountingWriter(self.wfile)
+        self.requests_served = 0
+        self.keep_alive = False
+        self.buffered_input = b''
+
+    def handle(self):
+        """处理一个请求；连接可复用时标记为keep-alive交还服务器，下一个请求（包括已到达的管线化请求）重新经过准入"""
+        self.keep_alive = False
+        self.buffered_input = b''
+        self.close_connection = True
+        self.server.reading_started(self.request)
+        try:
+            self.handle_one_request()
+        except ConnectionError:
+            # 客户端已断开（或读取请求头超时被断开），无需记录
+            self.close_connection = True
+            return
+        finally:
+            self.server.reading_finished(self.request)
+        self.requests_served += 1
+        if self.close_connection or self.has_unread_body():
+            return
+        self.buffered_input = self.input_pending()
+        self.keep_alive = True
+
+    def resume(self):
+        """keep-alive连接上有新数据到达时，由服务器在工作线程中调用"""
+        try:
+            self.handle()
+        finally:
+            self.finish()
+
+    def finish(self):
+        if self.keep_alive:
+            self.wfile.flush()
+            return
+        super().finish()
+
+    def parse_request(self):
+        """解析请求行与请求头，请求目标无法解析时回复400"""
+        try:
+            if not super().parse_request():
+                return False
+        finally:
+            self.server.reading_finished(self.request)
+        try:
+            urlsplit(self.path)
+        except ValueError:
+            self.send_error(400, "Bad request target")
+            return False
+        return True
+
+    def input_pending(self):
+        """读缓冲中已有的下一个请求的开头（不消费）；管线化请求已读入缓冲，不能交给select等待"""
+        self.connection.setblocking(False)
+        try:
+            return self.rfile.peek(REQUEST_PEEK_BYTES)
+        except OSError:
+            return b''
+        finally:
+            self.connection.settimeout(self.timeout)
+
+    def has_unread_body(self):
+        """请求带有未读取的正文时无法确定下一个请求的起点，只能关闭连接"""
+        headers = getattr(self, 'headers', None)
+        if headers is None or getattr(self, 'body_consumed', False):
+            return False
+        return bool(headers.get('Transfer-Encoding')) or headers.get('Content-Length', '0').strip() not in ('', '0')
+
+    def send_response(self, code, message=None):
+        self.status_code = code
+        super().send_response(code, message)
+        if self.close_connection or code >= 400:
+            return
+        remaining = self.server.max_keepalive_requests - self.requests_served - 1
+        if remaining <= 0 or self.server.keepalive_timeout <= 0:
+            self.send_header('Connection', 'close')
+            return
+        if self.request_version == 'HTTP/1.0':
+            self.send_header('Connection', 'keep-alive')
+        self.send_header('Keep-Alive', f'timeout={self.server.keepalive_timeout:g}, max={remaining}')
+
+    def measured(self, handler):
+        """执行请求处理并记录请求数、延迟、发送字节与in-flight"""
+        self.route_class = None
+        self.status_code = None
+        bytes_before = self.wfile.bytes_written
+        began = time.perf_counter()
+        METRICS.request_started()
+        try:
+            handler()
+        finally:
+            METRICS.request_finished(self.route_class, self.status_code, time.perf_counter() - began,
+                                     self.wfile.bytes_written - bytes_before)
+
+    def send_probe(self, ok):
+        """健康检查端点（预热未完成的页面请求同样使用）：正常时200，否则503并提示稍后重试"""
+        body = b'ok\n' if ok else b'warming up\n'
+        self.send_response(200 if ok else 503)
+        self.send_header('Content-Type', 'text/plain; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Cache-Control', 'no-store')
+        if not ok:
+            self.send_header('Retry-After', '1')
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+
+    def send_metrics(self):
+        """以Prometheus文本格式导出运行指标"""
+        body = METRICS.render().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', METRICS_CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Cache-Control', 'no-store')
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+
+    def read_request_body(self, limit):
+        """读取带Content-Length的请求正文；缺少长度时411，超过 limit 时413，超过读取总时限时408（后两者响应后关闭连接）
+
+        总时限按正文长度计算（见 MIN_REQUEST_BODY_RATE），慢速上传的客户端不能无限期占用工作线程。
+        """
+        if self.headers.get('Transfer-Encoding'):
+            raise ApiError(411, "不支持分块传输的请求正文，请提供Content-Length")
+        try:
+            length = int(self.headers.get('Content-Length', ''))
+        except ValueError:
+            raise ApiError(411, "缺少Content-Length")
+        if length < 0:
+            raise ApiError(400, "Content-Length无效")
+        if length > limit:
+            raise ApiError(413, f"请求正文超过 {limit} 字节")
+        deadline = time.monotonic() + self.server.read_timeout + length / MIN_REQUEST_BODY_RATE
+        chunks = []
+        remaining = length
+        try:
+            while remaining:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    raise ApiError(408, "读取请求正文超时")
+                self.connection.settimeout(min(timeout, self.timeout))
+                try:
+                    chunk = self.rfile.read1(min(remaining, REQUEST_BODY_CHUNK_BYTES))
+                except TimeoutError:
+                    raise ApiError(408, "读取请求正文超时")
+                if not chunk:
+                    raise ConnectionError("请求正文不完整")
+                chunks.append(chunk)
+                remaining -= len(chunk)
+        finally:
+            self.connection.settimeout(self.timeout)
+        self.body_consumed = True
+        return b''.join(chunks)
+
+    def handle_expect_100(self):
+        """Expect: 100-continue 的请求正文超过上限时直接返回413，客户端无需上传正文"""
+        try:
+            length = int(self.headers.get('Content-Length', '0'))
+        except ValueError:
+            length = 0
+        if length > MAX_REQUEST_BYTES:
+            self.send_json({'error': f"请求正文超过 {MAX_REQUEST_BYTES} 字节"}, 413)
+            return False
+        return super().handle_expect_100()
+
+    def send_json(self, value, status=200):
+        """发送JSON响应；请求正文未读取时（如413）声明关闭连接"""
+        body = json_bytes(value)
+        self.send_response(status)
+        self.send_header('Content-Type', JSON_CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Cache-Control', 'no-store')
+        if self.has_unread_body():
+            self.send_header('Connection', 'close')
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+
+    def send_json_lines(self, records):
+        """流式发送NDJSON：每条记录一行，HTTP/1.1客户端使用分块传输"""
+        chunked = self.request_version == 'HTTP/1.1'
+        if not chunked:
+            self.close_connection = True
+        self.send_response(200)
+        self.send_header('Content-Type', NDJSON_CONTENT_TYPE)
+        self.send_header('Cache-Control', 'no-store')
+        if chunked:
+            self.send_header('Transfer-Encoding', 'chunked')
+        else:
+            self.send_header('Connection', 'close')
+        self.end_headers()
+        try:
+            for record in records:
+                line = json_bytes(record) + b'\n'
+                if chunked:
+                    self.wfile.write(b'%x\r\n%b\r\n' % (len(line), line))
+                else:
+                    self.wfile.write(line)
+            if chunked:
+                self.wfile.write(b'0\r\n\r\n')
+        except Exception as e:
+            self.log_error("Stream aborted: %s", e)
+            self.close_connection = True
+
+    def send_render_batch(self, root, workers, choose_renderer):
+        """批量渲染API：解析JSON请求，渲染全部文档后返回JSON，或按完成顺序逐篇返回NDJSON
+
+        choose_renderer(请求中的renderer或None) 返回 (渲染函数, 后端名称, 后端版本)，后端不可用时抛出ApiError；
+        渲染函数须可pickle（可在渲染进程中执行），接收Markdown文本，返回 (正文HTML, 标题列表, 元数据, 耗时)。
+        """
+        began = time.perf_counter()
+        try:
+            jobs, stream, requested = parse_render_request(self.read_request_body(MAX_REQUEST_BYTES), root)
+            render, renderer, renderer_version = choose_renderer(requested)
+        except ApiError as e:
+            self.send_json({'error': e.message}, e.status)
+            return
+        stream = stream or 'application/x-ndjson' in self.headers.get('Accept', '')
+        results = render_batch(jobs, workers, render, renderer_version,
+                               lambda seconds: METRICS.observe_render(renderer, seconds))
+
+        def summary(errors):
+            return {'renderer': renderer, 'count': len(jobs), 'errors': errors,
+                    'elapsed_ms': round((time.perf_counter() - began) * 1000, 3)}
+
+        if stream:
+            def records():
+                errors = 0
+                for result in results:
+                    errors += 'error' in result
+                    yield result
+                yield {'done': True, **summary(errors)}
+            self.send_json_lines(records())
+            return
+        documents = sorted(results, key=lambda result: result['index'])
+        self.send_json({'documents': documents, **summary(sum('error' in result for result in documents))})
+
+    def log_message(self, format, *args):
+        """访问日志：异步模式下只入队，由后台线程批量写出"""
+        if self.access_log_mode == 'off':
+            return
+        access_log = getattr(self.server, 'access_log', None)
+        if self.access_log_mode == 'async' and access_log is not None:
+            access_log.write(f"{self.address_string()} - - [{self.log_date_time_string()}] {format % args}\n")
+            return
+        super().log_message(format, *args)
+
+    def send_page(self, page, extra_headers=(), content_type='text/html; charset=utf-8',
+                  cache_control='no-cache'):
+        """发送RenderedPage，按Accept-Encoding选择压缩变体，HEAD请求只发送响应头"""
+        encoding = self.negotiate_encoding(page)
+        etag = page.variant_etag(encoding)
+        if self.is_not_modified(etag, page.last_modified):
+            self.send_not_modified(etag, page.last_modified, cache_control)
+            return
+
+        body = page.body if encoding is None else page.encoded(encoding)
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        if encoding is not None:
+            self.send_header('Content-Encoding', encoding)
+        self.send_page_validators(etag, page.last_modified, cache_control)
+        for name, value in extra_headers:
+            self.send_header(name, value)
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+
+    def send_asset(self, asset):
+        """发送带指纹的静态资源，允许浏览器永久缓存"""
+        self.send_page(asset.page, content_type=asset.content_type,
+                       cache_control=IMMUTABLE_CACHE_CONTROL)
+
+    def send_stream(self, chunks, etag, last_modified=None, extra_headers=(),
+                    content_type='text/html; charset=utf-8', cache_control='no-cache', buffer_limit=None):
+        """边生成边发送页面：HTTP/1.1客户端使用分块传输（连接可复用），HTTP/1.0客户端以关闭连接结束正文
+
+        ETag在渲染前即可确定（由源内容计算），条件请求命中时直接返回304而不渲染；
+        HEAD请求发送与GET相同的响应头（同样声明分块传输）后返回，不生成正文。
+        返回已发送的完整正文供写入缓存；正文超过 buffer_limit、HEAD请求或发送中断时返回None。
+        """
+        if self.is_not_modified(etag, last_modified):
+            self.send_not_modified(etag, last_modified, cache_control)
+            return None
+
+        chunked = self.request_version == 'HTTP/1.1'
+        if not chunked:
+            self.close_connection = True
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        if chunked:
+            self.send_header('Transfer-Encoding', 'chunked')
+        else:
+            self.send_header('Connection', 'close')
+        self.send_page_validators(etag, last_modified, cache_control)
+        for name, value in extra_headers:
+            self.send_header(name, value)
+        self.end_headers()
+        if self.command == 'HEAD':
+            return None
+
+        buffered = []
+        buffered_bytes = 0
+        try:
+            for chunk in chunks:
+                if not chunk:
+                    continue
+                if chunked:
+                    self.wfile.write(b'%x\r\n%b\r\n' % (len(chunk), chunk))
+                else:
+                    self.wfile.write(chunk)
+                if buffered is not None:
+                    buffered.append(chunk)
+                    buffered_bytes += len(chunk)
+                    if buffer_limit is not None and buffered_bytes > buffer_limit:
+                        buffered = None
+            if chunked:
+                self.wfile.write(b'0\r\n\r\n')
+        except Exception as e:
+            # 响应头已发出，无法再返回错误页：直接断开，客户端会看到不完整的响应
+            self.log_error("Stream aborted: %s", e)
+            self.close_connection = True
+            return None
+        return b''.join(buffered) if buffered is not None else None
+
+    def send_file(self, path):
+        """发送静态文件：支持条件请求与单/多段Range（206），正文经 socket.sendfile 零拷贝发送"""
+        try:
+            f = open(path, 'rb')
+        except OSError:
+            self.send_error(404, "File not found")
+            return
+        with f:
+            info = FILE_INFO_CACHE.get(str(path), os.fstat(f.fileno()), self.guess_type)
+            if self.is_not_modified(info.etag, info.last_modified):
+                self.send_not_modified(info.etag, info.last_modified)
+                return
+
+            ranges = None
+            range_header = self.headers.get('Range')
+            if range_header and self.range_applies(info):
+                ranges = parse_range(range_header, info.size)
+            if ranges == []:
+                self.send_response(416)
+                self.send_header('Content-Range', f'bytes */{info.size}')
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+
+            if ranges is None:
+                self.send_response(200)
+                self.send_header('Content-Type', info.content_type)
+                self.send_header('Content-Length', str(info.size))
+                parts = [(None, 0, info.size)]
+            elif len(ranges) == 1:
+                start, end = ranges[0]
+                self.send_response(206)
+                self.send_header('Content-Type', info.content_type)
+                self.send_header('Content-Range', f'bytes {start}-{end}/{info.size}')
+                self.send_header('Content-Length', str(end - start + 1))
+                parts = [(None, start, end - start + 1)]
+            else:
+                parts = [(multipart_part_header(info.content_type, start, end, info.size), start, end - start + 1)
+                         for start, end in ranges]
+                trailer = multipart_trailer()
+                length = sum(len(header) + count for header, _, count in parts) + len(trailer)
+                self.send_response(206)
+                self.send_header('Content-Type', f'multipart/byteranges; boundary={MULTIPART_BOUNDARY}')
+                self.send_header('Content-Length', str(length))
+                parts.append((trailer, 0, 0))
+            self.send_header('Accept-Ranges', 'bytes')
+            self.send_header('ETag', info.etag)
+            self.send_header('Last-Modified', self.date_time_string(info.last_modified))
+            self.end_headers()
+            if self.command == 'HEAD':
+                return
+            for header, offset, count in parts:
+                if header:
+                    self.wfile.write(header)
+                if count:
+                    self.wfile.count(self.connection.sendfile(f, offset, count))
+
+    def range_applies(self, info):
+        """If-Range与当前ETag或修改时间一致时才按Range响应"""
+        if_range = self.headers.get('If-Range')
+        if if_range is None:
+            return True
+        if_range = if_range.strip()
+        if if_range.startswith(('"', 'W/')):
+            return if_range == info.etag
+        try:
+            since = parsedate_to_datetime(if_range)
+        except (TypeError, ValueError, IndexError, OverflowError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        return int(info.last_modified) == int(since.timestamp())
+
+    def send_not_modified(self, etag, last_modified=None, cache_control='no-cache'):
+        """发送304响应"""
+        self.send_response(304)
+        self.send_page_validators(etag, last_modified, cache_control)
+        self.end_headers()
+
+    def send_page_validators(self, etag, last_modified=None, cache_control='no-cache'):
+        """发送ETag、Last-Modified与缓存策略"""
+        self.send_header('ETag', etag)
+        if last_modified is not None:
+            self.send_header('Last-Modified', self.date_time_string(last_modified))
+        self.send_header('Cache-Control', cache_control)
+        if self.compress_min_bytes is not None:
+            self.send_header('Vary', 'Accept-Encoding')
+
+    def negotiate_encoding(self, page):
+        """解析Accept-Encoding，返回服务端优先的可用编码，不压缩时返回None"""
+        if self.compress_min_bytes is None or len(page.body) < self.compress_min_bytes:
+            return None
+        accepted = parse_accept_encoding(self.headers.get('Accept-Encoding', ''))
+        for encoding in COMPRESSORS:
+            quality = accepted.get(encoding, accepted.get('*', 0.0))
+            if quality > 0:
+                return encoding
+        return None
+
+    def is_not_modified(self, etag, last_modified=None):
+        """根据If-None-Match / If-Modified-Since判断是否可返回304"""
+        if_none_match = self.headers.get('If-None-Match')
+        if if_none_match is not None:
+            tags = [tag.strip() for tag in if_none_match.split(',')]
+            return '*' in tags or etag in tags or f'W/{etag}' in tags
+
+        if_modified_since = self.headers.get('If-Modified-Since')
+        if if_modified_since and last_modified is not None:
+            try:
+                since = parsedate_to_datetime(if_modified_since)
+            except (TypeError, ValueError, IndexError, OverflowError):
+                return False
+            if since.tzinfo is None:
+                since = since.replace(tzinfo=timezone.utc)
+            return int(last_modified) <= since.timestamp()
+        return False
+
+
+def parse_accept_encoding(header):
+    """解析Accept-Encoding头，返回 {编码: q值}"""
+    accepted = {}
+    for item in header.split(','):
+        name, _, params = item.strip().partition(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name] = quality
+    return accepted
+
+
+def add_server_arguments(parser):
+    """为命令行解析器添加服务器公共参数"""
+    parser.add_argument('--port', type=int, default=None,
+                        help='监听端口（默认 1024）')
+    parser.add_argument('--wiki-dir', type=Path, default=None,
+                        help='文档根目录（默认为仓库根目录）')
+    parser.add_argument('--headless', action='store_true',
+                        help='不自动打开浏览器')
+    parser.add_argument('--threads', type=int, default=DEFAULT_THREADS,
+                        help=f'工作线程数（默认 {DEFAULT_THREADS}）')
+    parser.add_argument('--max-connections', type=int, default=DEFAULT_MAX_CONNECTIONS,
+                        help=f'处理中与排队的最大请求数，队列满时立即返回503（默认 {DEFAULT_MAX_CONNECTIONS}）')
+    parser.add_argument('--rate-limit', type=float, default=DEFAULT_RATE_LIMIT,
+                        help=f'每个客户端IP每秒的请求数上限，超出时返回429，0表示不限速；健康检查不受限。'
+                             f'反向代理或NAT之后所有用户共用一个IP，不宜开启（默认 {DEFAULT_RATE_LIMIT:g}）')
+    parser.add_argument('--rate-burst', type=int, default=DEFAULT_RATE_BURST,
+                        help=f'每个客户端IP允许的突发请求数（默认 {DEFAULT_RATE_BURST}）')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help=f'工作进程数，大于1时启用prefork多进程模式（默认 {DEFAULT_WORKERS}，需要fork）')
+    parser.add_argument('--cache-mb', type=int, default=DEFAULT_CACHE_MB,
+                        help=f'渲染缓存内存预算，单位MB（默认 {DEFAULT_CACHE_MB}）')
+    parser.add_argument('--compress-min-bytes', type=int, default=DEFAULT_COMPRESS_MIN_BYTES,
+                        help=f'启用gzip/deflate压缩的最小页面字节数（默认 {DEFAULT_COMPRESS_MIN_BYTES}）')
+    parser.add_argument('--no-compress', action='store_true',
+                        help='关闭响应压缩')
+    parser.add_argument('--no-watch', action='store_true',
+                        help='关闭文件监视与浏览器自动刷新')
+    parser.add_argument('--poll', action='store_true',
+                        help='文件监视强制使用轮询（默认Linux下使用inotify）')
+    parser.add_argument('--listing-page-size', type=int, default=DEFAULT_LISTING_PAGE_SIZE,
+                        help=f'目录列表每页条目数（默认 {DEFAULT_LISTING_PAGE_SIZE}）')
+    parser.add_argument('--listing-details', action='store_true',
+                        help='目录列表显示文件大小与修改时间')
+    parser.add_argument('--access-log', choices=('sync', 'async', 'off'), default='sync',
+                        help='访问日志：sync 同步写stderr（默认）、async 后台批量写入、off 关闭')
+    parser.add_argument('--keepalive-timeout', type=float, default=DEFAULT_KEEPALIVE_TIMEOUT,
+                        help=f'keep-alive连接的空闲超时，单位秒，0表示每个请求后关闭连接（默认 {DEFAULT_KEEPALIVE_TIMEOUT:g}）')
+    parser.add_argument('--read-timeout', type=float, default=DEFAULT_READ_TIMEOUT,
+                        help=f'读取请求头的总时限及socket读写超时，单位秒；读取请求正文另按长度放宽（默认 {DEFAULT_READ_TIMEOUT:g}）')
+    parser.add_argument('--max-keepalive-requests', type=int, default=DEFAULT_KEEPALIVE_REQUESTS,
+                        help=f'每个连接最多处理的请求数（默认 {DEFAULT_KEEPALIVE_REQUESTS}）')
+    parser.add_argument('--render-cache', type=Path, default=None,
+                        help='磁盘渲染缓存SQLite文件（默认 <文档根目录>/.wiki-cache/ 下按服务器区分）')
+    parser.add_argument('--no-render-cache', action='store_true',
+                        help='关闭磁盘渲染缓存')
+    parser.add_argument('--renderer', choices=('auto', *RENDERERS), default='auto',
+                        help='渲染后端：auto 按优先级选择可用的后端（默认）；指定的后端缺少依赖时同样回退')
+    parser.add_argument('--render-workers', type=int, default=DEFAULT_RENDER_WORKERS,
+                        help=f'批量渲染API（POST /api/render）的渲染进程数，1表示在请求线程内渲染（默认 {DEFAULT_RENDER_WORKERS}）')
+    return parser
+
+
+def create_server(handler_class, port, args):
+    """按命令行参数创建并发服务器（只绑定端口，后台线程在 serve_forever 所在进程中启动）"""
+    handler_class.compress_min_bytes = None if args.no_compress else args.compress_min_bytes
+    handler_class.access_log_mode = args.access_log
+    handler_class.timeout = args.read_timeout
+    access_log = AsyncAccessLog() if args.access_log == 'async' else None
+    if access_log is not None:
+        METRICS.register_gauge('wiki_access_log_dropped', 'Access log lines dropped because the queue was full.',
+                               lambda: access_log.dropped)
+    server = BoundedThreadingServer(("", port), handler_class,
+                                    threads=args.threads,
+                                    max_connections=args.max_connections,
+                                    access_log=access_log,
+                                    keepalive_timeout=args.keepalive_timeout,
+                                    read_timeout=args.read_timeout,
+                                    max_keepalive_requests=args.max_keepalive_requests,
+                                    rate_limit=args.rate_limit,
+                                    rate_burst=args.rate_burst)
+    METRICS.register_gauge('wiki_admission_pending', 'Requests waiting in the admission queue.',
+                           lambda: len(server.pending))
+    METRICS.register_gauge('wiki_admission_running_expensive', 'Expensive requests being processed.',
+                           lambda: server.pending.running_expensive)
+    return server
+
+
+def serve(httpd, args, on_worker_start=None):
+    """运行服务器：单进程直接serve_forever，--workers > 1 时由主进程监督多个工作进程
+
+    on_worker_start 在每个服务进程中、开始处理请求之前调用，用于启动该进程自己的
+    后台线程（文件监视、事件推送等）；线程不会被fork继承，必须在子进程内启动。
+    """
+    if args.workers > 1 and hasattr(os, 'fork'):
+        WorkerSupervisor(httpd, args.workers, on_worker_start).run()
+        return
+    if args.workers > 1:
+        print("⚠️  当前平台不支持fork，以单进程模式运行", file=sys.stderr)
+    if on_worker_start is not None:
+        on_worker_start()
+    httpd.serve_forever()
@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+"""
+AI开发知识文档库内置Markdown渲染器
+不依赖第三方库：逐行扫描的块解析器，行内格式按块处理，按块流式产出HTML
+"""
+
+import html
+import re
+
+from wiki_render import HIGHLIGHTER, slugify, toc_html, unique_anchor
+
+# 渲染器版本：修改解析或输出时请递增
+SIMPLE_RENDERER_REVISION = 5
+
+# 块级语法：标题结尾的 # 与表格分隔行的单元格在Python中处理，正则中没有相邻的可变长空白，不会多项式回溯
+HEADING_LINE = re.compile(r'^(#{1,6})\s+(.*)$')
+FENCE_LINE = re.compile(r'^\s*(`{3,}|~{3,})\s*([\w+#.-]*)')
+LIST_LINE = re.compile(r'^(\s*)([-*+]|\d{1,9}[.)])\s+(.*)$')
+RULE_LINE = re.compile(r'^\s*([-*_])(?:\s*\1){2,}\s*$')
+TABLE_SEPARATOR_CELL = re.compile(r':?-+:?')
+TAG_PATTERN = re.compile(r'<[^>]*>')
+HTML_BLOCK_START = re.compile(r'<[A-Za-z/!?]')
+
+# 行内格式：代码优先匹配，代码内容不再做其他替换；均使用否定字符类，无回溯嵌套。
+# 每个分支的扫描都止于下一个同类起始符（方括号、左括号），未闭合的 [ 或 ]( 不会被反复扫描到行尾，
+# 整体为线性时间；代价是链接文字中不能再嵌套方括号。
+# 不构成实体的 & 与不构成标签的 < 在正文中转义，实体与内联HTML标签原样保留
+INLINE_PATTERN = re.compile(
+    r'`(?P<code>[^`]+)`'
+    r'|(?P<raw>&(?!#?\w+;)|<(?![A-Za-z/!?]))'
+    r'|!\[(?P<alt>[^\[\]]*)\]\((?P<src>[^()\s]+)\)'
+    r'|\[(?P<text>[^\[\]]+)\]\((?P<href>[^()\s]+)\)'
+    r'|\*\*(?P<strong>[^*]+)\*\*'
+    r'|\*(?P<em>[^*\s][^*]*)\*'
+)
+
+
+def escape_html(text):
+    """转义代码内容中的HTML特殊字符"""
+    return text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+
+
+def _render_inline_match(match):
+    if match.group('code') is not None:
+        return f'<code>{escape_html(match.group("code"))}</code>'
+    if match.group('raw') is not None:
+        return escape_html(match.group('raw'))
+    if match.group('src') is not None:
+        return f'<img src="{match.group("src")}" alt="{match.group("alt")}">'
+    if match.group('href') is not None:
+        return f'<a href="{match.group("href")}">{render_inline(match.group("text"))}</a>'
+    if match.group('strong') is not None:
+        return f'<strong>{render_inline(match.group("strong"))}</strong>'
+    return f'<em>{render_inline(match.group("em"))}</em>'
+
+
+def render_inline(text):
+    """单次扫描完成行内代码、图片、链接、粗体与斜体，并转义正文中的裸 & 与 <"""
+    return INLINE_PATTERN.sub(_render_inline_match, text)
+
+
+def _heading_text(heading):
+    """标题文字：去掉结尾的 # 及其两侧空白"""
+    return heading.group(2).rstrip().rstrip('#').rstrip()
+
+
+def _is_table_separator(line):
+    """表格分隔行：每个单元格都形如 ---、:--、--: 或 :-:"""
+    return all(TABLE_SEPARATOR_CELL.fullmatch(cell) for cell in _table_cells(line))
+
+
+def _table_cells(line):
+    line = line.strip()
+    if line.startswith('|'):
+        line = line[1:]
+    if line.endswith('|'):
+        line = line[:-1]
+    return [cell.strip() for cell in line.split('|')]
+
+
+def _render_list(items):
+    """由 (缩进, 标签, 内容) 列表生成嵌套列表"""
+    parts = []
+    stack = []
+    for indent, tag, text in items:
+        while stack and indent < stack[-1][0]:
+            parts.append(f'</li></{stack.pop()[1]}>')
+        if stack and indent == stack[-1][0] and tag != stack[-1][1]:
+            parts.append(f'</li></{stack.pop()[1]}>')
+        if not stack or indent > stack[-1][0]:
+            parts.append(f'<{tag}>')
+            stack.append((indent, tag))
+        else:
+            parts.append('</li>')
+        parts.append(f'<li>{render_inline(text)}')
+    while stack:
+        parts.append(f'</li></{stack.pop()[1]}>')
+    return ''.join(parts)
+
+
+def iter_markdown_blocks(md_content, headings=None):
+    """逐行扫描Markdown，按块依次产出HTML；每行只处理一次
+
+    传入 headings 列表时，标题以 (级别, 锚点, 标题HTML) 追加到其中。
+    """
+    if headings is None:
+        headings = []
+    used_anchors = {anchor for _, anchor, _ in headings}
+    lines = md_content.split('\n')
+    total = len(lines)
+    paragraph = []
+    i = 0
+    
+    def flush_paragraph():
+        if paragraph:
+            text = '\n'.join(paragraph)
+            paragraph.clear()
+            return f'<p>{render_inline(text)}</p>'
+        return None
+    
+    while i < total:
+        line = lines[i]
+        stripped = line.strip()
+        
+        # 空行：结束段落
+        if not stripped:
+            block = flush_paragraph()
+            if block:
+                yield block
+            i += 1
+            continue
+        
+        # 代码块：原样转义，不做行内替换
+        fence = FENCE_LINE.match(line)
+        if fence:
+            block = flush_paragraph()
+            if block:
+                yield block
+            marker = fence.group(1)
+            language = fence.group(2)
+            code = []
+            i += 1
+            while i < total and not lines[i].strip().startswith(marker):
+                code.append(lines[i])
+                i += 1
+            i += 1
+            css_class = f' class="language-{language}"' if language else ''
+            yield f'<pre><code{css_class}>{escape_html(chr(10).join(code))}</code></pre>'
+            continue
+        
+        # 标题
+        heading = HEADING_LINE.match(line)
+        if heading:
+            block = flush_paragraph()
+            if block:
+                yield block
+            level = len(heading.group(1))
+            name = render_inline(_heading_text(heading))
+            anchor = unique_anchor(slugify(html.unescape(TAG_PATTERN.sub('', name))), used_anchors)
+            headings.append((level, anchor, name))
+            yield (f'<h{level} id="{anchor}">{name}'
+                   f'<a class="headerlink" href="#{anchor}" title="Permanent link">&para;</a></h{level}>')
+            i += 1
+            continue
+        
+        # 分隔线
+        if RULE_LINE.match(line):
+            block = flush_paragraph()
+            if block:
+                yield block
+            yield '<hr>'
+            i += 1
+            continue
+        
+        # 表格：紧随分隔行的第一行为表头
+        if stripped.startswith('|'):
+            block = flush_paragraph()
+            if block:
+                yield block
+            rows = []
+            while i < total and lines[i].strip().startswith('|'):
+                rows.append(lines[i])
+                i += 1
+            parts = ['<table>']
+            has_header = len(rows) > 1 and _is_table_separator(rows[1])
+            for index, row in enumerate(rows):
+                if has_header and index == 1:
+                    continue
+                cell_tag = 'th' if has_header and index == 0 else 'td'
+                cells = ''.join(f'<{cell_tag}>{render_inline(cell)}</{cell_tag}>' for cell in _table_cells(row))
+                parts.append(f'<tr>{cells}</tr>')
+            parts.append('</table>')
+            yield ''.join(parts)
+            continue
+        
+        # 引用：去掉前缀后递归解析
+        if stripped.startswith('>'):
+            block = flush_paragraph()
+            if block:
+                yield block
+            quoted = []
+            while i < total and lines[i].strip().startswith('>'):
+                content = lines[i].strip()[1:]
+                quoted.append(content[1:] if content.startswith(' ') else content)
+                i += 1
+            yield f'<blockquote>{"".join(iter_markdown_blocks(chr(10).join(quoted), headings))}</blockquote>'
+            continue
+        
+        # 列表：连续的列表项（含缩进的续行）组成一个块
+        item = LIST_LINE.match(line)
+        if item:
+            block = flush_paragraph()
+            if block:
+                yield block
+            items = []
+            while i < total:
+                item = LIST_LINE.match(lines[i])
+                if item:
+                    tag = 'ul' if item.group(2) in '-*+' else 'ol'
+                    items.append((len(item.group(1).expandtabs(4)), tag, item.group(3)))
+                elif items and lines[i].startswith((' ', '\t')) and lines[i].strip():
+                    indent, tag, text = items[-1]
+                    items[-1] = (indent, tag, f'{text}\n{lines[i].strip()}')
+                else:
+                    break
+                i += 1
+            yield _render_list(items)
+            continue
+        
+        # HTML块：以标签开头的行原样输出到空行为止
+        if HTML_BLOCK_START.match(stripped) and not paragraph:
+            raw = []
+            while i < total and lines[i].strip():
+                raw.append(lines[i])
+                i += 1
+            yield '\n'.join(raw)
+            continue
+        
+        paragraph.append(stripped)
+        i += 1
+    
+    block = flush_paragraph()
+    if block:
+        yield block
+
+
+def collect_headings(md_content, headings=None):
+    """预扫描标题，块的划分与 iter_markdown_blocks 一致，锚点也按相同顺序分配
+
+    流式输出时目录位于第一个h2之前，需要在生成正文之前得到全部标题。
+    """
+    if headings is None:
+        headings = []
+    used_anchors = {anchor for _, anchor, _ in headings}
+    lines = md_content.split('\n')
+    total = len(lines)
+    in_paragraph = False
+    i = 0
+    while i < total:
+        line = lines[i]
+        stripped = line.strip()
+        fence = FENCE_LINE.match(line)
+        heading = HEADING_LINE.match(line)
+        if not stripped:
+            in_paragraph = False
+        elif fence:
+            i += 1
+            while i < total and not lines[i].strip().startswith(fence.group(1)):
+                i += 1
+            in_paragraph = False
+        elif heading:
+            name = render_inline(_heading_text(heading))
+            anchor = unique_anchor(slugify(html.unescape(TAG_PATTERN.sub('', name))), used_anchors)
+            headings.append((len(heading.group(1)), anchor, name))
+            in_paragraph = False
+        elif stripped.startswith('>'):
+            quoted = []
+            while i < total and lines[i].strip().startswith('>'):
+                content = lines[i].strip()[1:]
+                quoted.append(content[1:] if content.startswith(' ') else content)
+                i += 1
+            collect_headings(chr(10).join(quoted), headings)
+            used_anchors = {anchor for _, anchor, _ in headings}
+            in_paragraph = False
+            continue
+        elif HTML_BLOCK_START.match(stripped) and not in_paragraph:
+            while i < total and lines[i].strip():
+                i += 1
+            continue
+        elif RULE_LINE.match(line) or stripped.startswith('|'):
+            # 分隔线与表格中不会出现标题，只需结束当前段落
+            in_paragraph = False
+        elif LIST_LINE.match(line):
+            # 列表连同缩进的续行一起跳过
+            i += 1
+            while i < total and (LIST_LINE.match(lines[i])
+                                 or (lines[i].startswith((' ', '\t')) and lines[i].strip())):
+                i += 1
+            in_paragraph = False
+            continue
+        else:
+            in_paragraph = True
+        i += 1
+    return headings
+
+
+def iter_markdown_html(md_content):
+    """按块流式产出完整正文（含目录与代码高亮），块之间以换行分隔"""
+    toc = toc_html(collect_headings(md_content))
+    for index, block in enumerate(iter_markdown_blocks(md_content)):
+        if toc and '<h2' in block:
+            position = block.find('<h2')
+            block = block[:position] + toc + block[position:]
+            toc = ''
+        yield ('\n' if index else '') + HIGHLIGHTER.highlight_html(block)
+
+
+def simple_markdown_to_html(md_content):
+    """简单的Markdown转HTML，不依赖第三方库"""
+    return ''.join(iter_markdown_html(md_content))
@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+AI开发知识文档库文件监视与实时刷新
+Linux下使用inotify，其他平台轮询；变化通过Server-Sent Events推送给浏览器
+"""
+
+import ctypes
+import ctypes.util
+import json
+import os
+import select
+import socket
+import struct
+import sys
+import threading
+import time
+from pathlib import Path
+
+from wiki_assets import ASSETS
+
+# 监视参数
+DEFAULT_POLL_INTERVAL = 1.0
+DEBOUNCE_SECONDS = 0.1
+HEARTBEAT_SECONDS = 15.0
+SEND_TIMEOUT = 2.0
+DEFAULT_MAX_SUBSCRIBERS = 256
+
+# inotify 常量（见 <sys/inotify.h>）
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+              | IN_CREATE | IN_DELETE | IN_DELETE_SELF)
+EVENT_HEADER = struct.Struct('iIII')
+
+# 浏览器端：收到包含当前页面的reload事件时刷新；脚本为带指纹的静态资源，页面中只保留引用
+LIVE_RELOAD_SCRIPT = f'\n    <script src="{ASSETS.url("live-reload.js")}"></script>\n'
+
+
+def is_hidden(path, root):
+    """路径中任意一段以.开头即视为隐藏"""
+    return any(part.startswith('.') for part in path.relative_to(root).parts)
+
+
+class InotifyBackend:
+    """基于inotify的递归目录监视"""
+
+    name = 'inotify'
+
+    def __init__(self, root):
+        self.root = root
+        libc_name = ctypes.util.find_library('c') or 'libc.so.6'
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self._fd = self._libc.inotify_init1(IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        self._watches = {}
+        self._add_tree(root)
+
+    def _add_tree(self, directory):
+        """为目录及其子目录添加监视，返回新目录中已存在的文件"""
+        found = []
+        for current, dirnames, filenames in os.walk(directory):
+            dirnames[:] = [name for name in dirnames if not name.startswith('.')]
+            wd = self._libc.inotify_add_watch(self._fd, os.fsencode(current), WATCH_MASK)
+            if wd >= 0:
+                self._watches[wd] = Path(current)
+            found.extend(Path(current) / name for name in filenames if not name.startswith('.'))
+        return found
+
+    def wait(self, timeout):
+        """等待事件，返回变化路径集合"""
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return set()
+        data = os.read(self._fd, 64 * 1024)
+        changed = set()
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                changed.add(self.root)
+                continue
+            if mask & IN_IGNORED:
+                self._watches.pop(wd, None)
+                continue
+            directory = self._watches.get(wd)
+            if directory is None:
+                continue
+            path = directory / os.fsdecode(name) if name else directory
+            if name.startswith(b'.'):
+                continue
+            changed.add(path)
+            if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                changed.update(self._add_tree(path))
+        return changed
+
+    def close(self):
+        os.close(self._fd)
+
+
+class PollingBackend:
+    """轮询比较 (mtime, size) 的监视后端"""
+
+    name = 'polling'
+
+    def __init__(self, root, interval=DEFAULT_POLL_INTERVAL):
+        self.root = root
+        self.interval = interval
+        self._snapshot = self._scan()
+
+    def _scan(self):
+        snapshot = {}
+        for current, dirnames, filenames in os.walk(self.root):
+            dirnames[:] = [name for name in dirnames if not name.startswith('.')]
+            for name in dirnames + filenames:
+                if name.startswith('.'):
+                    continue
+                path = Path(current) / name
+                try:
+                    stat = path.stat()
+                except OSError:
+                    continue
+                snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def wait(self, timeout):
+        time.sleep(min(timeout, self.interval))
+        snapshot = self._scan()
+        changed = {path for path, identity in snapshot.items() if self._snapshot.get(path) != identity}
+        changed.update(set(self._snapshot) - set(snapshot))
+        self._snapshot = snapshot
+        return changed
+
+    def close(self):
+        pass
+
+
+class FileWatcher:
+    """文件监视线程：合并短时间内的事件后回调 on_change(路径集合)"""
+
+    def __init__(self, root, on_change, force_polling=False, poll_interval=DEFAULT_POLL_INTERVAL):
+        self.root = Path(root)
+        self.on_change = on_change
+        self.force_polling = force_polling
+        self.poll_interval = poll_interval
+        self.backend = None
+        self._stopped = threading.Event()
+
+    def start(self):
+        """启动监视线程，返回所用后端名称"""
+        if sys.platform.startswith('linux') and not self.force_polling:
+            try:
+                self.backend = InotifyBackend(self.root)
+            except (OSError, AttributeError):
+                self.backend = None
+        if self.backend is None:
+            self.backend = PollingBackend(self.root, self.poll_interval)
+        thread = threading.Thread(target=self._run, name='wiki-watcher', daemon=True)
+        thread.start()
+        return self.backend.name
+
+    def stop(self):
+        self._stopped.set()
+
+    def _run(self):
+        pending = set()
+        while not self._stopped.is_set():
+            changed = self.backend.wait(DEBOUNCE_SECONDS if pending else 1.0)
+            if changed:
+                pending.update(path for path in changed if not is_hidden(path, self.root))
+                continue
+            if pending:
+                batch, pending = pending, set()
+                try:
+                    self.on_change(batch)
+                except Exception as e:
+                    print(f"⚠️  文件变化处理失败: {e}", file=sys.stderr)
+        self.backend.close()
+
+
+def changed_url_paths(root, paths, index_source='wiki-index.md'):
+    """把变化的文件映射为受影响的页面URL：文件本身及其所在目录的列表页
+
+    监视队列溢出时传入root本身，返回 ['*'] 表示全部页面都需刷新。
+    """
+    if root in paths:
+        return ['*']
+    urls = set()
+    for path in paths:
+        rel = path.relative_to(root).as_posix()
+        urls.add('/' + rel)
+        if rel == index_source:
+            urls.update(('/', '/index.html'))
+        parent = path.parent.relative_to(root).as_posix()
+        if parent != '.':
+            urls.update(('/' + parent, '/' + parent + '/'))
+    return sorted(urls)
+
+
+class EventBroadcaster:
+    """Server-Sent Events广播器
+
+    订阅连接从工作线程池中脱离，由广播器直接持有socket，
+    因此打开的浏览器标签页不会占用工作线程。
+    """
+
+    def __init__(self, max_subscribers=DEFAULT_MAX_SUBSCRIBERS, heartbeat=HEARTBEAT_SECONDS):
+        self.max_subscribers = max_subscribers
+        self.heartbeat = heartbeat
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._started = False
+
+    def __len__(self):
+        return len(self._subscribers)
+
+    def can_subscribe(self):
+        return len(self._subscribers) < self.max_subscribers
+
+    def subscribe(self, sock):
+        """接管已发送响应头的连接"""
+        sock.settimeout(SEND_TIMEOUT)
+        with self._lock:
+            self._subscribers.add(sock)
+
+    def publish(self, event, data):
+        """向全部订阅者发送事件"""
+        self._send(f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n".encode('utf-8'))
+
+    def start(self):
+        """启动心跳线程，定期清理已断开的连接"""
+        if self._started:
+            return
+        self._started = True
+        thread = threading.Thread(target=self._heartbeat, name='wiki-events', daemon=True)
+        thread.start()
+
+    def close(self):
+        with self._lock:
+            subscribers, self._subscribers = self._subscribers, set()
+        for sock in subscribers:
+            self._close(sock)
+
+    def _heartbeat(self):
+        while True:
+            time.sleep(self.heartbeat)
+            self._send(b': ping\n\n')
+
+    def _send(self, payload):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        dead = []
+        for sock in subscribers:
+            try:
+                sock.sendall(payload)
+            except OSError:
+                dead.append(sock)
+        if dead:
+            with self._lock:
+                self._subscribers.difference_update(dead)
+            for sock in dead:
+                self._close(sock)
+
+    @staticmethod
+    def _close(sock):
+        try:
+            sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        sock.close()
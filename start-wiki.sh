@@ -16,6 +16,12 @@ if ! python3 -c "import markdown" 2> /dev/null; then
     pip3 install markdown
 fi
 
+# 检查并安装代码高亮依赖（可选，缺失时代码块不高亮）
+if ! python3 -c "import pygments" 2> /dev/null; then
+    echo "📦 安装pygments依赖..."
+    pip3 install pygments
+fi
+
 # 获取脚本所在目录
 SCRIPT_DIR="$( cd "$( dirname "${BASH_SOURCE[0]}" )" &> /dev/null && pwd )"
 cd "$SCRIPT_DIR"
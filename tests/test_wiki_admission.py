@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+准入控制（scripts/wiki_admission.py）测试
+"""
+
+import sys
+import threading
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'scripts'))
+
+from wiki_admission import (PRIORITY_CHEAP, PRIORITY_EXPENSIVE, AdmissionQueue, TokenBucketLimiter,  # noqa: E402
+                            is_rate_exempt, parse_request_line, reserved_threads)
+
+CHEAP = PRIORITY_CHEAP
+EXPENSIVE = PRIORITY_EXPENSIVE
+
+
+class AdmissionQueueTest(unittest.TestCase):
+    """优先级出队、满队列时的挤出、昂贵请求并发上限与关闭"""
+
+    def drain(self, pending, count):
+        return [pending.get() for _ in range(count)]
+
+    def test_cheap_before_expensive(self):
+        pending = AdmissionQueue(capacity=8, max_expensive=8)
+        for priority, item in ((EXPENSIVE, 'e1'), (CHEAP, 'c1'), (EXPENSIVE, 'e2'), (CHEAP, 'c2')):
+            self.assertIsNone(pending.put(priority, item))
+        self.assertEqual(self.drain(pending, 4),
+                         [(CHEAP, 'c1'), (CHEAP, 'c2'), (EXPENSIVE, 'e1'), (EXPENSIVE, 'e2')])
+
+    def test_cheap_evicts_newest_expensive_when_full(self):
+        pending = AdmissionQueue(capacity=2, max_expensive=2)
+        pending.put(EXPENSIVE, 'e1')
+        pending.put(EXPENSIVE, 'e2')
+        self.assertEqual(pending.put(CHEAP, 'c1'), 'e2')
+        self.assertEqual(len(pending), 2)
+        self.assertEqual(self.drain(pending, 2), [(CHEAP, 'c1'), (EXPENSIVE, 'e1')])
+
+    def test_full_queue_rejects_new_item(self):
+        pending = AdmissionQueue(capacity=2, max_expensive=2)
+        pending.put(EXPENSIVE, 'e1')
+        pending.put(CHEAP, 'c1')
+        self.assertEqual(pending.put(EXPENSIVE, 'e2'), 'e2')
+        self.assertEqual(pending.put(CHEAP, 'c2'), 'e1')
+        self.assertEqual(pending.put(CHEAP, 'c3'), 'c3')
+        self.assertEqual(self.drain(pending, 2), [(CHEAP, 'c1'), (CHEAP, 'c2')])
+
+    def test_max_expensive(self):
+        pending = AdmissionQueue(capacity=8, max_expensive=1)
+        pending.put(EXPENSIVE, 'e1')
+        pending.put(EXPENSIVE, 'e2')
+        self.assertEqual(pending.get(), (EXPENSIVE, 'e1'))
+        self.assertEqual(pending.running_expensive, 1)
+
+        # 昂贵请求达到上限时，廉价请求照常出队，昂贵请求等待
+        pending.put(CHEAP, 'c1')
+        self.assertEqual(pending.get(), (CHEAP, 'c1'))
+        result = []
+        waiter = threading.Thread(target=lambda: result.append(pending.get()))
+        waiter.start()
+        waiter.join(0.1)
+        self.assertTrue(waiter.is_alive())
+
+        pending.done(EXPENSIVE)
+        waiter.join(5)
+        self.assertEqual(result, [(EXPENSIVE, 'e2')])
+        self.assertEqual(pending.running_expensive, 1)
+
+    def test_close_drains_then_stops(self):
+        pending = AdmissionQueue(capacity=8, max_expensive=1)
+        pending.put(EXPENSIVE, 'e1')
+        pending.put(EXPENSIVE, 'e2')
+        pending.close()
+        self.assertEqual(pending.put(CHEAP, 'c1'), 'c1')
+        self.assertEqual(pending.get(), (EXPENSIVE, 'e1'))
+        pending.done(EXPENSIVE)
+        self.assertEqual(pending.get(), (EXPENSIVE, 'e2'))
+        pending.done(EXPENSIVE)
+        self.assertIsNone(pending.get())
+
+    def test_close_wakes_waiting_workers(self):
+        pending = AdmissionQueue(capacity=8, max_expensive=1)
+        result = []
+        waiter = threading.Thread(target=lambda: result.append(pending.get()))
+        waiter.start()
+        pending.close()
+        waiter.join(5)
+        self.assertEqual(result, [None])
+
+
+class TokenBucketLimiterTest(unittest.TestCase):
+    """令牌按速率补充，不足时返回需要等待的秒数"""
+
+    def setUp(self):
+        self.now = 1000.0
+        patcher = mock.patch('wiki_admission.time.monotonic', side_effect=lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_burst_then_wait(self):
+        limiter = TokenBucketLimiter(rate=2.0, burst=3)
+        self.assertEqual([limiter.acquire('a') for _ in range(3)], [0, 0, 0])
+        self.assertAlmostEqual(limiter.acquire('a'), 0.5)
+        self.assertEqual(limiter.acquire('b'), 0)
+
+    def test_refill(self):
+        limiter = TokenBucketLimiter(rate=2.0, burst=2)
+        limiter.acquire('a')
+        limiter.acquire('a')
+        self.now += 0.25
+        self.assertAlmostEqual(limiter.acquire('a'), 0.25)
+        self.now += 0.25
+        self.assertEqual(limiter.acquire('a'), 0)
+        # 补充不超过 burst
+        self.now += 60
+        self.assertEqual([limiter.acquire('a') for _ in range(2)], [0, 0])
+        self.assertAlmostEqual(limiter.acquire('a'), 0.5)
+
+    def test_forgets_oldest_client(self):
+        limiter = TokenBucketLimiter(rate=1.0, burst=1, max_clients=1)
+        limiter.acquire('a')
+        self.assertGreater(limiter.acquire('a'), 0)
+        limiter.acquire('b')
+        self.assertEqual(limiter.acquire('a'), 0)
+
+
+class RequestLineTest(unittest.TestCase):
+    """预读请求行的解析与工作线程保留数"""
+
+    def test_complete_request_line(self):
+        for data in (b'GET /a.md HTTP/1.1\r\nHost: x\r\n', b'GET /a.md HTTP/1.1\nHost: x\n', b'HEAD /a.md\r\n'):
+            with self.subTest(data):
+                self.assertEqual(parse_request_line(data)[1], '/a.md')
+        self.assertEqual(parse_request_line(b'POST /api/render HTTP/1.1\r\n'), ('POST', '/api/render'))
+
+    def test_partial_request_line(self):
+        for data in (b'', b'GET', b'GET /a.md', b'GET /a.md HTTP/1.1', b'GET\r\n', b'\r\n', b'\n'):
+            with self.subTest(data):
+                self.assertEqual(parse_request_line(data), (None, None))
+
+    def test_rate_exempt(self):
+        self.assertTrue(is_rate_exempt('/healthz'))
+        self.assertTrue(is_rate_exempt('/readyz?verbose=1'))
+        for target in (None, '/', '/healthz/x', 'http://['):
+            with self.subTest(target):
+                self.assertFalse(is_rate_exempt(target))
+
+    def test_reserved_threads(self):
+        self.assertEqual([reserved_threads(threads) for threads in (1, 2, 4, 8, 16)], [0, 1, 1, 2, 4])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+静态文件Range请求（scripts/wiki_files.py、wiki_server.py 的 send_file）测试
+"""
+
+import http.client
+import http.server
+import sys
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'scripts'))
+
+from wiki_files import MAX_RANGES, parse_range  # noqa: E402
+from wiki_server import BoundedThreadingServer, PageResponseMixin  # noqa: E402
+
+SIZE = 100
+
+
+class ParseRangeTest(unittest.TestCase):
+    """Range头解析：返回合并后的闭区间，无效时None，无法满足时空列表"""
+
+    def test_suffix_range(self):
+        self.assertEqual(parse_range('bytes=-10', SIZE), [(90, 99)])
+        self.assertEqual(parse_range('bytes=-200', SIZE), [(0, 99)])
+
+    def test_open_ended_range(self):
+        self.assertEqual(parse_range('bytes=50-', SIZE), [(50, 99)])
+
+    def test_end_is_clamped(self):
+        self.assertEqual(parse_range('bytes=90-200', SIZE), [(90, 99)])
+
+    def test_multiple_ranges_are_sorted_and_merged(self):
+        self.assertEqual(parse_range('bytes=0-9,20-29', SIZE), [(0, 9), (20, 29)])
+        self.assertEqual(parse_range('bytes=20-29, 0-9, 5-12', SIZE), [(0, 12), (20, 29)])
+        self.assertEqual(parse_range('bytes=0-9,10-19', SIZE), [(0, 19)])
+
+    def test_unsatisfiable_ranges(self):
+        for header in ('bytes=100-', 'bytes=200-300', 'bytes=-0', 'bytes=100-,-0'):
+            with self.subTest(header):
+                self.assertEqual(parse_range(header, SIZE), [])
+        self.assertEqual(parse_range('bytes=0-', 0), [])
+
+    def test_invalid_headers_are_ignored(self):
+        too_many = 'bytes=' + ','.join(f'{index * 2}-{index * 2}' for index in range(MAX_RANGES + 1))
+        for header in ('items=0-1', 'bytes=', 'bytes=5-1', 'bytes=a-b', 'bytes=5', too_many):
+            with self.subTest(header):
+                self.assertIsNone(parse_range(header, SIZE))
+
+
+class FileHandler(PageResponseMixin, http.server.SimpleHTTPRequestHandler):
+    """只发送静态文件的处理类"""
+
+    access_log_mode = 'off'
+    root = None
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, directory=self.root, **kwargs)
+
+    def do_GET(self):
+        self.send_file(self.translate_path(self.path))
+
+
+class SendFileRangeTest(unittest.TestCase):
+    """send_file 按Range返回206/416"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.TemporaryDirectory()
+        Path(cls.directory.name, 'data.bin').write_bytes(bytes(range(SIZE)))
+        FileHandler.root = cls.directory.name
+        cls.server = BoundedThreadingServer(('127.0.0.1', 0), FileHandler, threads=2, max_connections=4)
+        cls.thread = threading.Thread(target=cls.server.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True)
+        cls.thread.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        cls.directory.cleanup()
+
+    def fetch(self, range_header):
+        connection = http.client.HTTPConnection(*self.server.server_address, timeout=5)
+        try:
+            connection.request('GET', '/data.bin', headers={'Range': range_header})
+            response = connection.getresponse()
+            return response, response.read()
+        finally:
+            connection.close()
+
+    def test_suffix_range(self):
+        response, body = self.fetch('bytes=-10')
+        self.assertEqual(response.status, 206)
+        self.assertEqual(response.getheader('Content-Range'), f'bytes 90-99/{SIZE}')
+        self.assertEqual(body, bytes(range(90, 100)))
+
+    def test_out_of_bounds_range(self):
+        response, body = self.fetch(f'bytes={SIZE}-')
+        self.assertEqual(response.status, 416)
+        self.assertEqual(response.getheader('Content-Range'), f'bytes */{SIZE}')
+        self.assertEqual(body, b'')
+
+    def test_multiple_ranges(self):
+        response, body = self.fetch('bytes=0-1,10-11')
+        self.assertEqual(response.status, 206)
+        self.assertTrue(response.getheader('Content-Type').startswith('multipart/byteranges'))
+        self.assertIn(f'Content-Range: bytes 10-11/{SIZE}'.encode(), body)
+
+
+if __name__ == '__main__':
+    unittest.main()
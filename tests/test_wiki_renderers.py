@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+渲染后端注册表（scripts/wiki_renderers.py）测试
+"""
+
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'scripts'))
+
+from wiki_renderers import RENDERERS, Renderer, register_renderer  # noqa: E402
+
+
+class IncompleteRenderer(Renderer):
+    """缺少 document 的后端"""
+
+    name = 'incomplete'
+
+    def version(self):
+        return 'test'
+
+    def blocks(self, content):
+        yield content
+
+
+class RegistryTest(unittest.TestCase):
+    """抽象方法未全部实现的后端不能注册或实例化"""
+
+    def test_incomplete_renderer_is_rejected(self):
+        with self.assertRaises(TypeError):
+            register_renderer(IncompleteRenderer)
+        self.assertNotIn('incomplete', RENDERERS)
+        with self.assertRaises(TypeError):
+            IncompleteRenderer()
+
+    def test_registered_renderers_are_complete(self):
+        self.assertIn('simple', RENDERERS)
+        for name, cls in RENDERERS.items():
+            with self.subTest(name):
+                self.assertFalse(cls.__abstractmethods__)
+
+    def test_simple_renderer_document(self):
+        html, headings, meta = RENDERERS['simple']().document('## 标题\n\n正文')
+        self.assertIn('<h2 id=', html)
+        self.assertEqual([level for level, _, _ in headings], [2])
+        self.assertEqual(meta, {})
+
+
+if __name__ == '__main__':
+    unittest.main()
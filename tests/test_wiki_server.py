@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+并发服务器（scripts/wiki_server.py）测试
+连接监视线程负责所有连接的准入，任何一个连接上的异常都不能使其退出
+"""
+
+import http.client
+import http.server
+import socket
+import sys
+import threading
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'scripts'))
+
+from wiki_admission import TokenBucketLimiter  # noqa: E402
+from wiki_server import BoundedThreadingServer, PageResponseMixin  # noqa: E402
+
+
+class ProbeHandler(PageResponseMixin, http.server.BaseHTTPRequestHandler):
+    """只回复健康检查的处理类"""
+
+    access_log_mode = 'off'
+
+    def do_GET(self):
+        self.send_probe(True)
+
+
+class FailingOnceLimiter:
+    """第一次调用时抛出异常的限速器，模拟准入中的意外错误"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def acquire(self, key):
+        self.calls += 1
+        if self.calls == 1:
+            raise RuntimeError("limiter failure")
+        return 0
+
+
+class WatcherTest(unittest.TestCase):
+    """畸形请求与准入异常只影响所在连接"""
+
+    def setUp(self):
+        self.server = BoundedThreadingServer(('127.0.0.1', 0), ProbeHandler, threads=2, max_connections=4)
+        self.server.handle_error = lambda request, client_address: None
+        self.thread = threading.Thread(target=self.server.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True)
+        self.thread.start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def raw_request(self, data):
+        """发送原始请求，返回响应的状态行（连接被关闭且没有响应时为空）"""
+        with socket.create_connection(self.server.server_address, timeout=5) as sock:
+            sock.sendall(data)
+            response = b''
+            while b'\r\n' not in response:
+                chunk = sock.recv(4096)
+                if not chunk:
+                    break
+                response += chunk
+        return response.partition(b'\r\n')[0]
+
+    def assert_healthy(self):
+        connection = http.client.HTTPConnection(*self.server.server_address, timeout=5)
+        try:
+            connection.request('GET', '/healthz')
+            response = connection.getresponse()
+            self.assertEqual(response.status, 200)
+            self.assertEqual(response.read(), b'ok\n')
+        finally:
+            connection.close()
+
+    def test_unparsable_target(self):
+        for target in (b'http://[', b'http://[/healthz'):
+            with self.subTest(target):
+                status = self.raw_request(b'GET ' + target + b' HTTP/1.1\r\nHost: localhost\r\n\r\n')
+                self.assertTrue(status.startswith(b'HTTP/1.1 400'), status)
+                self.assert_healthy()
+
+    def test_unparsable_target_with_rate_limit(self):
+        self.server.rate_limiter = TokenBucketLimiter(1000, burst=1000)
+        status = self.raw_request(b'GET http://[ HTTP/1.1\r\nHost: localhost\r\n\r\n')
+        self.assertTrue(status.startswith(b'HTTP/1.1 400'), status)
+        self.assert_healthy()
+
+    def test_admission_error_closes_only_that_connection(self):
+        self.server.rate_limiter = FailingOnceLimiter()
+        self.assertEqual(self.raw_request(b'GET /page HTTP/1.1\r\nHost: localhost\r\n\r\n'), b'')
+        self.assert_healthy()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+内置Markdown渲染器（scripts/wiki_simple.py）测试
+病态输入必须在线性时间内渲染：批量渲染API接受最大2MB的文档，回溯爆炸即可拖垮服务器
+"""
+
+import sys
+import time
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'scripts'))
+
+from wiki_simple import render_inline, simple_markdown_to_html  # noqa: E402
+
+# 病态输入的重复次数（约200KB）与渲染时限：线性实现远低于该时限，二次方实现需要数分钟
+PATHOLOGICAL_REPEAT = 100000
+TIME_LIMIT = 2.0
+
+PATHOLOGICAL_INPUTS = {
+    'unclosed_image': '![',
+    'unclosed_link': '[',
+    'unclosed_href': '[a](x',
+    'unclosed_image_src': '![a](x',
+    'heading_trailing_space': '# a' + ' ' * 2,
+    'table_separator': '|-',
+    'emphasis': '*a ',
+    'unterminated_entity': '&a',
+    'bare_angle': '<',
+}
+
+
+class LinearTimeTest(unittest.TestCase):
+    """病态输入的渲染耗时"""
+
+    def assert_fast(self, render, text):
+        began = time.perf_counter()
+        render(text)
+        elapsed = time.perf_counter() - began
+        self.assertLess(elapsed, TIME_LIMIT, f"{len(text)} 字节耗时 {elapsed:.2f} s")
+
+    def test_inline(self):
+        for name, unit in PATHOLOGICAL_INPUTS.items():
+            with self.subTest(name):
+                self.assert_fast(render_inline, unit * PATHOLOGICAL_REPEAT + 'x')
+
+    def test_document(self):
+        documents = {
+            'heading': '# a' + ' ' * PATHOLOGICAL_REPEAT + 'x',
+            'table': '| a | b |\n' + '|-' * PATHOLOGICAL_REPEAT + 'x',
+            'table_padding': '| a | b |\n|-' + ' ' * PATHOLOGICAL_REPEAT + 'x',
+            'links': '[a](x' * PATHOLOGICAL_REPEAT,
+        }
+        for name, text in documents.items():
+            with self.subTest(name):
+                self.assert_fast(simple_markdown_to_html, text)
+
+
+class InlineTest(unittest.TestCase):
+    """行内格式的输出"""
+
+    def test_links_and_images(self):
+        self.assertEqual(render_inline('[文档](a.md) ![图](b.png)'),
+                         '<a href="a.md">文档</a> <img src="b.png" alt="图">')
+
+    def test_unclosed_bracket_before_link(self):
+        self.assertEqual(render_inline('[x [y](z.md)'), '[x <a href="z.md">y</a>')
+
+    def test_code_is_not_formatted(self):
+        self.assertEqual(render_inline('`**a** [b](c)`'), '<code>**a** [b](c)</code>')
+
+    def test_raw_characters_are_escaped(self):
+        self.assertEqual(render_inline('a < b & [c & d](e)'), 'a &lt; b &amp; <a href="e">c &amp; d</a>')
+
+    def test_entities_and_tags_are_kept(self):
+        self.assertEqual(render_inline('x &amp; &#39; <em>y</em>'), 'x &amp; &#39; <em>y</em>')
+
+
+class BlockTest(unittest.TestCase):
+    """标题、表格、代码块、列表与HTML块"""
+
+    def test_heading_closing_hashes(self):
+        html = simple_markdown_to_html('## 标题 ##  ')
+        self.assertIn('<h2 id=', html)
+        self.assertIn('>标题<a class="headerlink"', html)
+
+    def test_table_header(self):
+        html = simple_markdown_to_html('| a | b |\n| :-- | --: |\n| 1 | 2 |')
+        self.assertIn('<th>a</th><th>b</th>', html)
+        self.assertIn('<td>1</td><td>2</td>', html)
+        self.assertNotIn('--', html)
+
+    def test_fenced_code_is_not_formatted(self):
+        html = simple_markdown_to_html('```\n**a** [b](c) <i> &\n# 不是标题\n```')
+        self.assertEqual(html, '<pre><code>**a** [b](c) &lt;i&gt; &amp;\n# 不是标题</code></pre>')
+
+    def test_list_continuation_and_nesting(self):
+        html = simple_markdown_to_html('- a\n  - b\n    续行\n- c\n\n1. x\n2. y')
+        self.assertEqual(html, '<ul><li>a<ul><li>b\n续行</li></ul></li><li>c</li></ul>\n'
+                               '<ol><li>x</li><li>y</li></ol>')
+
+    def test_html_block_needs_a_tag(self):
+        html = simple_markdown_to_html('<div>a & b</div>\n\n<3 & >')
+        self.assertEqual(html, '<div>a & b</div>\n<p>&lt;3 &amp; ></p>')
+
+
+if __name__ == '__main__':
+    unittest.main()